@@ -7,6 +7,14 @@ from pathlib import Path
 import logging
 import ffmpeg
 import re
+import sys
+
+# Shared helpers (transcription cache, Whisper server) live next to the other subtitle tools
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "editing_coding_snippet"))
+from transcription_cache import cached_transcription
+from whisper_server import RemoteWhisperModel, is_server_running
+from audio_source import load_audio, write_wav
+from stream_probe import probe_streams, choose_reference, prepare_for_concat
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 
@@ -67,6 +75,49 @@ def find_matching_video(transcript_file, input_videos):
     
     return None
 
+def run_whisper_timestamped(audio, audio_file):
+    """Run the whisper_timestamped CLI and return its segments as start/end/text dicts
+
+    The CLI only reads files, so the in-memory audio is written to audio_file
+    just for this fallback path.
+    """
+    write_wav(audio_file, audio)
+    try:
+        subprocess.run([
+            "whisper_timestamped", audio_file,
+            "--output_dir", ".",
+            "--output_format", "json",
+            "--model", "base",
+            "--language", "en"
+        ], check=True, capture_output=True, text=True)
+    finally:
+        if os.path.exists(audio_file):
+            os.remove(audio_file)
+    
+    # The output file will be named based on the audio file
+    base_name = Path(audio_file).stem
+    json_output = f"{base_name}.json"
+    
+    if not os.path.exists(json_output):
+        logging.error(f"Expected output file not found: {json_output}")
+        raise Exception("Whisper output not found")
+    
+    with open(json_output, "r", encoding="utf-8") as jf:
+        data = json.load(jf)
+    os.remove(json_output)
+    return [
+        {"text": seg["text"].strip(), "start": seg["start"], "end": seg["end"]}
+        for seg in data.get("segments", [])
+    ]
+
+def run_whisper_server(audio):
+    """Transcribe in-memory 16 kHz samples with the warm base model of the shared Whisper server"""
+    segments, _ = RemoteWhisperModel("base", compute_type="int8").transcribe(audio, language="en")
+    return [
+        {"text": seg.text.strip(), "start": seg.start, "end": seg.end}
+        for seg in segments
+    ]
+
 def load_transcript_with_timestamps(transcript_file, input_video):
     """Load transcript and add timestamps if needed"""
     lines = []
@@ -96,12 +147,7 @@ def load_transcript_with_timestamps(transcript_file, input_video):
 
         logging.info(f"🔊 Extracting audio from video for syncing: {input_video}")
         try:
-            ffmpeg.input(input_video).output(
-                audio_file, 
-                acodec='pcm_s16le', 
-                ac=1, 
-                ar='16000'
-            ).run(overwrite_output=True, quiet=True)
+            audio = load_audio(input_video)
         except Exception as e:
             logging.error(f"Failed to extract audio: {e}")
             return []
@@ -109,32 +155,22 @@ def load_transcript_with_timestamps(transcript_file, input_video):
         logging.info("🧠 Syncing transcript with timestamps using whisper_timestamped...")
         
         try:
-            # Use whisper_timestamped with the audio file
-            result = subprocess.run([
-                "whisper_timestamped", audio_file,
-                "--output_dir", ".",
-                "--output_format", "json",
-                "--model", "base",
-                "--language", "en"
-            ], check=True, capture_output=True, text=True)
-            
-            # The output file will be named based on the audio file
-            base_name = Path(audio_file).stem
-            json_output = f"{base_name}.json"
-            
-            if os.path.exists(json_output):
-                with open(json_output, "r", encoding="utf-8") as jf:
-                    data = json.load(jf)
-                    for seg in data.get("segments", []):
-                        lines.append({
-                            "start": format_time_for_ass(seg["start"]),
-                            "end": format_time_for_ass(seg["end"]),
-                            "text": seg["text"].strip()
-                        })
-                os.remove(json_output)
+            # Prefer the already running shared server (no model reload per file)
+            if is_server_running():
+                engine, run_whisper = "whisper_server", lambda: run_whisper_server(audio)
             else:
-                logging.error(f"Expected output file not found: {json_output}")
-                raise Exception("Whisper output not found")
+                engine, run_whisper = "whisper_timestamped", lambda: run_whisper_timestamped(audio, audio_file)
+            segments = cached_transcription(
+                audio, "base",
+                {"engine": engine, "language": "en"},
+                run_whisper
+            )
+            for seg in segments:
+                lines.append({
+                    "start": format_time_for_ass(seg["start"]),
+                    "end": format_time_for_ass(seg["end"]),
+                    "text": seg["text"]
+                })
                 
         except Exception as e:
             logging.error(f"Failed to sync transcript with whisper: {e}")
@@ -159,10 +195,6 @@ def load_transcript_with_timestamps(transcript_file, input_video):
                         "text": text.strip()
                     })
 
-        # Clean up temporary files
-        if os.path.exists(audio_file):
-            os.remove(audio_file)
-
     return lines
 
 def generate_ass_from_transcript(transcript_lines, ass_path):
@@ -208,16 +240,12 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         title_escaped = title_text.upper().replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
         f.write(f"Dialogue: 0,{format_time_for_ass(0)},{format_time_for_ass(15)},TitleStyle,,0,0,0,,{title_escaped}\n")
 
-def convert_to_ts(video_path, output_ts):
-    """Convert video to MPEG-TS format for concatenation"""
+def convert_to_ts(video_path, output_ts, reference=None):
+    """Write video as MPEG-TS for concatenation: stream copy when it already
+    matches reference (default: itself), otherwise re-encode to match it"""
     try:
-        ffmpeg.input(video_path).output(
-            output_ts, 
-            format="mpegts", 
-            vcodec="libx264", 
-            acodec="aac", 
-            strict="experimental"
-        ).run(overwrite_output=True, quiet=True)
+        copied = prepare_for_concat(video_path, output_ts, reference or probe_streams(video_path))
+        logging.info(f"{'📦 Stream-copied' if copied else '🔄 Re-encoded'} {os.path.basename(video_path)} for concatenation")
     except Exception as e:
         logging.error(f"Failed to convert to TS: {e}")
         raise
@@ -228,8 +256,10 @@ def merge_with_extra(main_video, extra_video, final_output):
     ts2 = "temp2.ts"
 
     try:
-        convert_to_ts(main_video, ts1)
-        convert_to_ts(extra_video, ts2)
+        # Only a clip whose streams differ from the longer one is re-encoded
+        reference = choose_reference([probe_streams(main_video), probe_streams(extra_video)])
+        convert_to_ts(main_video, ts1, reference)
+        convert_to_ts(extra_video, ts2, reference)
 
         ffmpeg.input(f"concat:{ts1}|{ts2}", format="mpegts").output(
             final_output, 
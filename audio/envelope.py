@@ -0,0 +1,189 @@
+import numpy as np
+from scipy import signal, ndimage
+from typing import Optional, Tuple
+
+try:
+    from numba import njit
+except ImportError:  # numba ships with librosa, but keep working without it
+    njit = None
+
+# Attack/release envelope follower shared by the compressor, gate and ducking
+# stages of the enhancer. For every sample:
+#
+#     alpha = attack if x[i] > y[i-1] else release
+#     y[i]  = alpha * x[i] + (1 - alpha) * y[i-1]
+#
+# Backends with identical semantics:
+#   "numba"      compiled sample loop (fastest, used when numba is installed)
+#   "vectorized" NumPy, blockwise closed-form recursion (see _follow_vectorized)
+#   "python"     reference loop, for testing
+
+VECTOR_BLOCK = 2048
+MAX_BRANCH_ITERATIONS = 64
+# Largest -L the closed form may reach; exp(600) ~ 1e260 leaves ample
+# headroom below float64 overflow (~1e308) for the cumulative sum
+MAX_LOG_DECAY = 600.0
+
+# Amplitude envelopes for the gate, de-esser and limiter:
+#   "hilbert"  |analytic signal| computed over overlapping power-of-two FFT
+#              blocks instead of one full-length (often non power-of-two) FFT
+#   "rectify"  rectified signal through a short moving average (cheapest)
+#   "peak"     rectified signal through a moving maximum (never under-reads
+#              a peak, meant for limiting)
+HILBERT_BLOCK = 65536
+HILBERT_OVERLAP = 4096
+RECTIFY_WINDOW = 0.005
+
+
+def smoothing_coefficient(time_constant: float, sr: int) -> float:
+    """One-pole coefficient for a time constant in seconds"""
+    samples = max(1, int(time_constant * sr))
+    return 1 - np.exp(-1 / samples)
+
+
+def _follow_python(x: np.ndarray, attack: float, release: float, initial: float) -> np.ndarray:
+    y = np.empty(len(x))
+    previous = initial
+    for i in range(len(x)):
+        alpha = attack if x[i] > previous else release
+        previous = alpha * x[i] + (1 - alpha) * previous
+        y[i] = previous
+    return y
+
+
+_follow_numba = njit(cache=True, nogil=True)(_follow_python) if njit is not None else None
+
+
+def _recursion(x: np.ndarray, alpha: np.ndarray, initial: float) -> np.ndarray:
+    """y[i] = alpha[i] * x[i] + (1 - alpha[i]) * y[i-1] for per-sample alpha.
+
+    Closed form: with L = cumsum(log(1 - alpha)),
+    y[i] = exp(L[i]) * (initial + cumsum(alpha * x * exp(-L))[i]).
+    exp(-L) grows by 1 / (1 - alpha) per sample and overflows within a
+    block for short time constants, so when -L exceeds MAX_LOG_DECAY the
+    block is solved in pieces that each stay below it, every piece
+    continuing from the last value of the one before.
+    """
+    log_decay = np.cumsum(np.log1p(-alpha))
+    if -log_decay[-1] <= MAX_LOG_DECAY:
+        return np.exp(log_decay) * (initial + np.cumsum(alpha * x * np.exp(-log_decay)))
+    y = np.empty(len(x))
+    start = 0
+    while start < len(x):
+        offset = log_decay[start - 1] if start else 0.0
+        end = max(start + 1, int(np.searchsorted(-log_decay, MAX_LOG_DECAY - offset, side='right')))
+        local = log_decay[start:end] - offset
+        y[start:end] = np.exp(local) * (initial + np.cumsum(alpha[start:end] * x[start:end] * np.exp(-local)))
+        initial = y[end - 1]
+        start = end
+    return y
+
+
+def _follow_vectorized(x: np.ndarray, attack: float, release: float, initial: float) -> np.ndarray:
+    """Blockwise exact solution of the branching recursion.
+
+    Per block, guess which samples are in attack, solve the now linear
+    recursion in closed form, re-derive the branches from the result and
+    repeat until they agree. The first wrong branch is fixed in every round,
+    so this terminates; real signals settle in a few rounds.
+    """
+    y = np.empty(len(x))
+    previous = initial
+    for start in range(0, len(x), VECTOR_BLOCK):
+        block = x[start:start + VECTOR_BLOCK]
+        in_attack = block > previous
+        for _ in range(MAX_BRANCH_ITERATIONS):
+            out = _recursion(block, np.where(in_attack, attack, release), previous)
+            branches = block > np.concatenate(([previous], out[:-1]))
+            if np.array_equal(branches, in_attack):
+                break
+            in_attack = branches
+        else:
+            out = _follow_python(block, attack, release, previous)
+        y[start:start + len(block)] = out
+        previous = out[-1]
+    return y
+
+
+def follow_envelope(x: np.ndarray, attack: float, release: float, initial: float = 0.0,
+                    backend: str = "auto") -> Tuple[np.ndarray, float]:
+    """Smooth x with separate attack/release coefficients.
+
+    Returns (envelope, last value); pass the last value as `initial` for the
+    next block to continue a stream.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if not len(x):
+        return np.zeros(0), initial
+    if backend == "auto":
+        backend = "numba" if _follow_numba is not None else "vectorized"
+    if backend == "numba":
+        if _follow_numba is None:
+            raise ImportError("numba is not installed")
+        y = _follow_numba(x, float(attack), float(release), float(initial))
+    elif backend == "vectorized":
+        y = _follow_vectorized(x, attack, release, initial)
+    elif backend == "python":
+        y = _follow_python(x, attack, release, initial)
+    else:
+        raise ValueError(f"Unknown envelope backend: {backend}")
+    return y, float(y[-1])
+
+
+class EnvelopeFollower:
+    """Stateful follower for block streams"""
+
+    def __init__(self, attack_time: float, release_time: float, sr: int,
+                 initial: float = 0.0, backend: str = "auto"):
+        self.attack = smoothing_coefficient(attack_time, sr)
+        self.release = smoothing_coefficient(release_time, sr)
+        self.value = initial
+        self.backend = backend
+
+    def process(self, x: np.ndarray, initial: Optional[float] = None) -> np.ndarray:
+        if initial is not None:
+            self.value = initial
+        y, self.value = follow_envelope(x, self.attack, self.release, self.value, self.backend)
+        return y
+
+
+def hilbert_envelope(x: np.ndarray, block: int = HILBERT_BLOCK, overlap: int = HILBERT_OVERLAP) -> np.ndarray:
+    """|hilbert(x)| in bounded memory and linear time.
+
+    Overlap-save: each FFT covers `block` samples (a power of two) and only
+    the middle block - 2 * overlap samples are kept, so the circular edge
+    error of every block falls in the discarded overlap.
+    """
+    x = np.asarray(x)
+    # float32 input gives a float32 envelope; the FFTs themselves run in float64
+    dtype = np.float32 if x.dtype == np.float32 else np.float64
+    n = len(x)
+    if n <= block:
+        size = 1 << max(0, int(np.ceil(np.log2(max(n, 1)))))
+        return np.abs(signal.hilbert(x.astype(np.float64), N=size))[:n].astype(dtype)
+    hop = block - 2 * overlap
+    envelope = np.empty(n, dtype=dtype)
+    window = np.empty(block)
+    for start in range(0, n, hop):
+        left = start - overlap
+        segment = x[max(0, left):start + hop + overlap]
+        offset = max(0, -left)
+        window[:] = 0.0
+        window[offset:offset + len(segment)] = segment
+        keep = min(hop, n - start)
+        envelope[start:start + keep] = np.abs(signal.hilbert(window))[overlap:overlap + keep]
+    return envelope
+
+
+def amplitude_envelope(x: np.ndarray, sr: int, method: str = "hilbert", window: float = RECTIFY_WINDOW) -> np.ndarray:
+    """Amplitude envelope of x with the given method (see module notes)"""
+    if method == "hilbert":
+        return hilbert_envelope(x)
+    size = max(1, int(window * sr))
+    rectified = np.abs(x)
+    if method == "rectify":
+        # Mean of a rectified sine is 2/pi of its amplitude
+        return ndimage.uniform_filter1d(rectified, size=size, mode='nearest') * (np.pi / 2)
+    if method == "peak":
+        return ndimage.maximum_filter1d(rectified, size=size, mode='nearest')
+    raise ValueError(f"Unknown envelope method: {method}")
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import numpy as np
+from math import gcd
+from scipy import signal
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Shared file fingerprint of the render cache
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "editing_coding_snippet"))
+from render_cache import fingerprint_file
+
+# One-pass feature extraction for SmartAudioAnalyzer. The analyzer used to
+# frame the full-rate signal three times (25 ms energy frames, a separate
+# ZCR pass, 100 ms noise frames) and run two librosa STFTs for centroid and
+# bandwidth. Here the signal is resampled once to ANALYSIS_RATE and framed
+# once into 25 ms / 10 ms frames: energy and zero crossings come from the
+# frames themselves, noise from the quietest of them. Centroid and bandwidth
+# come from one STFT at the source rate with librosa's defaults (2048-point
+# Hann frames, 512 hop, centered), because the music score's constants are
+# calibrated in Hz for that resolution and a band-limited copy roughly halves
+# the bandwidth. Frames are processed in chunks so memory stays bounded.
+
+ANALYSIS_RATE = 22050
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.01
+FRAME_CHUNK = 4096
+NOISE_PERCENTILE = 10
+SPECTRAL_N_FFT = 2048
+SPECTRAL_HOP = 512
+
+# Profiles are cached next to the source as <file>.audioprofile.json and
+# reused while the file fingerprint and PROFILE_VERSION match
+PROFILE_SUFFIX = ".audioprofile.json"
+PROFILE_VERSION = 2
+
+
+@dataclass
+class AudioFeatures:
+    """Per-frame features plus whole-signal statistics. energy and zcr are
+    frames of the analysis copy; centroid and bandwidth are STFT frames of
+    the source."""
+    energy: np.ndarray
+    zcr: np.ndarray
+    centroid: np.ndarray
+    bandwidth: np.ndarray
+    noise_level: float
+    dynamic_range: float
+    rate: int
+
+
+def analysis_copy(audio: np.ndarray, sr: int, rate: int = ANALYSIS_RATE) -> np.ndarray:
+    """Polyphase-resampled float32 copy of audio at `rate` (no-op at or below it)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if sr <= rate:
+        return audio
+    divisor = gcd(int(sr), int(rate))
+    return signal.resample_poly(audio, rate // divisor, sr // divisor).astype(np.float32)
+
+
+def _frames(audio: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """Strided (n_frames, frame_length) view, no copy"""
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    return np.lib.stride_tricks.sliding_window_view(audio, frame_length)[::hop_length]
+
+
+def spectral_shape(audio: np.ndarray, sr: int, n_fft: int = SPECTRAL_N_FFT,
+                   hop_length: int = SPECTRAL_HOP):
+    """Per-frame spectral centroid and bandwidth (Hz), as librosa.feature computes them"""
+    y = np.pad(np.asarray(audio, dtype=np.float32), n_fft // 2)
+    window = signal.get_window('hann', n_fft).astype(np.float32)
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    frames = _frames(y, n_fft, hop_length)
+    n = len(frames)
+    centroid = np.empty(n)
+    bandwidth = np.empty(n)
+    for start in range(0, n, FRAME_CHUNK):
+        chunk = slice(start, min(n, start + FRAME_CHUNK))
+        magnitude = np.abs(np.fft.rfft(frames[chunk] * window, axis=1))
+        total = magnitude.sum(axis=1)
+        total[total == 0] = 1.0
+        weights = magnitude / total[:, None]
+        centroid[chunk] = weights @ freqs
+        bandwidth[chunk] = np.sqrt(np.einsum('ij,ij->i', weights, (freqs[None, :] - centroid[chunk, None]) ** 2))
+    return centroid, bandwidth
+
+
+def extract_features(audio: np.ndarray, sr: int, rate: int = ANALYSIS_RATE) -> AudioFeatures:
+    """Energy, ZCR and noise level from one framing of the analysis copy; centroid and
+    bandwidth from one STFT of the source"""
+    dynamic_range = float(np.max(audio) - np.min(audio)) if len(audio) else 0.0
+    rate = min(int(sr), rate)
+    y = analysis_copy(audio, sr, rate)
+
+    frame_length = int(FRAME_SECONDS * rate)
+    hop_length = int(HOP_SECONDS * rate)
+    frames = _frames(y, frame_length, hop_length)
+    crossings = _frames(np.signbit(y).astype(np.int8), frame_length, hop_length)
+    n = len(frames)
+    energy = np.empty(n)
+    zcr = np.empty(n)
+    for start in range(0, n, FRAME_CHUNK):
+        chunk = slice(start, min(n, start + FRAME_CHUNK))
+        block = frames[chunk]
+        energy[chunk] = np.einsum('ij,ij->i', block, block, dtype=np.float64)
+        zcr[chunk] = np.count_nonzero(np.diff(crossings[chunk], axis=1), axis=1) / frame_length
+
+    centroid, bandwidth = spectral_shape(audio, sr)
+
+    # Noise floor: std of the quietest frames, read back at the source rate so
+    # broadband hiss above the analysis band still counts
+    quiet = np.flatnonzero(energy <= np.percentile(energy, NOISE_PERCENTILE))
+    if len(quiet):
+        scale = sr / rate
+        source_frames = _frames(np.asarray(audio), int(round(frame_length * scale)), 1)
+        starts = np.minimum(np.round(quiet * hop_length * scale).astype(int), len(source_frames) - 1)
+        noise_level = float(np.std(source_frames[starts]))
+    else:
+        noise_level = float(np.std(audio) * 0.1)
+
+    return AudioFeatures(energy, zcr, centroid, bandwidth, noise_level, dynamic_range, rate)
+
+
+def sidecar_path(source_path: str) -> str:
+    return f"{source_path}{PROFILE_SUFFIX}"
+
+
+def load_sidecar(source_path: str, sample_rate: int) -> Optional[Dict[str, Any]]:
+    """Cached analysis for source_path, or None if missing or stale"""
+    try:
+        with open(sidecar_path(source_path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (data.get("version") != PROFILE_VERSION or data.get("sample_rate") != sample_rate
+                or data.get("fingerprint") != fingerprint_file(source_path)):
+            return None
+        return data
+    except Exception:
+        return None
+
+
+def save_sidecar(source_path: str, sample_rate: int, data: Dict[str, Any]) -> bool:
+    """Write the analysis sidecar atomically; False if the folder is not writable"""
+    path = sidecar_path(source_path)
+    temp_path = f"{path}.tmp"
+    try:
+        payload = dict(data, version=PROFILE_VERSION, sample_rate=sample_rate,
+                       fingerprint=fingerprint_file(source_path))
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        os.replace(temp_path, path)
+        return True
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
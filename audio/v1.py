@@ -1,8 +1,12 @@
 import os
 import sys
+import queue
+import shutil
+import argparse
+import tempfile
 import threading
+import multiprocessing
 import numpy as np
-import librosa
 import soundfile as sf
 from scipy import signal, ndimage
 import noisereduce as nr
@@ -12,11 +16,100 @@ from tkinter import filedialog, messagebox, ttk
 import subprocess
 from pathlib import Path
 import time
-from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass
+import tracemalloc
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Any
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
 import warnings
+
+# Shared ffmpeg -> NumPy decoder (no temp WAV on disk)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "editing_coding_snippet"))
+from audio_source import load_audio, FFmpegAudioSource
+from loudness import LoudnessMeter, normalization_gain_db
+from envelope import follow_envelope, smoothing_coefficient, amplitude_envelope
+from features import AudioFeatures, extract_features, load_sidecar, save_sidecar
+
 warnings.filterwarnings('ignore')
 
+# Streaming mode: audio is processed in blocks so memory stays bounded
+STREAM_BLOCK_SECONDS = 10.0
+ANALYSIS_SLICE_SECONDS = 3.0   # audio kept per block for content analysis
+ANALYSIS_MAX_SLICES = 60       # at most 3 minutes analysed, spread over the file
+NOISE_REDUCTION_CONTEXT = 1.0  # seconds of overlap for STFT-based stages
+ENVELOPE_CONTEXT = 0.25        # seconds of overlap for Hilbert-envelope stages
+
+# Noise reduction engines: "multiband" = noisereduce per Butterworth band
+# (bands run concurrently), "spectral" = one shared STFT with per-band gating
+NOISE_ENGINES = {
+    "multiband": "Multi-band (noisereduce, best quality)",
+    "spectral": "Spectral gating (single STFT, fastest)"
+}
+NOISE_BANDS = [(0, 200), (200, 1000), (1000, 4000), (4000, None)]
+
+@dataclass
+class Stage:
+    """One node of the processing chain: a float32 block -> block function
+    (allowed to work in place) plus the overlap it needs when streaming"""
+    name: str
+    apply: Callable[[np.ndarray], np.ndarray]
+    context: float = 0.0  # seconds of neighbouring audio; 0 = exact blockwise
+
+class StageProfiler:
+    """Per-stage wall time and, optionally, peak traced allocation.
+    
+    Memory is measured with tracemalloc (NumPy reports its buffers to it);
+    tracing slows allocations down, so it is only on when requested.
+    """
+    
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.started_tracing = False
+        self.stats: Dict[str, Dict[str, float]] = {}
+        
+    def measure(self, name: str, fn: Callable, *args):
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            entry = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_mb": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += time.perf_counter() - start
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                entry["peak_mb"] = max(entry["peak_mb"], peak / 2**20)
+    
+    def finish(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+    
+    def report(self) -> str:
+        lines = []
+        for name, entry in self.stats.items():
+            line = f"{name:<16}{entry['seconds']:8.2f} s{int(entry['calls']):6d} blocks"
+            if self.track_memory:
+                line += f"{entry['peak_mb']:9.1f} MB peak"
+            lines.append(line)
+        return "\n".join(lines)
+
+@lru_cache(maxsize=64)
+def butter_sos(order: int, cutoff, btype: str, sr: int) -> np.ndarray:
+    """Cached float32 Butterworth SOS (float32 coefficients keep sosfilt in float32)"""
+    return signal.butter(order, cutoff, btype=btype, fs=sr, output='sos').astype(np.float32)
+
+def _writable(audio: np.ndarray) -> np.ndarray:
+    """audio itself if it can be modified in place as float32, else a float32 copy"""
+    if audio.flags.writeable and audio.dtype == np.float32:
+        return audio
+    return audio.astype(np.float32)
+
 @dataclass
 class AudioProfile:
     """Audio content profile for smart processing"""
@@ -36,18 +129,21 @@ class SmartAudioAnalyzer:
     def analyze_audio_content(self, audio: np.ndarray, sr: int) -> AudioProfile:
         """Analyze audio content and determine optimal processing settings"""
         
+        # Every feature comes from one framing of a downsampled copy
+        features = extract_features(audio, sr)
+        
         # Voice activity detection
-        voice_activity = self._detect_voice_activity(audio, sr)
-        speech_ratio = np.mean(voice_activity)
+        voice_activity = self._detect_voice_activity(features)
+        speech_ratio = float(np.mean(voice_activity))
         
         # Music detection
-        music_ratio = self._detect_music_content(audio, sr)
+        music_ratio = self._detect_music_content(features)
         
         # Noise level estimation
-        noise_level = self._estimate_noise_level(audio, sr)
+        noise_level = features.noise_level
         
         # Dynamic range
-        dynamic_range = np.max(audio) - np.min(audio)
+        dynamic_range = features.dynamic_range
         
         # Content type classification
         content_type = self._classify_content_type(speech_ratio, music_ratio)
@@ -66,50 +162,22 @@ class SmartAudioAnalyzer:
             recommended_settings=recommended_settings
         )
     
-    def _detect_voice_activity(self, audio: np.ndarray, sr: int) -> np.ndarray:
-        """Detect voice activity using spectral features"""
-        frame_length = int(0.025 * sr)  # 25ms frames
-        hop_length = int(0.01 * sr)     # 10ms hop
-        
-        frames = librosa.util.frame(audio, frame_length=frame_length, hop_length=hop_length)
-        energy = np.sum(frames**2, axis=0)
-        
-        # Zero crossing rate
-        zcr = librosa.feature.zero_crossing_rate(audio, frame_length=frame_length, hop_length=hop_length)[0]
-        
+    def _detect_voice_activity(self, features: AudioFeatures) -> np.ndarray:
+        """Detect voice activity from frame energy and zero crossing rate"""
         # Voice activity based on energy and ZCR thresholds
-        energy_threshold = np.percentile(energy, 30)
-        zcr_threshold = np.percentile(zcr, 70)
+        energy_threshold = np.percentile(features.energy, 30)
+        zcr_threshold = np.percentile(features.zcr, 70)
         
-        voice_activity = (energy > energy_threshold) & (zcr < zcr_threshold)
+        voice_activity = (features.energy > energy_threshold) & (features.zcr < zcr_threshold)
         return voice_activity
     
-    def _detect_music_content(self, audio: np.ndarray, sr: int) -> float:
+    def _detect_music_content(self, features: AudioFeatures) -> float:
         """Detect music content ratio"""
-        spectral_centroid = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=audio, sr=sr)[0]
-        
-        centroid_var = np.var(spectral_centroid)
-        bandwidth_mean = np.mean(spectral_bandwidth)
+        centroid_var = np.var(features.centroid)
+        bandwidth_mean = np.mean(features.bandwidth)
         
         music_score = min(1.0, (bandwidth_mean / 2000) * (1 / (1 + centroid_var / 1000)))
-        return music_score
-    
-    def _estimate_noise_level(self, audio: np.ndarray, sr: int) -> float:
-        """Estimate background noise level"""
-        frame_length = int(0.1 * sr)  # 100ms frames
-        frames = librosa.util.frame(audio, frame_length=frame_length, hop_length=frame_length//2)
-        frame_energy = np.sum(frames**2, axis=0)
-        
-        noise_threshold = np.percentile(frame_energy, 10)
-        noise_frames = frames[:, frame_energy <= noise_threshold]
-        
-        if noise_frames.size > 0:
-            noise_level = np.std(noise_frames)
-        else:
-            noise_level = np.std(audio) * 0.1
-        
-        return float(noise_level)
+        return float(music_score)
     
     def _classify_content_type(self, speech_ratio: float, music_ratio: float) -> str:
         """Classify audio content type"""
@@ -185,12 +253,30 @@ class SmartAudioAnalyzer:
 class ProfessionalAudioProcessor:
     """Professional-grade audio processing engine"""
     
-    def __init__(self):
+    def __init__(self, noise_engine: str = "multiband", workers: Optional[int] = None,
+                 envelope_backend: str = "auto", envelope_method: str = "hilbert",
+                 use_profile_cache: bool = True, instrument: bool = False):
         self.analyzer = SmartAudioAnalyzer()
+        self.noise_engine = noise_engine
+        self.envelope_backend = envelope_backend
+        # "hilbert" (blockwise analytic envelope) or "fast" (rectify + smoothing)
+        self.envelope_method = envelope_method
+        self.workers = workers or min(len(NOISE_BANDS), os.cpu_count() or 1)
+        # Reuse <video>.audioprofile.json analysis sidecars
+        self.use_profile_cache = use_profile_cache
+        # Report per-stage time and peak allocation after each run
+        self.instrument = instrument
+        self.stage_stats = StageProfiler()
         
     def process_audio(self, audio: np.ndarray, sr: int, 
-                     progress_callback: Optional[callable] = None) -> np.ndarray:
-        """Apply professional audio processing chain"""
+                     progress_callback: Optional[callable] = None, inplace: bool = False) -> np.ndarray:
+        """Apply professional audio processing chain
+        
+        Works on one float32 buffer: the stage graph runs over block views of
+        it and writes every finished block back into the same buffer, so peak
+        memory is the buffer plus a few blocks. With inplace=True a float32
+        input is processed without any copy.
+        """
         
         if progress_callback:
             progress_callback("🔍 Analyzing audio content...")
@@ -202,75 +288,269 @@ class ProfessionalAudioProcessor:
         if progress_callback:
             progress_callback(f"📊 Detected: {profile.content_type.upper()} content")
         
-        processed_audio = audio.copy()
+        buffer = audio if inplace and audio.dtype == np.float32 else np.array(audio, dtype=np.float32)
+        dc_offset = float(np.mean(buffer, dtype=np.float64)) if len(buffer) else 0.0
+        block_len = int(STREAM_BLOCK_SECONDS * sr)
+        blocks = (buffer[start:start + block_len] for start in range(0, len(buffer), block_len))
         
         # Professional processing chain
-        if progress_callback:
-            progress_callback("🔧 Removing DC offset...")
-        processed_audio = self._remove_dc_offset(processed_audio)
-        
-        if progress_callback:
-            progress_callback("🎛️ Applying advanced noise reduction...")
-        processed_audio = self._advanced_noise_reduction(processed_audio, sr, settings)
-        
-        if progress_callback:
-            progress_callback("🚪 Applying intelligent noise gate...")
-        processed_audio = self._apply_noise_gate(processed_audio, sr, settings)
-        
-        if progress_callback:
-            progress_callback("🎚️ Applying smart EQ...")
-        processed_audio = self._apply_eq(processed_audio, sr, settings)
+        self.stage_stats = StageProfiler(self.instrument)
+        meter = LoudnessMeter(sr, channels=1)
+        written = 0
+        try:
+            for block in self._run_stages(blocks, self._stage_graph(sr, settings, dc_offset), sr):
+                buffer[written:written + len(block)] = block
+                meter.process(block)
+                written += len(block)
+                if progress_callback:
+                    progress_callback(f"🎛️ Enhancing audio... {100 * written / max(1, len(buffer)):.0f}%")
+            
+            if progress_callback:
+                progress_callback("📏 Normalizing to YouTube standards...")
+            buffer *= np.float32(10**(self._normalization_gain_db(meter, settings)/20))
+        finally:
+            self.stage_stats.finish()
+        self._report_stage_stats(progress_callback)
         
+        return buffer, profile
+    
+    def analyze_stream(self, source: FFmpegAudioSource) -> Tuple[AudioProfile, float, int]:
+        """First pass over a stream: content profile, DC offset and length.
+        
+        The profile is computed on evenly spread slices of the file (bounded
+        size), the DC offset on every sample. Results are kept in a sidecar
+        next to the source, so re-running a batch skips this pass entirely.
+        """
+        sr = source.sample_rate
+        cache_source = self.use_profile_cache and source.start is None and source.duration is None
+        if cache_source:
+            cached = load_sidecar(source.path, sr)
+            if cached is not None:
+                return AudioProfile(**cached["profile"]), cached["dc_offset"], cached["frames"]
+        
+        slice_len = int(ANALYSIS_SLICE_SECONDS * sr)
+        slices: List[np.ndarray] = []
+        stride = 1
+        total = 0.0
+        frames = 0
+        for index, block in enumerate(source.iter_blocks(int(STREAM_BLOCK_SECONDS * sr))):
+            total += float(np.sum(block, dtype=np.float64))
+            frames += len(block)
+            if index % stride == 0:
+                slices.append(block[:slice_len].copy())
+                if len(slices) > ANALYSIS_MAX_SLICES:
+                    # Keep every other slice so the sample stays uniform over the file
+                    slices = slices[::2]
+                    stride *= 2
+        if not frames:
+            raise Exception("No audio samples decoded")
+        profile = self.analyzer.analyze_audio_content(np.concatenate(slices), sr)
+        if cache_source:
+            save_sidecar(source.path, sr, {"profile": asdict(profile), "dc_offset": total / frames, "frames": frames})
+        return profile, total / frames, frames
+    
+    def process_stream(self, source: FFmpegAudioSource, output_path: str,
+                       progress_callback: Optional[callable] = None) -> Tuple[AudioProfile, float]:
+        """Run the processing chain block by block and write output incrementally.
+        
+        Filters (EQ, exciter) carry their sosfilt state and the compressor its
+        envelope across blocks; noise reduction, gate, de-esser and limiter
+        work on overlapping windows. Peak memory is a few blocks regardless
+        of file length. The output is loudness-metered as it is written;
+        returns (profile, normalization gain in dB) and the gain is applied
+        when the audio is muxed instead of in another pass.
+        """
+        sr = source.sample_rate
         if progress_callback:
-            progress_callback("🎯 Applying dynamic compression...")
-        processed_audio = self._apply_compression(processed_audio, sr, settings)
-        
+            progress_callback("🔍 Analyzing audio content...")
+        profile, dc_offset, total_frames = self.analyze_stream(source)
+        settings = profile.recommended_settings
         if progress_callback:
-            progress_callback("✨ Applying de-esser and exciter...")
-        processed_audio = self._apply_deesser(processed_audio, sr)
-        processed_audio = self._apply_exciter(processed_audio, sr)
+            progress_callback(f"📊 Detected: {profile.content_type.upper()} content")
         
-        if progress_callback:
-            progress_callback("🔒 Applying limiter...")
-        processed_audio = self._apply_limiter(processed_audio, sr, settings)
+        self.stage_stats = StageProfiler(self.instrument)
+        blocks = source.iter_blocks(int(STREAM_BLOCK_SECONDS * sr))
         
-        if progress_callback:
-            progress_callback("📏 Normalizing to YouTube standards...")
-        processed_audio = self._normalize_audio(processed_audio, settings)
+        meter = LoudnessMeter(sr, channels=1)
+        written = 0
+        try:
+            with sf.SoundFile(output_path, 'w', samplerate=sr, channels=1, subtype='FLOAT') as out_file:
+                for block in self._run_stages(blocks, self._stage_graph(sr, settings, dc_offset), sr):
+                    out_file.write(block)
+                    meter.process(block)
+                    written += len(block)
+                    if progress_callback:
+                        progress_callback(f"🎛️ Enhancing audio... {100 * written / total_frames:.0f}%")
+        finally:
+            self.stage_stats.finish()
+        self._report_stage_stats(progress_callback)
         
-        return processed_audio, profile
+        return profile, self._normalization_gain_db(meter, settings)
+    
+    def _stage_graph(self, sr: int, settings: Dict, dc_offset: float) -> List["Stage"]:
+        """The processing chain as an explicit, ordered stage list.
+        
+        Stages take a float32 block, may modify it in place and return the
+        result. Stateful stages (filters, compressor) continue exactly from
+        block to block through `state`; stages with a context see that many
+        seconds of the neighbouring blocks as well.
+        """
+        state: Dict[str, Any] = {}
+        return [
+            Stage("dc_offset", lambda x: self._remove_dc_offset(x, dc_offset)),
+            Stage("noise_reduction", lambda x: self._advanced_noise_reduction(x, sr, settings), NOISE_REDUCTION_CONTEXT),
+            Stage("noise_gate", lambda x: self._apply_noise_gate(x, sr, settings), ENVELOPE_CONTEXT),
+            Stage("eq", lambda x: self._apply_eq(x, sr, settings, state)),
+            Stage("compression", lambda x: self._apply_compression(x, sr, settings, state)),
+            Stage("deesser", lambda x: self._apply_deesser(x, sr), ENVELOPE_CONTEXT),
+            Stage("exciter", lambda x: self._apply_exciter(x, sr, state)),
+            Stage("limiter", lambda x: self._apply_limiter(x, sr, settings), ENVELOPE_CONTEXT),
+        ]
+    
+    def _run_stages(self, blocks: Iterator[np.ndarray], stages: List["Stage"], sr: int) -> Iterator[np.ndarray]:
+        """Chain the stage graph over a block stream (lazily, block by block)"""
+        for stage in stages:
+            apply = self._timed(stage)
+            if stage.context:
+                blocks = self._with_context(blocks, int(stage.context * sr), apply)
+            else:
+                blocks = map(apply, blocks)
+        return blocks
+    
+    def _timed(self, stage: "Stage"):
+        profiler = self.stage_stats
+        return lambda x: profiler.measure(stage.name, stage.apply, x)
+    
+    def _report_stage_stats(self, progress_callback: Optional[callable]):
+        if self.instrument and progress_callback:
+            progress_callback("📈 Stage statistics:\n" + self.stage_stats.report())
+    
+    def _with_context(self, blocks, context: int, stage):
+        """Apply a whole-signal stage to a block stream using overlapping windows.
+        
+        Each block is processed together with `context` samples before and
+        after it and only the block's own part is kept, so edge effects land
+        in the discarded overlap. Output lags the input by one block; the
+        overlap is copied out before a block is passed on, so callers may
+        overwrite input blocks with the output.
+        """
+        previous_tail = np.zeros(0, dtype=np.float32)
+        current = None
+        for block in blocks:
+            if current is not None:
+                window = np.concatenate((previous_tail, current, block[:context]))
+                offset = len(previous_tail)
+                previous_tail = np.concatenate((previous_tail, current))[-context:]
+                yield stage(window)[offset:offset + len(current)]
+            current = block
+        if current is not None and len(current):
+            window = np.concatenate((previous_tail, current))
+            yield stage(window)[len(previous_tail):]
+    
+    def _envelope(self, audio: np.ndarray, sr: int, peak: bool = False) -> np.ndarray:
+        """Amplitude envelope shared by the gate, de-esser and limiter"""
+        if self.envelope_method == "fast":
+            return amplitude_envelope(audio, sr, "peak" if peak else "rectify", window=0.001 if peak else 0.005)
+        return amplitude_envelope(audio, sr, "hilbert")
     
-    def _remove_dc_offset(self, audio: np.ndarray) -> np.ndarray:
+    def _sosfilt(self, sos: np.ndarray, audio: np.ndarray, state: Optional[Dict], name: str) -> np.ndarray:
+        """sosfilt that carries its filter state in `state` between blocks"""
+        if state is None:
+            return signal.sosfilt(sos, audio)
+        zi = state.get(name)
+        if zi is None:
+            zi = np.zeros((sos.shape[0], 2), dtype=audio.dtype)
+        filtered, state[name] = signal.sosfilt(sos, audio, zi=zi)
+        return filtered
+    
+    def _remove_dc_offset(self, audio: np.ndarray, offset: Optional[float] = None) -> np.ndarray:
         """Remove DC offset"""
-        return audio - np.mean(audio)
+        offset = np.mean(audio) if offset is None else offset
+        out = audio if audio.flags.writeable and audio.dtype == np.float32 else np.empty(audio.shape, np.float32)
+        return np.subtract(audio, offset, out=out, casting='unsafe')
     
     def _advanced_noise_reduction(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
         """Advanced multi-band noise reduction"""
-        strength = settings.get("noise_reduction_strength", 0.6)
+        engine = settings.get("noise_reduction_engine", self.noise_engine)
+        if engine == "spectral":
+            return self._spectral_gate_noise_reduction(audio, sr, settings)
         
-        # Multi-band noise reduction
+        strength = settings.get("noise_reduction_strength", 0.6)
         nyquist = sr // 2
-        bands = [(0, 200), (200, 1000), (1000, 4000), (4000, nyquist)]
-        processed_bands = []
         
-        for low, high in bands:
+        def reduce_band(band):
+            low, high = band
+            high = nyquist if high is None else high
             # Bandpass filter
-            sos = signal.butter(4, [max(1, low), min(nyquist-1, high)], 
-                              btype='band', fs=sr, output='sos')
+            sos = butter_sos(4, (max(1, low), min(nyquist-1, high)), 'band', sr)
             band_audio = signal.sosfilt(sos, audio)
             
-            # Adaptive noise reduction
-            band_strength = strength
-            if low < 200:  # Low frequencies - more aggressive
-                band_strength *= 1.3
-            elif high > 4000:  # High frequencies - moderate
-                band_strength *= 0.9
-            
             # Apply spectral subtraction
-            reduced_band = nr.reduce_noise(y=band_audio, sr=sr, prop_decrease=band_strength)
-            processed_bands.append(reduced_band)
-        
-        return np.sum(processed_bands, axis=0)
+            return nr.reduce_noise(y=band_audio, sr=sr, prop_decrease=self._band_strength(strength, low, high))
+        
+        # Bands are independent; scipy/numpy release the GIL, so threads scale
+        # with cores without copying the audio to other processes. Each band
+        # is summed into one float32 buffer as soon as it is done, so at most
+        # `workers` band copies exist at a time.
+        result = np.zeros_like(audio, dtype=np.float32)
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for band_audio in as_completed([executor.submit(reduce_band, band) for band in NOISE_BANDS]):
+                    result += band_audio.result()
+        else:
+            for band in NOISE_BANDS:
+                result += reduce_band(band)
+        return result
+    
+    def _band_strength(self, strength: float, low: float, high: float) -> float:
+        """Adaptive per-band noise reduction strength"""
+        if low < 200:  # Low frequencies - more aggressive
+            return strength * 1.3
+        if high > 4000:  # High frequencies - moderate
+            return strength * 0.9
+        return strength
+    
+    def _spectral_gate_noise_reduction(self, audio: np.ndarray, sr: int, settings: Dict,
+                                       n_fft: int = 2048, n_std: float = 1.5) -> np.ndarray:
+        """Spectral gating over one STFT shared by all bands.
+        
+        The noise floor per frequency bin is taken from the quietest frames;
+        bins below floor + n_std * spread are attenuated by the strength of
+        the band the bin belongs to. The mask is smoothed over time and
+        frequency to avoid musical noise.
+        """
+        if len(audio) < n_fft:
+            return audio
+        strength = settings.get("noise_reduction_strength", 0.6)
+        hop = n_fft // 4
+        freqs, _, spectrum = signal.stft(audio, fs=sr, nperseg=n_fft, noverlap=n_fft - hop)
+        magnitude_db = 20 * np.log10(np.abs(spectrum) + np.float32(1e-10))
+        
+        # Noise statistics per bin from the quietest 30% of frames
+        frame_level = np.mean(magnitude_db, axis=0)
+        quiet = frame_level <= np.percentile(frame_level, 30)
+        noise_db = magnitude_db[:, quiet]
+        threshold = noise_db.mean(axis=1, keepdims=True) + n_std * noise_db.std(axis=1, keepdims=True)
+        
+        # Per-bin reduction amount from the same band layout as the multiband engine
+        reduction = np.empty(len(freqs), dtype=np.float32)
+        nyquist = sr // 2
+        for low, high in NOISE_BANDS:
+            high = nyquist if high is None else high
+            in_band = (freqs >= low) & (freqs <= high)
+            reduction[in_band] = min(1.0, self._band_strength(strength, low, high))
+        
+        speech_mask = (magnitude_db > threshold).astype(np.float32)
+        del magnitude_db
+        speech_mask = ndimage.uniform_filter(speech_mask, size=(3, 5), mode='nearest')
+        # gain = 1 - reduction * (1 - mask), built in place in the mask buffer
+        speech_mask -= 1.0
+        speech_mask *= reduction[:, None]
+        speech_mask += 1.0
+        spectrum *= speech_mask
+        
+        _, cleaned = signal.istft(spectrum, fs=sr, nperseg=n_fft, noverlap=n_fft - hop)
+        return cleaned[:len(audio)].astype(np.float32, copy=False)
     
     def _apply_noise_gate(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
         """Apply intelligent noise gate"""
@@ -280,43 +560,45 @@ class ProfessionalAudioProcessor:
         threshold_linear = 10**(threshold/20)
         
         # Calculate smooth envelope
-        envelope = np.abs(signal.hilbert(audio))
+        envelope = self._envelope(audio, sr)
         window_size = int(0.01 * sr)  # 10ms
         envelope_smooth = ndimage.uniform_filter1d(envelope, size=window_size, mode='constant')
         
         # Apply gate with smooth transitions
-        gate_reduction = np.ones_like(envelope_smooth)
-        below_threshold = envelope_smooth < threshold_linear
-        gate_reduction[below_threshold] = 1.0 / ratio
+        gate_reduction = np.where(envelope_smooth < threshold_linear, np.float32(1.0 / ratio), np.float32(1.0))
         
         # Smooth gate transitions
         gate_reduction = ndimage.uniform_filter1d(gate_reduction, size=window_size//2, mode='constant')
         
-        return audio * gate_reduction
+        audio = _writable(audio)
+        audio *= gate_reduction
+        return audio
     
-    def _apply_eq(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
+    def _apply_eq(self, audio: np.ndarray, sr: int, settings: Dict, state: Optional[Dict] = None) -> np.ndarray:
         """Apply intelligent EQ"""
         low_cut = settings.get("eq_low_cut", 80)
         high_cut = settings.get("eq_high_cut", 15000)
         
         # High-pass filter (remove rumble)
         if low_cut > 20:
-            sos_hp = signal.butter(4, low_cut, btype='high', fs=sr, output='sos')
-            audio = signal.sosfilt(sos_hp, audio)
+            sos_hp = butter_sos(4, low_cut, 'high', sr)
+            audio = self._sosfilt(sos_hp, audio, state, "eq_high_pass")
         
         # Low-pass filter (remove harsh highs)
         if high_cut < sr//2 - 1000:
-            sos_lp = signal.butter(4, high_cut, btype='low', fs=sr, output='sos')
-            audio = signal.sosfilt(sos_lp, audio)
+            sos_lp = butter_sos(4, high_cut, 'low', sr)
+            audio = self._sosfilt(sos_lp, audio, state, "eq_low_pass")
         
         # Speech presence boost (2-4 kHz)
-        sos_presence = signal.butter(2, [2000, 4000], btype='band', fs=sr, output='sos')
-        presence = signal.sosfilt(sos_presence, audio)
-        audio = audio + 0.12 * presence
+        sos_presence = butter_sos(2, (2000, 4000), 'band', sr)
+        presence = self._sosfilt(sos_presence, audio, state, "eq_presence")
+        presence *= 0.12
+        audio = _writable(audio)
+        audio += presence
         
         return audio
     
-    def _apply_compression(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
+    def _apply_compression(self, audio: np.ndarray, sr: int, settings: Dict, state: Optional[Dict] = None) -> np.ndarray:
         """Apply professional compression"""
         threshold = settings.get("compressor_threshold", -12)
         ratio = settings.get("compressor_ratio", 3.0)
@@ -324,64 +606,66 @@ class ProfessionalAudioProcessor:
         release_time = 0.1   # 100ms
         
         # Convert to dB
-        audio_db = 20 * np.log10(np.abs(audio) + 1e-10)
+        audio_db = 20 * np.log10(np.abs(audio) + np.float32(1e-10))
         
         # Calculate gain reduction
-        gain_reduction = np.zeros_like(audio_db)
-        above_threshold = audio_db > threshold
-        gain_reduction[above_threshold] = (audio_db[above_threshold] - threshold) * (1 - 1/ratio)
-        
-        # Smooth gain reduction (attack/release)
-        attack_samples = int(attack_time * sr)
-        release_samples = int(release_time * sr)
-        
-        smoothed_gain = np.zeros_like(gain_reduction)
-        for i in range(1, len(gain_reduction)):
-            if gain_reduction[i] > smoothed_gain[i-1]:  # Attack
-                alpha = 1 - np.exp(-1 / attack_samples)
-            else:  # Release
-                alpha = 1 - np.exp(-1 / release_samples)
-            
-            smoothed_gain[i] = alpha * gain_reduction[i] + (1 - alpha) * smoothed_gain[i-1]
+        gain_reduction = np.maximum(audio_db - threshold, 0, out=audio_db)
+        gain_reduction *= (1 - 1/ratio)
+        
+        # Smooth gain reduction (attack/release); the envelope continues
+        # from the previous block when streaming
+        previous = state.get("compressor_gain", 0.0) if state is not None else 0.0
+        smoothed_gain, previous = follow_envelope(
+            gain_reduction, smoothing_coefficient(attack_time, sr), smoothing_coefficient(release_time, sr),
+            previous, self.envelope_backend
+        )
+        if state is not None:
+            state["compressor_gain"] = previous
         
         # Apply compression
-        compressed_gain = 10**(-smoothed_gain/20)
-        return audio * compressed_gain
+        smoothed_gain *= -1/20
+        audio = _writable(audio)
+        audio *= np.power(10.0, smoothed_gain, out=smoothed_gain)
+        return audio
     
     def _apply_deesser(self, audio: np.ndarray, sr: int) -> np.ndarray:
         """Apply de-esser to reduce sibilance"""
         # Detect sibilant frequencies (5-10 kHz)
-        sos = signal.butter(4, [5000, 10000], btype='band', fs=sr, output='sos')
+        sos = butter_sos(4, (5000, 10000), 'band', sr)
         sibilant_band = signal.sosfilt(sos, audio)
         
         # Calculate sibilant energy
-        sibilant_energy = np.abs(signal.hilbert(sibilant_band))
+        sibilant_energy = self._envelope(sibilant_band, sr)
         threshold = np.percentile(sibilant_energy, 85)
         
         # Apply de-essing
-        reduction = np.ones_like(sibilant_energy)
-        excessive_sibilance = sibilant_energy > threshold
-        reduction[excessive_sibilance] = 0.4
+        reduction = np.where(sibilant_energy > threshold, np.float32(0.4), np.float32(1.0))
         
         # Smooth reduction
         window_size = int(0.005 * sr)  # 5ms
         reduction_smooth = ndimage.uniform_filter1d(reduction, size=window_size, mode='constant')
         
-        # Apply only to sibilant frequencies
-        deessed_sibilant = sibilant_band * reduction_smooth
-        
-        return audio - sibilant_band + deessed_sibilant
+        # Apply only to sibilant frequencies: audio - band + band * reduction
+        reduction_smooth -= 1.0
+        sibilant_band *= reduction_smooth
+        audio = _writable(audio)
+        audio += sibilant_band
+        return audio
     
-    def _apply_exciter(self, audio: np.ndarray, sr: int) -> np.ndarray:
+    def _apply_exciter(self, audio: np.ndarray, sr: int, state: Optional[Dict] = None) -> np.ndarray:
         """Apply harmonic exciter for presence"""
         # Generate harmonics of high frequencies
-        sos = signal.butter(4, 3000, btype='high', fs=sr, output='sos')
-        high_freq = signal.sosfilt(sos, audio)
+        sos = butter_sos(4, 3000, 'high', sr)
+        high_freq = self._sosfilt(sos, audio, state, "exciter")
         
         # Generate subtle harmonics
-        harmonics = np.tanh(high_freq * 1.5) * 0.08
+        high_freq *= 1.5
+        harmonics = np.tanh(high_freq, out=high_freq)
+        harmonics *= 0.08
         
-        return audio + harmonics
+        audio = _writable(audio)
+        audio += harmonics
+        return audio
     
     def _apply_limiter(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
         """Apply transparent limiting"""
@@ -393,65 +677,63 @@ class ProfessionalAudioProcessor:
         
         # Calculate peak envelope with lookahead
         audio_padded = np.pad(audio, (lookahead_samples, 0), mode='constant')
-        envelope = np.abs(signal.hilbert(audio_padded))
+        envelope = self._envelope(audio_padded, sr, peak=True)
+        del audio_padded
         
         # Find peaks that exceed threshold
-        peak_reduction = np.ones_like(envelope)
-        exceeding_peaks = envelope > threshold_linear
-        peak_reduction[exceeding_peaks] = threshold_linear / envelope[exceeding_peaks]
+        peak_reduction = np.minimum(np.float32(threshold_linear) / np.maximum(envelope, np.float32(1e-10)), np.float32(1.0))
         
         # Smooth limiting
         window_size = int(0.001 * sr)  # 1ms
         peak_reduction_smooth = ndimage.uniform_filter1d(peak_reduction, size=window_size, mode='constant')
         
         # Apply limiting with lookahead compensation
-        limited_audio = audio * peak_reduction_smooth[lookahead_samples:]
-        
-        return limited_audio
+        audio = _writable(audio)
+        audio *= peak_reduction_smooth[lookahead_samples:]
+        return audio
     
-    def _normalize_audio(self, audio: np.ndarray, settings: Dict) -> np.ndarray:
+    def _normalize_audio(self, audio: np.ndarray, sr: int, settings: Dict) -> np.ndarray:
         """Normalize to YouTube standards"""
-        target_db = settings.get("normalize_target", -16.0)
-        
-        # Peak normalization with headroom
-        current_peak_db = 20 * np.log10(np.max(np.abs(audio)) + 1e-10)
-        gain_db = target_db - current_peak_db
-        gain_linear = 10**(gain_db/20)
+        meter = LoudnessMeter(sr, channels=1)
+        block_len = int(STREAM_BLOCK_SECONDS * sr)
+        for start in range(0, len(audio), block_len):
+            meter.process(audio[start:start + block_len])
+        gain_db = self._normalization_gain_db(meter, settings)
+        
+        audio = _writable(audio)
+        audio *= np.float32(10**(gain_db/20))
+        return audio
+    
+    def _normalization_gain_db(self, meter: LoudnessMeter, settings: Dict) -> float:
+        """Gain that brings the integrated loudness (LUFS) to the normalize_target"""
+        target_lufs = settings.get("normalize_target", -16.0)
         
-        return audio * gain_linear
+        # EBU R128 loudness normalization, never pushing peaks over the limiter ceiling
+        return normalization_gain_db(meter.result(), target_lufs, settings.get("limiter_threshold", -1.0))
 
 class VideoAudioEnhancer:
     """Main video processing class"""
     
-    def __init__(self):
-        self.processor = ProfessionalAudioProcessor()
+    def __init__(self, noise_engine: str = "multiband"):
+        self.processor = ProfessionalAudioProcessor(noise_engine=noise_engine)
         
-    def extract_audio_from_video(self, video_path: str, temp_audio_path: str) -> bool:
-        """Extract audio from video using FFmpeg"""
+    def extract_audio_from_video(self, video_path: str, sr: int = 44100) -> Optional[np.ndarray]:
+        """Decode the video's audio track straight into a mono float32 array"""
         try:
-            cmd = [
-                'ffmpeg', '-i', video_path,
-                '-vn',  # No video
-                '-acodec', 'pcm_s16le',
-                '-ar', '44100',
-                '-ac', '2',  # Stereo
-                '-y',  # Overwrite
-                temp_audio_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return result.returncode == 0
+            audio = load_audio(video_path, sample_rate=sr, channels=1)
+            return audio if len(audio) else None
             
         except Exception:
-            return False
+            return None
     
     def replace_video_audio(self, video_path: str, enhanced_audio_path: str, 
-                          output_path: str) -> bool:
-        """Replace video audio with enhanced version"""
+                          output_path: str, gain_db: float = 0.0) -> bool:
+        """Replace video audio with enhanced version, applying gain_db during the AAC encode"""
         try:
             cmd = [
                 'ffmpeg', '-i', video_path, '-i', enhanced_audio_path,
                 '-c:v', 'copy',  # Copy video stream without re-encoding
+                '-af', f'volume={gain_db:.3f}dB',
                 '-c:a', 'aac',   # Encode audio as AAC
                 '-b:a', '192k',  # Audio bitrate
                 '-map', '0:v:0', # Map video from first input
@@ -470,60 +752,143 @@ class VideoAudioEnhancer:
                      progress_callback: Optional[callable] = None) -> bool:
         """Process video with enhanced audio"""
         
+        # Private temp directory per job, so several jobs can run at once
+        temp_dir = tempfile.mkdtemp(prefix="audio_enhancer_")
         try:
             if progress_callback:
                 progress_callback("🎬 Extracting audio from video...")
             
-            # Create temp audio file
-            temp_audio_original = "temp_original_audio.wav"
-            temp_audio_enhanced = "temp_enhanced_audio.wav"
+            # Only the enhanced track goes to disk (ffmpeg needs it as an input)
+            temp_audio_enhanced = os.path.join(temp_dir, "enhanced_audio.wav")
             
-            # Extract audio
-            if not self.extract_audio_from_video(video_path, temp_audio_original):
-                raise Exception("Failed to extract audio from video")
-            
-            if progress_callback:
-                progress_callback("🎵 Loading audio for processing...")
-            
-            # Load audio
-            audio, sr = librosa.load(temp_audio_original, sr=44100)
-            
-            # Process audio
-            enhanced_audio, profile = self.processor.process_audio(audio, sr, progress_callback)
-            
-            if progress_callback:
-                progress_callback("💾 Saving enhanced audio...")
-            
-            # Save enhanced audio
-            sf.write(temp_audio_enhanced, enhanced_audio, sr)
+            # Decode, process and write the audio block by block (bounded memory)
+            source = FFmpegAudioSource(video_path, sample_rate=44100, channels=1)
+            profile, gain_db = self.processor.process_stream(source, temp_audio_enhanced, progress_callback)
             
             if progress_callback:
                 progress_callback("🎬 Combining enhanced audio with video...")
             
-            # Replace audio in video
-            if not self.replace_video_audio(video_path, temp_audio_enhanced, output_path):
+            # Replace audio in video (normalization gain applied in the same encode)
+            if not self.replace_video_audio(video_path, temp_audio_enhanced, output_path, gain_db):
                 raise Exception("Failed to combine enhanced audio with video")
             
-            # Cleanup temp files
-            for temp_file in [temp_audio_original, temp_audio_enhanced]:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            
             if progress_callback:
                 progress_callback(f"✅ Video processing complete! Content type: {profile.content_type.upper()}")
             
             return True
             
         except Exception as e:
-            # Cleanup temp files on error
-            for temp_file in ["temp_original_audio.wav", "temp_enhanced_audio.wav"]:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            
             if progress_callback:
                 progress_callback(f"❌ Error: {str(e)}")
             
             return False
+            
+        finally:
+            # Cleanup temp files
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+@dataclass
+class EnhanceJob:
+    """One video of a batch"""
+    index: int
+    video_path: str
+    output_path: str
+
+def _enhance_job(job: EnhanceJob, noise_engine: str, band_workers: int, events, instrument: bool = False) -> bool:
+    """Enhance one video (process-pool entry point), posting progress to `events`"""
+    enhancer = VideoAudioEnhancer(noise_engine=noise_engine)
+    enhancer.processor.workers = band_workers
+    enhancer.processor.instrument = instrument
+    
+    def progress_callback(message):
+        events.put(("progress", job.index, message))
+    
+    return enhancer.process_video(job.video_path, job.output_path, progress_callback)
+
+class BatchEnhancer:
+    """Headless batch engine; the GUI and the command line are thin clients.
+    
+    Videos are enhanced in a process pool (the DSP chain is CPU bound) and
+    every job uses its own temp directory. Progress is posted to a queue as
+    ("progress", index, message), ("done", index, success), ("error", None,
+    message) and finally ("finished", successful, total).
+    """
+    
+    def __init__(self, noise_engine: str = "multiband", processes: Optional[int] = None,
+                 instrument: bool = False):
+        self.noise_engine = noise_engine
+        self.processes = processes or default_batch_processes()
+        self.instrument = instrument
+        
+    def plan(self, video_files: List[str], output_directory: str) -> List[EnhanceJob]:
+        """One job per distinct input, with output names that never collide"""
+        jobs = []
+        used = set()
+        for video_path in dict.fromkeys(video_files):
+            name = os.path.splitext(os.path.basename(video_path))[0]
+            output_path = os.path.join(output_directory, f"{name}_enhanced.mp4")
+            suffix = 2
+            while output_path in used:
+                output_path = os.path.join(output_directory, f"{name}_enhanced_{suffix}.mp4")
+                suffix += 1
+            used.add(output_path)
+            jobs.append(EnhanceJob(len(jobs), video_path, output_path))
+        return jobs
+    
+    def run(self, jobs: List[EnhanceJob], events: "queue.Queue") -> int:
+        """Process all jobs, blocking; returns the number of successful ones"""
+        successful = 0
+        try:
+            processes = max(1, min(self.processes, len(jobs)))
+            band_workers = max(1, min(len(NOISE_BANDS), (os.cpu_count() or 1) // processes))
+            if processes == 1:
+                for job in jobs:
+                    success = _enhance_job(job, self.noise_engine, band_workers, events, self.instrument)
+                    successful += success
+                    events.put(("done", job.index, success))
+            else:
+                successful = self._run_pool(jobs, processes, band_workers, events)
+        except Exception as e:
+            events.put(("error", None, str(e)))
+        finally:
+            events.put(("finished", successful, len(jobs)))
+        return successful
+    
+    def _run_pool(self, jobs: List[EnhanceJob], processes: int, band_workers: int, events: "queue.Queue") -> int:
+        successful = 0
+        with multiprocessing.Manager() as manager:
+            worker_events = manager.Queue()
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = {
+                    pool.submit(_enhance_job, job, self.noise_engine, band_workers, worker_events, self.instrument): job
+                    for job in jobs
+                }
+                pending = set(futures)
+                while pending:
+                    finished, pending = wait(pending, timeout=0.2)
+                    self._relay(worker_events, events)
+                    for future in finished:
+                        job = futures[future]
+                        try:
+                            success = bool(future.result())
+                        except Exception as e:
+                            events.put(("progress", job.index, f"❌ Error: {e}"))
+                            success = False
+                        successful += success
+                        events.put(("done", job.index, success))
+            self._relay(worker_events, events)
+        return successful
+    
+    def _relay(self, source, events: "queue.Queue"):
+        while True:
+            try:
+                events.put(source.get_nowait())
+            except queue.Empty:
+                return
+
+def default_batch_processes() -> int:
+    """Parallel videos: half the cores (each job also threads its noise bands)"""
+    return max(1, (os.cpu_count() or 1) // 2)
 
 class SimpleVideoProcessorGUI:
     """Simple GUI for video processing"""
@@ -539,8 +904,8 @@ class SimpleVideoProcessorGUI:
         self.style.theme_use('clam')
         self.configure_dark_theme()
         
-        self.enhancer = VideoAudioEnhancer()
         self.video_files = []
+        self.progress_queue = queue.Queue()
         self.output_directory = ""
         
         self.setup_gui()
@@ -605,6 +970,24 @@ class SimpleVideoProcessorGUI:
         
         ttk.Button(output_frame, text="📂 Browse", command=self.select_output_directory, style='Dark.TButton').pack(side=tk.RIGHT, padx=(10, 0))
         
+        # Noise reduction engine
+        engine_frame = ttk.Frame(main_frame, style='Dark.TFrame')
+        engine_frame.pack(fill=tk.X)
+        
+        ttk.Label(engine_frame, text="🎛️ Noise Reduction Engine:", style='Dark.TLabel').pack(side=tk.LEFT)
+        self.engine_var = tk.StringVar(value=NOISE_ENGINES["multiband"])
+        ttk.Combobox(engine_frame, textvariable=self.engine_var, values=list(NOISE_ENGINES.values()),
+                     state='readonly', width=40).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Parallel videos
+        parallel_frame = ttk.Frame(main_frame, style='Dark.TFrame')
+        parallel_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        ttk.Label(parallel_frame, text="⚙️ Videos in Parallel:", style='Dark.TLabel').pack(side=tk.LEFT)
+        self.processes_var = tk.IntVar(value=default_batch_processes())
+        tk.Spinbox(parallel_frame, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.processes_var,
+                   width=5, bg='#2a2a2a', fg='#ffffff').pack(side=tk.LEFT, padx=(10, 0))
+        
         # Process button
         self.process_btn = ttk.Button(main_frame, text="🚀 ENHANCE VIDEOS", 
                                      command=self.start_processing, style='Dark.TButton')
@@ -670,64 +1053,61 @@ class SimpleVideoProcessorGUI:
             messagebox.showerror("Error", "Please select an output directory.")
             return
             
-        # Start processing in thread
+        engine_names = {label: name for name, label in NOISE_ENGINES.items()}
+        batch = BatchEnhancer(noise_engine=engine_names.get(self.engine_var.get(), "multiband"),
+                              processes=self.processes_var.get())
+        jobs = batch.plan(self.video_files, self.output_directory)
+        self.job_names = {job.index: os.path.basename(job.video_path) for job in jobs}
+        
+        # Run the batch in a thread; the Tk thread only polls the progress queue
         self.process_btn.config(state='disabled')
         self.progress_bar.start()
         
-        threading.Thread(target=self.process_videos_worker, daemon=True).start()
-        
-    def process_videos_worker(self):
-        """Worker thread for processing videos"""
-        try:
-            successful = 0
-            total = len(self.video_files)
+        threading.Thread(target=batch.run, args=(jobs, self.progress_queue), daemon=True).start()
+        self.root.after(100, self.poll_progress)
+        
+    def poll_progress(self):
+        """Apply queued batch events to the widgets (runs on the Tk thread)"""
+        total = len(self.job_names)
+        while True:
+            try:
+                kind, key, value = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            for i, video_path in enumerate(self.video_files):
-                filename = os.path.basename(video_path)
-                name_without_ext = os.path.splitext(filename)[0]
-                output_path = os.path.join(self.output_directory, f"{name_without_ext}_enhanced.mp4")
-                
-                def progress_callback(message):
-                    self.progress_var.set(f"[{i+1}/{total}] {filename}: {message}")
-                    self.root.update()
-                
-                progress_callback("Starting processing...")
-                
-                # Process the video
-                success = self.enhancer.process_video(video_path, output_path, progress_callback)
-                
-                if success:
-                    successful += 1
-                    progress_callback("✅ Complete!")
-                else:
-                    progress_callback("❌ Failed!")
-                
-                time.sleep(1)  # Brief pause between files
-            
-            # Show completion message
-            self.progress_var.set(f"🎉 Processing complete! {successful}/{total} videos enhanced successfully")
-            
-            if successful > 0:
-                messagebox.showinfo("Success!", 
-                    f"Video enhancement complete!\n\n"
-                    f"✅ Successfully processed: {successful}/{total} videos\n"
-                    f"📁 Enhanced videos saved to: {self.output_directory}\n\n"
-                    f"🎵 Features applied:\n"
-                    f"• AI content detection\n"
-                    f"• Advanced noise reduction\n"
-                    f"• Professional audio enhancement\n"
-                    f"• YouTube-optimized loudness\n"
-                    f"• Background noise removal")
-            else:
-                messagebox.showerror("Error", "No videos were processed successfully. Please check your files and try again.")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred during processing:\n{str(e)}")
-            self.progress_var.set("❌ Processing failed")
-            
-        finally:
-            self.progress_bar.stop()
-            self.process_btn.config(state='normal')
+            if kind == "progress":
+                self.progress_var.set(f"[{key+1}/{total}] {self.job_names[key]}: {value}")
+            elif kind == "done":
+                self.progress_var.set(f"[{key+1}/{total}] {self.job_names[key]}: {'✅ Complete!' if value else '❌ Failed!'}")
+            elif kind == "error":
+                messagebox.showerror("Error", f"An error occurred during processing:\n{value}")
+            elif kind == "finished":
+                self.finish_processing(key, value)
+                return
+        
+        self.root.after(100, self.poll_progress)
+        
+    def finish_processing(self, successful: int, total: int):
+        """Show the batch summary and re-enable the UI"""
+        self.progress_bar.stop()
+        self.process_btn.config(state='normal')
+        
+        # Show completion message
+        self.progress_var.set(f"🎉 Processing complete! {successful}/{total} videos enhanced successfully")
+        
+        if successful > 0:
+            messagebox.showinfo("Success!", 
+                f"Video enhancement complete!\n\n"
+                f"✅ Successfully processed: {successful}/{total} videos\n"
+                f"📁 Enhanced videos saved to: {self.output_directory}\n\n"
+                f"🎵 Features applied:\n"
+                f"• AI content detection\n"
+                f"• Advanced noise reduction\n"
+                f"• Professional audio enhancement\n"
+                f"• YouTube-optimized loudness\n"
+                f"• Background noise removal")
+        else:
+            messagebox.showerror("Error", "No videos were processed successfully. Please check your files and try again.")
 
 def check_dependencies():
     """Check if required dependencies are installed"""
@@ -757,16 +1137,51 @@ def check_dependencies():
     
     return True
 
+def run_cli(args) -> int:
+    """Enhance videos from the command line; returns the process exit code"""
+    batch = BatchEnhancer(noise_engine=args.engine, processes=args.processes, instrument=args.stats)
+    jobs = batch.plan(args.videos, args.output)
+    names = {job.index: os.path.basename(job.video_path) for job in jobs}
+    os.makedirs(args.output, exist_ok=True)
+    
+    events = queue.Queue()
+    threading.Thread(target=batch.run, args=(jobs, events), daemon=True).start()
+    while True:
+        kind, key, value = events.get()
+        if kind == "progress":
+            print(f"[{key+1}/{len(jobs)}] {names[key]}: {value}")
+        elif kind == "done":
+            print(f"[{key+1}/{len(jobs)}] {names[key]}: {'✅ Complete!' if value else '❌ Failed!'}")
+        elif kind == "error":
+            print(f"❌ Error: {value}")
+        elif kind == "finished":
+            print(f"🎉 Processing complete! {key}/{value} videos enhanced successfully")
+            return 0 if key == value else 1
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI video audio enhancer (starts the GUI when no videos are given)")
+    parser.add_argument("videos", nargs="*", help="video files to enhance")
+    parser.add_argument("-o", "--output", default=".", help="output directory (default: current directory)")
+    parser.add_argument("--engine", choices=list(NOISE_ENGINES), default="multiband", help="noise reduction engine")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="videos processed in parallel")
+    parser.add_argument("--stats", action="store_true", help="print per-stage time and peak memory")
+    return parser.parse_args(argv)
+
 def main():
     """Main application entry point"""
+    args = parse_args()
     print("🎬 YouTube Video Audio Enhancer")
     print("=" * 40)
     
     if not check_dependencies():
+        if args.videos:
+            sys.exit(1)
         input("\nPress Enter to exit...")
         return
     
     print("✅ All dependencies found!")
+    if args.videos:
+        sys.exit(run_cli(args))
     print("🚀 Starting application...")
     
     root = tk.Tk()
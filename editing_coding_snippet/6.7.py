@@ -7,6 +7,7 @@ from pathlib import Path
 import logging
 import ffmpeg
 import re
+from stream_probe import probe_streams, choose_reference, prepare_for_concat
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 
@@ -237,16 +238,12 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         title_escaped = title_text.upper().replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
         f.write(f"Dialogue: 0,{format_time_for_ass(0)},{format_time_for_ass(15)},TitleStyle,,0,0,0,,{title_escaped}\n")
 
-def convert_to_ts(video_path, output_ts):
-    """Convert video to MPEG-TS format for concatenation"""
+def convert_to_ts(video_path, output_ts, reference=None):
+    """Write video as MPEG-TS for concatenation: stream copy when it already
+    matches reference (default: itself), otherwise re-encode to match it"""
     try:
-        ffmpeg.input(video_path).output(
-            output_ts, 
-            format="mpegts", 
-            vcodec="libx264", 
-            acodec="aac", 
-            strict="experimental"
-        ).run(overwrite_output=True, quiet=True)
+        copied = prepare_for_concat(video_path, output_ts, reference or probe_streams(video_path))
+        logging.info(f"{'📦 Stream-copied' if copied else '🔄 Re-encoded'} {os.path.basename(video_path)} for concatenation")
     except Exception as e:
         logging.error(f"Failed to convert to TS: {e}")
         raise
@@ -258,8 +255,10 @@ def merge_with_extra(main_video, extra_video, final_output):
 
     try:
         logging.info("🔄 Converting videos to TS format...")
-        convert_to_ts(main_video, ts1)
-        convert_to_ts(extra_video, ts2)
+        # Only a clip whose streams differ from the longer one is re-encoded
+        reference = choose_reference([probe_streams(main_video), probe_streams(extra_video)])
+        convert_to_ts(main_video, ts1, reference)
+        convert_to_ts(extra_video, ts2, reference)
 
         logging.info("🔗 Concatenating videos...")
         ffmpeg.input(f"concat:{ts1}|{ts2}", format="mpegts").output(
@@ -5,7 +5,10 @@ import tkinter as tk
 from tkinter import filedialog
 from pathlib import Path
 import logging
-from faster_whisper import WhisperModel
+from whisper_server import load_whisper_model
+from transcription_cache import cached_transcription
+from ducking import find_speech_segments, write_envelope_track, ducking_filter_complex
+from stream_probe import probe_streams, choose_reference, prepare_for_concat
 import ffmpeg
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
@@ -40,14 +43,19 @@ def get_video_duration(file_path):
 
 def transcribe_audio(audio_path):
     logging.info(f"🧠 Transcribing: {audio_path}")
-    model = WhisperModel("medium", device="cpu", compute_type="int8")
-    segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True, language="en")
-    words = []
-    for segment in segments:
-        for w in segment.words:
-            if w.word.strip():
-                words.append({"word": w.word.strip(), "start": w.start, "end": w.end})
-    return words
+    params = {"beam_size": 5, "word_timestamps": True, "language": "en"}
+
+    def run_whisper():
+        model = load_whisper_model("medium", device="cpu", compute_type="int8")
+        segments, _ = model.transcribe(audio_path, **params)
+        words = []
+        for segment in segments:
+            for w in segment.words:
+                if w.word.strip():
+                    words.append({"word": w.word.strip(), "start": w.start, "end": w.end})
+        return words
+
+    return cached_transcription(audio_path, "medium", params, run_whisper)
 
 def generate_ass(words, ass_path):
     with open(ass_path, "w", encoding="utf-8") as f:
@@ -106,40 +114,8 @@ def create_speech_segments(words, video_duration, merge_gap=0.8, fade_buffer=0.4
     Returns:
         List of (start, end) tuples for speech segments
     """
-    if not words:
-        return []
-    
-    # Sort words by start time
-    sorted_words = sorted(words, key=lambda x: x["start"])
-    
-    # First pass: merge close words
-    merged_segments = []
-    current_start = sorted_words[0]["start"]
-    current_end = sorted_words[0]["end"]
-    
-    for word in sorted_words[1:]:
-        if word["start"] - current_end <= merge_gap:
-            current_end = max(current_end, word["end"])
-        else:
-            merged_segments.append((current_start, current_end))
-            current_start = word["start"]
-            current_end = word["end"]
-    
-    merged_segments.append((current_start, current_end))
-    
-    # Second pass: add buffers and ensure no overlaps
-    final_segments = []
-    for start, end in merged_segments:
-        buffered_start = max(0, start - fade_buffer)
-        buffered_end = min(video_duration, end + fade_buffer)
-        
-        # Merge with previous segment if they overlap after buffering
-        if final_segments and buffered_start <= final_segments[-1][1]:
-            final_segments[-1] = (final_segments[-1][0], max(final_segments[-1][1], buffered_end))
-        else:
-            final_segments.append((buffered_start, buffered_end))
-    
-    return final_segments
+    segments = find_speech_segments(words, video_duration, merge_gap, fade_buffer)
+    return [(start, end) for start, end in segments.tolist()]
 
 def add_background_music_with_ducking(video_path, music_path, output_path, words, music_volume=0.15, ducked_volume=0.04):
     """
@@ -182,43 +158,31 @@ def add_background_music_with_ducking(video_path, music_path, output_path, words
         for i, (start, end) in enumerate(speech_segments):
             logging.info(f"  📍 Segment {i+1}: {start:.2f}s - {end:.2f}s")
         
-        # Use a step-by-step approach with multiple volume filters
-        filter_parts = []
-        
-        # Start with the background music at normal (low) volume
-        filter_parts.append(f"[1:a]aloop=loop=-1:size=2e+09,volume={music_volume}[bg_normal]")
-        
-        current_label = "bg_normal"
-        
-        # Apply ducking for each speech segment
-        for i, (start, end) in enumerate(speech_segments):
-            next_label = f"bg_step_{i}"
-            # This will reduce volume ONLY during this specific time range
-            filter_parts.append(
-                f"[{current_label}]volume=enable='between(t,{start:.3f},{end:.3f})':volume={ducked_volume/music_volume:.3f}[{next_label}]"
-            )
-            current_label = next_label
-        
-        # Mix the processed background with original audio, ensuring original audio dominates
-        filter_parts.append(f"[0:a][{current_label}]amix=inputs=2:duration=first:weights='1.0 0.8'[audio_out]")
-        
-        filter_complex = ";".join(filter_parts)
+        # One precomputed gain envelope instead of one volume filter per segment
+        envelope_path = f"duck_env_{Path(output_path).stem}.wav"
+        write_envelope_track(envelope_path, speech_segments, video_duration, music_volume, ducked_volume)
+        filter_complex = ducking_filter_complex(music_volume)
         
-        logging.info("🎛️ Applying step-by-step volume ducking...")
+        logging.info("🎛️ Applying envelope-based volume ducking...")
         
-        subprocess.run([
-            "ffmpeg", "-y",
-            "-i", video_path,
-            "-i", music_path,
-            "-filter_complex", filter_complex,
-            "-map", "0:v",
-            "-map", "[audio_out]",
-            "-c:v", "copy",
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-shortest",
-            output_path
-        ], check=True)
+        try:
+            subprocess.run([
+                "ffmpeg", "-y",
+                "-i", video_path,
+                "-i", music_path,
+                "-i", envelope_path,
+                "-filter_complex", filter_complex,
+                "-map", "0:v",
+                "-map", "[aout]",
+                "-c:v", "copy",
+                "-c:a", "aac",
+                "-b:a", "128k",
+                "-shortest",
+                output_path
+            ], check=True)
+        finally:
+            if os.path.exists(envelope_path):
+                os.remove(envelope_path)
         
         logging.info(f"✅ Background music with ducking applied successfully!")
         
@@ -247,15 +211,17 @@ def add_background_music_with_ducking(video_path, music_path, output_path, words
             logging.error(f"❌ Fallback failed: {fallback_error}")
             raise
 
-def convert_to_ts(video_path, output_ts):
-    ffmpeg.input(video_path).output(output_ts, format="mpegts", vcodec="libx264", acodec="aac", strict="experimental").run(overwrite_output=True)
+def convert_to_ts(video_path, output_ts, reference=None):
+    # Stream copy when the clip already matches reference, re-encode only otherwise
+    prepare_for_concat(video_path, output_ts, reference or probe_streams(video_path))
 
 def merge_with_extra(main_video, extra_video, final_output):
     ts1 = "temp1.ts"
     ts2 = "temp2.ts"
 
-    convert_to_ts(main_video, ts1)
-    convert_to_ts(extra_video, ts2)
+    reference = choose_reference([probe_streams(main_video), probe_streams(extra_video)])
+    convert_to_ts(main_video, ts1, reference)
+    convert_to_ts(extra_video, ts2, reference)
 
     ffmpeg.input(f"concat:{ts1}|{ts2}", format="mpegts").output(final_output, vcodec="copy", acodec="copy").run(overwrite_output=True)
 
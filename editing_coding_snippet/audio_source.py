@@ -0,0 +1,126 @@
+import os
+import wave
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+
+# Audio decoding straight from an ffmpeg pipe into NumPy, so Whisper and the
+# DSP code never need a temp WAV/MP3 (and no lossy mp3 round trip).
+# Whisper expects 16 kHz mono float32, which is the default here.
+
+WHISPER_SAMPLE_RATE = 16000
+READ_BLOCK_SECONDS = 10
+STDERR_TAIL_LINES = 20
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+class FFmpegAudioSource:
+    """Float32 PCM audio of a media file decoded by ffmpeg on stdout.
+
+    iter_blocks() streams fixed-size blocks (bounded memory); read() returns
+    the whole track. Samples are shaped (frames,) for mono and
+    (frames, channels) otherwise.
+    """
+
+    def __init__(self, path, sample_rate=WHISPER_SAMPLE_RATE, channels=1, start=None, duration=None):
+        self.path = str(path)
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.start = start
+        self.duration = duration
+
+    def command(self):
+        cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        if self.start:
+            cmd += ["-ss", str(self.start)]
+        cmd += ["-i", self.path]
+        if self.duration:
+            cmd += ["-t", str(self.duration)]
+        cmd += ["-vn", "-f", "f32le", "-acodec", "pcm_f32le",
+                "-ar", str(self.sample_rate), "-ac", str(self.channels), "pipe:1"]
+        return cmd
+
+    def iter_blocks(self, block_frames=None, stop_check=None):
+        """Yield float32 blocks of block_frames frames (the last one may be shorter)"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Media file not found: {self.path}")
+        block_frames = int(block_frames or self.sample_rate * READ_BLOCK_SECONDS)
+        frame_bytes = 4 * self.channels
+        popen_kwargs = {"stdout": subprocess.PIPE, "stderr": subprocess.PIPE, "stdin": subprocess.DEVNULL}
+        if os.name == 'nt':
+            popen_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        process = subprocess.Popen(self.command(), **popen_kwargs)
+        # Drain stderr concurrently: a damaged file can log an error per
+        # packet, and a full stderr pipe would block ffmpeg and then us
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        stderr_reader = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+        stderr_reader.start()
+        completed = False
+        try:
+            pending = b""
+            while True:
+                if stop_check and stop_check():
+                    return
+                data = process.stdout.read(block_frames * frame_bytes - len(pending))
+                if not data:
+                    break
+                pending += data
+                if len(pending) < block_frames * frame_bytes:
+                    continue
+                yield self._to_samples(pending)
+                pending = b""
+            usable = len(pending) - len(pending) % frame_bytes
+            if usable:
+                yield self._to_samples(pending[:usable])
+            returncode = process.wait()
+            stderr_reader.join()
+            stderr = b"".join(stderr_tail).decode("utf-8", errors="replace")
+            if returncode != 0:
+                raise AudioDecodeError(f"ffmpeg could not decode audio from {os.path.basename(self.path)}: {stderr.strip()[-500:]}")
+            completed = True
+        finally:
+            if not completed and process.poll() is None:
+                process.kill()
+                process.wait()
+            stderr_reader.join()
+            process.stdout.close()
+            process.stderr.close()
+
+    def read(self, stop_check=None):
+        """Decode the whole stream; returns None if stop_check() asked to stop"""
+        blocks = []
+        for block in self.iter_blocks(stop_check=stop_check):
+            blocks.append(block)
+        if stop_check and stop_check():
+            return None
+        if not blocks:
+            shape = (0,) if self.channels == 1 else (0, self.channels)
+            return np.zeros(shape, dtype=np.float32)
+        return np.concatenate(blocks)
+
+    def _to_samples(self, data):
+        samples = np.frombuffer(data, dtype="<f4").astype(np.float32, copy=False)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels)
+        return samples
+
+
+def load_audio(path, sample_rate=WHISPER_SAMPLE_RATE, channels=1, start=None, duration=None, stop_check=None):
+    """Decode a media file's audio into a float32 NumPy array (16 kHz mono by default)"""
+    return FFmpegAudioSource(path, sample_rate, channels, start, duration).read(stop_check=stop_check)
+
+
+def write_wav(path, audio, sample_rate=WHISPER_SAMPLE_RATE):
+    """Write float32 samples as 16-bit PCM WAV, for tools that only accept files"""
+    audio = np.asarray(audio, dtype=np.float32)
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
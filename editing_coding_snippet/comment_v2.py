@@ -13,9 +13,9 @@ import pickle
 # Check for required libraries
 try:
     from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
     from google.auth.transport.requests import Request
+    from youtube_store import build_youtube, get_youtube_store, YouTubeSync, comment_thread_row
     GOOGLE_API_AVAILABLE = True
 except ImportError:
     GOOGLE_API_AVAILABLE = False
@@ -31,6 +31,7 @@ class YouTubeCommentManager:
         
         # Initialize variables
         self.youtube = None
+        self.sync = None  # YouTubeSync into the local store, set on authentication
         self.current_videos = []
         self.filtered_videos = []
         self.current_comments = []
@@ -385,14 +386,14 @@ class YouTubeCommentManager:
                 with open(self.token_path, 'rb') as token:
                     creds = pickle.load(token)
                     if creds and creds.valid:
-                        self.youtube = build("youtube", "v3", credentials=creds)
+                        self.connect_youtube(creds)
                         self.auth_status.config(text="✅ Authenticated (from saved session)", foreground='green')
                         self.log_action("✅ Loaded saved authentication session")
                         return
                     elif creds and creds.expired and creds.refresh_token:
                         try:
                             creds.refresh(Request())
-                            self.youtube = build("youtube", "v3", credentials=creds)
+                            self.connect_youtube(creds)
                             self.auth_status.config(text="✅ Authenticated (refreshed)", foreground='green')
                             self.log_action("✅ Refreshed authentication session")
                             # Save refreshed token
@@ -412,6 +413,11 @@ class YouTubeCommentManager:
         except Exception as e:
             self.log_action(f"Error loading saved credentials: {str(e)}")
             
+    def connect_youtube(self, creds):
+        self.youtube = build_youtube(creds)
+        self.store = get_youtube_store()
+        self.sync = YouTubeSync(self.youtube, self.store)
+            
     def authenticate_youtube(self):
         if not GOOGLE_API_AVAILABLE:
             messagebox.showerror("Error", "Google API libraries not installed")
@@ -442,7 +448,7 @@ class YouTubeCommentManager:
                 with open(self.token_path, 'wb') as token:
                     pickle.dump(creds, token)
                     
-            self.youtube = build("youtube", "v3", credentials=creds)
+            self.connect_youtube(creds)
             
             self.auth_status.config(text="✅ Authenticated successfully", foreground='green')
             self.log_action("✅ YouTube API authenticated successfully")
@@ -465,59 +471,29 @@ class YouTubeCommentManager:
             self.root.after(0, self.video_progress.start)
             max_results = int(self.max_videos_var.get())
             
-            # Get channel info first
-            channels_response = self.youtube.channels().list(
-                part="contentDetails",
-                mine=True
-            ).execute()
-            
-            if not channels_response['items']:
-                self.root.after(0, messagebox.showerror, "Error", "No channel found for authenticated user")
-                return
-                
-            upload_playlist_id = channels_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-            
-            # Get videos from uploads playlist
-            playlist_response = self.youtube.playlistItems().list(
-                part="snippet,contentDetails",
-                playlistId=upload_playlist_id,
-                maxResults=max_results
-            ).execute()
+            # Only uploads newer than the last fetch are paged; the list itself comes from the local store
+            self.sync.sync_videos()
+            self.current_videos = []
             
-            video_ids = []
-            for item in playlist_response['items']:
-                video_id = item['contentDetails']['videoId']
-                video_ids.append(video_id)
-                
-            # Get video statistics and details
-            if video_ids:
-                stats_response = self.youtube.videos().list(
-                    part="statistics,snippet,contentDetails",
-                    id=','.join(video_ids)
-                ).execute()
+            for row in self.store.channel_videos(self.sync.channel_id(), limit=max_results):
+                # Parse duration
+                duration_seconds = self.parse_duration(row['duration'] or '')
                 
-                self.current_videos = []
-                
-                for item in stats_response['items']:
-                    # Parse duration
-                    duration_str = item['contentDetails']['duration']
-                    duration_seconds = self.parse_duration(duration_str)
-                    
-                    video_data = {
-                        'id': item['id'],
-                        'title': item['snippet']['title'],
-                        'published': item['snippet']['publishedAt'][:10],
-                        'views': item['statistics'].get('viewCount', '0'),
-                        'likes': item['statistics'].get('likeCount', '0'),
-                        'comments': item['statistics'].get('commentCount', '0'),
-                        'duration': duration_seconds,
-                        'duration_str': self.format_duration(duration_seconds)
-                    }
-                    
-                    self.current_videos.append(video_data)
+                video_data = {
+                    'id': row['video_id'],
+                    'title': row['title'],
+                    'published': (row['published_at'] or '')[:10],
+                    'views': str(row['view_count'] or 0),
+                    'likes': str(row['like_count'] or 0),
+                    'comments': str(row['comment_count'] or 0),
+                    'duration': duration_seconds,
+                    'duration_str': self.format_duration(duration_seconds)
+                }
                 
-                # Apply any existing filters
-                self.root.after(0, self.apply_filters)
+                self.current_videos.append(video_data)
+            
+            # Apply any existing filters
+            self.root.after(0, self.apply_filters)
                     
             self.log_action(f"📺 Fetched {len(self.current_videos)} videos")
             
@@ -594,28 +570,19 @@ class YouTubeCommentManager:
             if not self.current_video_id:
                 return
                 
-            # Get comments
-            request = self.youtube.commentThreads().list(
-                part="snippet,replies",
-                videoId=self.current_video_id,
-                maxResults=50,
-                textFormat="plainText",
-                order="relevance"
-            )
-            
-            response = request.execute()
+            # Pages only comments newer than the last sync (none while the comment count is unchanged)
+            self.sync.sync_comments(self.current_video_id)
             comments = []
             
-            for item in response.get("items", []):
-                comment_data = item["snippet"]["topLevelComment"]["snippet"]
+            for row in self.store.comment_threads([self.current_video_id]):
                 comment_info = {
-                    'id': item['id'],
-                    'video_id': self.current_video_id,
-                    'author': comment_data["authorDisplayName"],
-                    'text': comment_data["textDisplay"],
-                    'likes': comment_data.get("likeCount", 0),
-                    'published': comment_data["publishedAt"][:10],
-                    'reply_count': item["snippet"]["totalReplyCount"]
+                    'id': row['thread_id'],
+                    'video_id': row['video_id'],
+                    'author': row['author'],
+                    'text': row['text'],
+                    'likes': row['like_count'],
+                    'published': (row['published_at'] or '')[:10],
+                    'reply_count': row['reply_count']
                 }
                 comments.append(comment_info)
                     
@@ -758,41 +725,30 @@ class YouTubeCommentManager:
             try:
                 all_comments = []
                 total_videos = len(self.current_videos)
+                titles = {video['id']: video['title'] for video in self.current_videos}
                 
-                for i, video in enumerate(self.current_videos):
-                    # Update progress
-                    all_comments_window.after(0, lambda v=video, idx=i: progress_label.config(
-                        text=f"Loading comments from: {v['title'][:40]}... ({idx+1}/{total_videos})"))
-                    
-                    try:
-                        # Get comments for this video
-                        request = self.youtube.commentThreads().list(
-                            part="snippet,replies",
-                            videoId=video['id'],
-                            maxResults=50,
-                            textFormat="plainText",
-                            order="relevance"
-                        )
-                        
-                        response = request.execute()
-                        
-                        for item in response.get("items", []):
-                            comment_data = item["snippet"]["topLevelComment"]["snippet"]
-                            comment_info = {
-                                'comment_id': item['id'],
-                                'video_id': video['id'],
-                                'video_title': video['title'],
-                                'author': comment_data["authorDisplayName"],
-                                'text': comment_data["textDisplay"],
-                                'likes': comment_data.get("likeCount", 0),
-                                'published': comment_data["publishedAt"][:10],
-                                'reply_count': item["snippet"]["totalReplyCount"]
-                            }
-                            all_comments.append(comment_info)
-                            
-                    except Exception as e:
-                        print(f"Error loading comments for video {video['title']}: {str(e)}")
-                        continue
+                # Update progress
+                all_comments_window.after(0, lambda: progress_label.config(
+                    text=f"Loading comments from {total_videos} videos..."))
+                
+                # Unchanged videos (same comment count as last time) cost no API call; the
+                # rest are requested in batches of up to 50 per round trip
+                errors = self.sync.sync_comments_many(list(titles))
+                for video_id, e in errors.items():
+                    print(f"Error loading comments for video {titles[video_id]}: {str(e)}")
+                
+                for row in self.store.comment_threads(list(titles)):
+                    comment_info = {
+                        'comment_id': row['thread_id'],
+                        'video_id': row['video_id'],
+                        'video_title': titles[row['video_id']],
+                        'author': row['author'],
+                        'text': row['text'],
+                        'likes': row['like_count'],
+                        'published': (row['published_at'] or '')[:10],
+                        'reply_count': row['reply_count']
+                    }
+                    all_comments.append(comment_info)
                 
                 # Sort comments by likes (descending) then by date (newest first)
                 all_comments.sort(key=lambda x: (-int(x['likes']), x['published']), reverse=True)
@@ -922,6 +878,7 @@ class YouTubeCommentManager:
                                 part='snippet',
                                 body=request_body
                             ).execute()
+                            self.store.invalidate(f"comments:{comment_data['video_id']}")
                             
                             self.log_action(f"✏️ Edited comment by {comment_data['author']} on video {comment_data['video_title'][:30]}...")
                             messagebox.showinfo("Success", "Comment edited successfully!")
@@ -965,6 +922,7 @@ class YouTubeCommentManager:
                     try:
                         # Delete comment using YouTube API
                         self.youtube.comments().delete(id=comment_data['comment_id']).execute()
+                        self.store.delete_comment_thread(comment_data['comment_id'])
                         self.log_action(f"🗑️ Deleted comment by {comment_data['author']} on video {comment_data['video_title'][:30]}...")
                         messagebox.showinfo("Success", "Comment deleted successfully!")
                         
@@ -1051,6 +1009,7 @@ class YouTubeCommentManager:
                         part='snippet',
                         body=request_body
                     ).execute()
+                    self.store.upsert_comment_threads([comment_thread_row(response)])
                     
                     self.log_action(f"➕ Added comment to {self.selected_video_data['title']}: {content[:50]}...")
                     messagebox.showinfo("Success", "Comment added successfully!")
@@ -1112,6 +1071,8 @@ class YouTubeCommentManager:
                                 part='snippet',
                                 body=request_body
                             ).execute()
+                            # Edits do not change the comment count, so re-page this video next time
+                            self.store.invalidate(f"comments:{comment['video_id']}")
                             
                             self.log_action(f"✏️ Edited comment by {comment['author']}")
                             messagebox.showinfo("Success", "Comment edited successfully!")
@@ -1152,6 +1113,7 @@ class YouTubeCommentManager:
                     try:
                         # Delete comment using YouTube API
                         self.youtube.comments().delete(id=comment['id']).execute()
+                        self.store.delete_comment_thread(comment['id'])
                         
                         self.log_action(f"🗑️ Deleted comment by {comment['author']}")
                         messagebox.showinfo("Success", "Comment deleted successfully!")
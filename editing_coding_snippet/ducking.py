@@ -0,0 +1,97 @@
+import numpy as np
+from audio_source import write_wav
+
+# Speech-driven music ducking computed with NumPy instead of ffmpeg volume
+# expressions. The old approach nested one if(between(t,...)) (or one
+# volume filter) per speech segment, which ffmpeg evaluates for every
+# sample, so cost grew with the number of segments. Here the gain curve is
+# built once at ENVELOPE_RATE frames/s and handed to ffmpeg as a tiny WAV
+# control track that is multiplied into the music (amultiply); the mix cost
+# is linear in duration and independent of segment count.
+
+ENVELOPE_RATE = 1000
+DEFAULT_ATTACK = 0.15
+DEFAULT_RELEASE = 0.4
+
+
+def _merge_intervals(starts, ends, max_gap):
+    """Merge sorted intervals whose gap to the running end is <= max_gap"""
+    running_end = np.maximum.accumulate(ends)
+    new_group = np.ones(len(starts), dtype=bool)
+    new_group[1:] = starts[1:] - running_end[:-1] > max_gap
+    group_starts = np.flatnonzero(new_group)
+    return starts[group_starts], np.maximum.reduceat(ends, group_starts)
+
+
+def find_speech_segments(words, duration, merge_gap=0.5, fade_buffer=0.3, min_segment_duration=0.0):
+    """Speech intervals from word timestamps as an (n, 2) float array.
+
+    Words closer than merge_gap are joined, segments shorter than
+    min_segment_duration dropped, then each is padded by fade_buffer and
+    overlapping padded segments are merged.
+    """
+    if not words:
+        return np.zeros((0, 2))
+    starts = np.array([float(w["start"]) for w in words])
+    ends = np.array([float(w["end"]) for w in words])
+    order = np.argsort(starts, kind="stable")
+    starts, ends = _merge_intervals(starts[order], ends[order], merge_gap)
+    keep = ends - starts >= min_segment_duration
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return np.zeros((0, 2))
+    starts = np.maximum(0.0, starts - fade_buffer)
+    ends = np.minimum(duration, ends + fade_buffer)
+    starts, ends = _merge_intervals(starts, ends, 0.0)
+    return np.column_stack((starts, ends))
+
+
+def ducking_envelope(segments, duration, music_volume, ducked_volume,
+                     rate=ENVELOPE_RATE, attack=DEFAULT_ATTACK, release=DEFAULT_RELEASE):
+    """Music gain per frame: ducked_volume during speech, music_volume otherwise.
+
+    Transitions are smoothstep ramps: the duck starts `attack` seconds before
+    a segment (the timestamps are known ahead of time) and recovers over
+    `release` seconds after it.
+    """
+    frames = int(np.ceil(duration * rate)) + 1
+    segments = np.asarray(segments, dtype=float).reshape(-1, 2)
+    if not len(segments):
+        return np.full(frames, music_volume, dtype=np.float32)
+
+    # Speech mask from +1/-1 edges, O(frames + segments)
+    edges = np.zeros(frames + 1)
+    np.add.at(edges, np.clip(np.round(segments[:, 0] * rate).astype(int), 0, frames), 1)
+    np.add.at(edges, np.clip(np.round(segments[:, 1] * rate).astype(int), 0, frames), -1)
+    speech = np.cumsum(edges[:frames]) > 0
+
+    # Distance (in frames) to the previous and next speech frame
+    index = np.arange(frames)
+    far = 4 * frames
+    last_speech = np.maximum.accumulate(np.where(speech, index, -far))
+    next_speech = np.minimum.accumulate(np.where(speech, index, far)[::-1])[::-1]
+    after = np.clip(1.0 - (index - last_speech) / max(1.0, release * rate), 0.0, 1.0)
+    before = np.clip(1.0 - (next_speech - index) / max(1.0, attack * rate), 0.0, 1.0)
+    duck = np.maximum(after, before)
+    duck = duck * duck * (3.0 - 2.0 * duck)
+
+    gain = music_volume - (music_volume - ducked_volume) * duck
+    return gain.astype(np.float32)
+
+
+def write_envelope_track(path, segments, duration, music_volume, ducked_volume, rate=ENVELOPE_RATE, **ramp):
+    """Write the gain curve relative to music_volume (0..1) as a mono WAV control track"""
+    gain = ducking_envelope(segments, duration, music_volume, ducked_volume, rate=rate, **ramp)
+    write_wav(path, gain / max(music_volume, 1e-6), sample_rate=rate)
+    return path
+
+
+def ducking_filter_complex(music_volume, weights="1.0 0.8", sample_rate=48000):
+    """Filter graph for inputs [0] video, [1] music, [2] envelope track -> [aout]"""
+    layout = f"aformat=sample_fmts=fltp:sample_rates={sample_rate}:channel_layouts=stereo"
+    return (
+        f"[1:a]aloop=loop=-1:size=2e+09,{layout},volume={music_volume}[bg_raw];"
+        f"[2:a]aresample={sample_rate},{layout}[duck_env];"
+        f"[bg_raw][duck_env]amultiply[bg];"
+        f"[0:a][bg]amix=inputs=2:duration=first:weights='{weights}'[aout]"
+    )
@@ -5,7 +5,9 @@ import tkinter as tk
 from tkinter import filedialog, simpledialog
 from pathlib import Path
 import logging
-from faster_whisper import WhisperModel
+from whisper_server import load_whisper_model
+from transcription_cache import cached_transcription
+from ducking import find_speech_segments, write_envelope_track, ducking_filter_complex
 import ffmpeg
 import re
 
@@ -52,14 +54,19 @@ def get_video_duration(file_path):
 
 def transcribe_audio(audio_path):
     logging.info(f"🧠 Transcribing: {audio_path}")
-    model = WhisperModel("medium", device="cpu", compute_type="int8")
-    segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True, language="en")
-    words = []
-    for segment in segments:
-        for w in segment.words:
-            if w.word.strip():
-                words.append({"word": w.word.strip(), "start": w.start, "end": w.end})
-    return words
+    params = {"beam_size": 5, "word_timestamps": True, "language": "en"}
+
+    def run_whisper():
+        model = load_whisper_model("medium", device="cpu", compute_type="int8")
+        segments, _ = model.transcribe(audio_path, **params)
+        words = []
+        for segment in segments:
+            for w in segment.words:
+                if w.word.strip():
+                    words.append({"word": w.word.strip(), "start": w.start, "end": w.end})
+        return words
+
+    return cached_transcription(audio_path, "medium", params, run_whisper)
 
 def group_words_into_subtitles(words, max_words_per_group=4, max_duration=3.0):
     """Group words into subtitle segments for better readability"""
@@ -216,57 +223,9 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         f.write(f"Dialogue: 0,{format_time(0)},{format_time(15)},HelloStyle,,0,0,0,,{title_text.upper()}\n")
 
 def create_speech_segments_advanced(words, video_duration, merge_gap=0.5, fade_buffer=0.3, min_segment_duration=0.5):
-    """Improved speech detection with better merging and fade handling"""
-    if not words:
-        return []
-    
-    # Sort words by start time
-    sorted_words = sorted(words, key=lambda x: x["start"])
-    segments = []
-    
-    # Initial grouping
-    current_start = sorted_words[0]["start"]
-    current_end = sorted_words[0]["end"]
-    
-    for word in sorted_words[1:]:
-        gap = word["start"] - current_end
-        
-        if gap <= merge_gap:
-            # Extend current segment
-            current_end = max(current_end, word["end"])
-        else:
-            # Close current segment and start new one
-            if current_end - current_start >= min_segment_duration:
-                segments.append((current_start, current_end))
-            current_start = word["start"]
-            current_end = word["end"]
-    
-    # Add final segment
-    if current_end - current_start >= min_segment_duration:
-        segments.append((current_start, current_end))
-    
-    # Apply fade buffers and merge overlapping segments
-    buffered_segments = []
-    for start, end in segments:
-        buffered_start = max(0, start - fade_buffer)
-        buffered_end = min(video_duration, end + fade_buffer)
-        buffered_segments.append((buffered_start, buffered_end))
-    
-    # Merge overlapping buffered segments
-    if not buffered_segments:
-        return []
-    
-    merged_segments = [buffered_segments[0]]
-    for start, end in buffered_segments[1:]:
-        last_start, last_end = merged_segments[-1]
-        
-        if start <= last_end:
-            # Merge overlapping segments
-            merged_segments[-1] = (last_start, max(last_end, end))
-        else:
-            merged_segments.append((start, end))
-    
-    return merged_segments
+    """Improved speech detection with better merging and fade handling (vectorized)"""
+    segments = find_speech_segments(words, video_duration, merge_gap, fade_buffer, min_segment_duration)
+    return [(start, end) for start, end in segments.tolist()]
 
 def add_background_music_with_advanced_ducking(video_path, music_path, output_path, words, 
                                                music_volume=0.12, ducked_volume=0.04):
@@ -284,36 +243,15 @@ def add_background_music_with_advanced_ducking(video_path, music_path, output_pa
         ], check=True)
         return
 
-    # Create simple but effective ducking using volume keyframes
-    volume_expressions = []
-    
-    # Start with normal volume
-    current_volume = music_volume
-    
-    for start, end in speech_segments:
-        # Ensure we have valid time ranges
-        if start >= end or start < 0 or end > video_duration:
-            continue
-            
-        # Duck down during speech
-        volume_expressions.append(f"between(t,{start:.2f},{end:.2f})*{ducked_volume}")
-        
-    # Create the volume filter expression
-    if volume_expressions:
-        # Base volume when not speaking
-        volume_expr = f"{music_volume}"
-        # Add ducking for each speech segment
-        for expr in volume_expressions:
-            volume_expr = f"if({expr},{ducked_volume},{volume_expr})"
-    else:
-        volume_expr = str(music_volume)
-
-    # Simplified filter chain
-    filter_complex = f"[1:a]aloop=loop=-1:size=2e+09,volume='{volume_expr}'[bg];[0:a][bg]amix=inputs=2:duration=first:weights='1.0 0.8'[aout]"
+    # Precomputed gain envelope (smooth attack/release) as a control track,
+    # so the mix cost does not depend on the number of speech segments
+    envelope_path = f"duck_env_{Path(output_path).stem}.wav"
+    write_envelope_track(envelope_path, speech_segments, video_duration, music_volume, ducked_volume)
+    filter_complex = ducking_filter_complex(music_volume)
 
     try:
         subprocess.run([
-            "ffmpeg", "-y", "-i", video_path, "-i", music_path,
+            "ffmpeg", "-y", "-i", video_path, "-i", music_path, "-i", envelope_path,
             "-filter_complex", filter_complex,
             "-map", "0:v", "-map", "[aout]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
         ], check=True)
@@ -321,6 +259,9 @@ def add_background_music_with_advanced_ducking(video_path, music_path, output_pa
         logging.warning(f"Advanced ducking failed, falling back to simple method: {e}")
         # Fallback to simple ducking
         add_background_music_simple(video_path, music_path, output_path, words, music_volume, ducked_volume)
+    finally:
+        if os.path.exists(envelope_path):
+            os.remove(envelope_path)
 
 def add_background_music_simple(video_path, music_path, output_path, words, music_volume=0.12, ducked_volume=0.04):
     """Simple and reliable background music with basic ducking"""
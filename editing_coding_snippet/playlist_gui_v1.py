@@ -5,13 +5,13 @@ import csv
 import webbrowser
 from datetime import datetime
 import os
-from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
 import threading
 import pyperclip
 import re
+from youtube_store import build_youtube, get_youtube_store, YouTubeSync
 
 class YouTubePlaylistManager:
     def __init__(self):
@@ -24,6 +24,10 @@ class YouTubePlaylistManager:
         self.credentials = None
         self.scopes = ['https://www.googleapis.com/auth/youtube']
         
+        # Local mirror of the channel; views are filled from it and synced incrementally
+        self.store = get_youtube_store()
+        self.sync = None
+        
         # Data storage
         self.playlists = {}
         self.current_playlist_id = None
@@ -443,6 +447,7 @@ class YouTubePlaylistManager:
                             request.execute()
                             
                             # Remove from local storage
+                            self.store.delete_videos([video['id']])
                             if video['id'] in self.unassigned_videos:
                                 del self.unassigned_videos[video['id']]
                             if video['id'] in self.channel_videos:
@@ -481,67 +486,23 @@ class YouTubePlaylistManager:
         def fetch_channel_videos():
             try:
                 self.update_status("Loading channel videos...")
-                self.channel_videos = {}
-                
-                # Get channel info
-                channel_response = self.youtube.channels().list(
-                    part="contentDetails",
-                    mine=True
-                ).execute()
-                
-                if not channel_response['items']:
-                    messagebox.showerror("Error", "No channel found!")
-                    return
-                
-                uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-                
-                # Get all videos from uploads playlist
-                next_page_token = None
-                video_count = 0
                 
-                while True:
-                    request = self.youtube.playlistItems().list(
-                        part="snippet,contentDetails",
-                        playlistId=uploads_playlist_id,
-                        maxResults=50,
-                        pageToken=next_page_token
-                    )
-                    response = request.execute()
-                    
-                    video_ids = []
-                    for item in response['items']:
-                        video_id = item['contentDetails']['videoId']
-                        video_ids.append(video_id)
-                        self.channel_videos[video_id] = {
-                            'title': item['snippet']['title'],
-                            'description': item['snippet']['description'][:100] + '...' if len(item['snippet']['description']) > 100 else item['snippet']['description'],
-                            'published': item['snippet']['publishedAt'][:10],
-                        }
-                    
-                    # Get additional video details
-                    if video_ids:
-                        video_request = self.youtube.videos().list(
-                            part="statistics,contentDetails,status",
-                            id=','.join(video_ids)
-                        )
-                        video_response = video_request.execute()
-                        
-                        for video_item in video_response['items']:
-                            video_id = video_item['id']
-                            if video_id in self.channel_videos:
-                                self.channel_videos[video_id].update({
-                                    'duration': self.format_duration(video_item['contentDetails']['duration']),
-                                    'views': f"{int(video_item['statistics'].get('viewCount', 0)):,}",
-                                    'privacy_status': video_item['status']['privacyStatus']
-                                })
-                    
-                    video_count += len(response['items'])
-                    next_page_token = response.get('nextPageToken')
-                    
-                    if not next_page_token:
-                        break
+                # Only uploads newer than the last sync are paged; stale statistics are refreshed
+                new_count = self.sync.sync_videos()
+                self.channel_videos = {}
+                for row in self.store.channel_videos(self.sync.channel_id()):
+                    description = row['description'] or ''
+                    self.channel_videos[row['video_id']] = {
+                        'title': row['title'],
+                        'description': description[:100] + '...' if len(description) > 100 else description,
+                        'published': (row['published_at'] or '')[:10],
+                        'duration': self.format_duration(row['duration'] or ''),
+                        'views': f"{row['view_count'] or 0:,}",
+                        'privacy_status': row['privacy_status']
+                    }
+                video_count = len(self.channel_videos)
                 
-                self.update_status(f"Loaded {video_count} channel videos")
+                self.update_status(f"Loaded {video_count} channel videos ({new_count} new since last sync)")
                 messagebox.showinfo("Success", f"Loaded {video_count} videos from your channel!")
                 
             except Exception as e:
@@ -565,69 +526,23 @@ class YouTubePlaylistManager:
             try:
                 self.update_status("Finding unassigned videos...")
                 
-                # Get all playlist items
-                playlist_video_ids = set()
-                
-                # First get all playlists if not already loaded
-                if not self.playlists:
-                    # Temporarily refresh playlists in this thread
-                    request = self.youtube.playlists().list(
-                        part="snippet,contentDetails",
-                        mine=True,
-                        maxResults=50
-                    )
-                    response = request.execute()
-                    
-                    temp_playlists = {}
-                    for item in response['items']:
-                        playlist_id = item['id']
-                        temp_playlists[playlist_id] = {
-                            'title': item['snippet']['title'],
-                            'video_count': item['contentDetails']['itemCount'],
-                            'description': item['snippet'].get('description', ''),
-                            'published': item['snippet']['publishedAt']
-                        }
-                    
-                    # Get video IDs from all playlists
-                    for playlist_id in temp_playlists.keys():
-                        try:
-                            request = self.youtube.playlistItems().list(
-                                part="contentDetails",
-                                playlistId=playlist_id,
-                                maxResults=50
-                            )
-                            response = request.execute()
-                            
-                            for item in response['items']:
-                                playlist_video_ids.add(item['contentDetails']['videoId'])
-                        except:
-                            continue  # Skip if playlist is inaccessible
-                else:
-                    # Get video IDs from all playlists
-                    for playlist_id in self.playlists.keys():
-                        try:
-                            request = self.youtube.playlistItems().list(
-                                part="contentDetails",
-                                playlistId=playlist_id,
-                                maxResults=50
-                            )
-                            response = request.execute()
-                            
-                            for item in response['items']:
-                                playlist_video_ids.add(item['contentDetails']['videoId'])
-                        except:
-                            continue  # Skip if playlist is inaccessible
+                # Bring every playlist and all of its items up to date: all playlists are paged
+                # together in batched calls, unchanged ones cost a 304
+                membership = self.sync.sync_membership()
                 
                 # Find videos not in any playlist
+                unassigned = membership.unassigned()
                 self.unassigned_videos = {}
                 for video_id, video_data in self.channel_videos.items():
-                    if video_id not in playlist_video_ids:
+                    if video_id in unassigned:
                         self.unassigned_videos[video_id] = video_data
                 
                 # Update the unassigned videos display
                 self.display_unassigned_videos()
                 
-                self.update_status(f"Found {len(self.unassigned_videos)} unassigned videos")
+                self.update_status(f"Found {len(self.unassigned_videos)} unassigned videos, "
+                                   f"{len(membership.duplicated())} in more than one playlist, "
+                                   f"{len(membership.orphaned())} playlist entries not among your uploads")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to find unassigned videos: {str(e)}")
@@ -698,6 +613,7 @@ class YouTubePlaylistManager:
                     request.execute()
                     
                     # Remove from local storage
+                    self.store.delete_videos([video_id])
                     if video_id in self.unassigned_videos:
                         del self.unassigned_videos[video_id]
                     if video_id in self.channel_videos:
@@ -887,12 +803,12 @@ class YouTubePlaylistManager:
             try:
                 self.credentials = Credentials.from_authorized_user_file('token.json', self.scopes)
                 if self.credentials and self.credentials.valid:
-                    self.youtube = build('youtube', 'v3', credentials=self.credentials)
+                    self.connect_youtube()
                     self.auth_status.config(text="Authenticated", foreground="green")
                     self.refresh_playlists()
                 elif self.credentials and self.credentials.expired and self.credentials.refresh_token:
                     self.credentials.refresh(Request())
-                    self.youtube = build('youtube', 'v3', credentials=self.credentials)
+                    self.connect_youtube()
                     self.save_credentials()
                     self.auth_status.config(text="Authenticated", foreground="green")
                     self.refresh_playlists()
@@ -917,7 +833,7 @@ class YouTubePlaylistManager:
             if auth_code:
                 flow.fetch_token(code=auth_code)
                 self.credentials = flow.credentials
-                self.youtube = build('youtube', 'v3', credentials=self.credentials)
+                self.connect_youtube()
                 
                 self.save_credentials()
                 self.auth_status.config(text="Authenticated", foreground="green")
@@ -927,6 +843,11 @@ class YouTubePlaylistManager:
         except Exception as e:
             messagebox.showerror("Authentication Error", f"Failed to authenticate: {str(e)}")
     
+    def connect_youtube(self):
+        """Build the API client and the store sync for the current credentials"""
+        self.youtube = build_youtube(self.credentials)
+        self.sync = YouTubeSync(self.youtube, self.store)
+    
     def save_credentials(self):
         """Save credentials to file"""
         with open('token.json', 'w') as token:
@@ -941,30 +862,12 @@ class YouTubePlaylistManager:
         def fetch_playlists():
             try:
                 self.update_status("Fetching playlists...")
-                request = self.youtube.playlists().list(
-                    part="snippet,contentDetails",
-                    mine=True,
-                    maxResults=50
-                )
-                response = request.execute()
-                
-                self.playlists = {}
-                self.playlist_listbox.delete(0, tk.END)
-                
-                for item in response['items']:
-                    playlist_id = item['id']
-                    title = item['snippet']['title']
-                    video_count = item['contentDetails']['itemCount']
-                    
-                    self.playlists[playlist_id] = {
-                        'title': title,
-                        'video_count': video_count,
-                        'description': item['snippet'].get('description', ''),
-                        'published': item['snippet']['publishedAt']
-                    }
-                    
-                    display_text = f"{title} ({video_count} videos)"
-                    self.playlist_listbox.insert(tk.END, display_text)
+                channel_id = self.sync.channel_id()
+                # Show the cached list right away, then only re-page it if it changed
+                if self.store.playlists(channel_id):
+                    self.show_playlists(channel_id)
+                if self.sync.sync_playlists() or not self.playlists:
+                    self.show_playlists(channel_id)
                 
                 self.update_status(f"Loaded {len(self.playlists)} playlists")
                 
@@ -974,6 +877,22 @@ class YouTubePlaylistManager:
         
         threading.Thread(target=fetch_playlists, daemon=True).start()
     
+    def show_playlists(self, channel_id):
+        """Fill the playlist list from the store"""
+        self.playlists = {}
+        self.playlist_listbox.delete(0, tk.END)
+        
+        for row in self.store.playlists(channel_id):
+            self.playlists[row['playlist_id']] = {
+                'title': row['title'],
+                'video_count': row['item_count'] or 0,
+                'description': row['description'] or '',
+                'published': row['published_at'] or ''
+            }
+            
+            display_text = f"{row['title']} ({row['item_count'] or 0} videos)"
+            self.playlist_listbox.insert(tk.END, display_text)
+    
     def on_playlist_select(self, event):
         """Handle playlist selection"""
         selection = self.playlist_listbox.curselection()
@@ -1000,59 +919,28 @@ class YouTubePlaylistManager:
                 
                 self.current_playlist_items = {}
                 
-                request = self.youtube.playlistItems().list(
-                    part="snippet,contentDetails,id",
-                    playlistId=playlist_id,
-                    maxResults=50
-                )
-                response = request.execute()
+                self.sync.sync_playlist_items(playlist_id)
+                items = self.store.playlist_items(playlist_id)
+                self.sync.ensure_video_details([item['video_id'] for item in items])
+                items = self.store.playlist_items(playlist_id)
                 
-                video_ids = []
-                for item in response['items']:
-                    video_id = item['contentDetails']['videoId']
-                    playlist_item_id = item['id']
-                    video_ids.append(video_id)
+                for i, item in enumerate(items):
+                    video_id = item['video_id']
                     # Store playlist item ID for reordering
                     self.current_playlist_items[video_id] = {
-                        'playlist_item_id': playlist_item_id,
-                        'position': len(video_ids) - 1
+                        'playlist_item_id': item['item_id'],
+                        'position': i
                     }
-                
-                # Get video statistics
-                if video_ids:
-                    video_request = self.youtube.videos().list(
-                        part="statistics,contentDetails,snippet",
-                        id=','.join(video_ids)
-                    )
-                    video_response = video_request.execute()
-                    video_stats = {item['id']: item for item in video_response['items']}
-                
-                for i, item in enumerate(response['items']):
-                    video_id = item['contentDetails']['videoId']
-                    snippet = item['snippet']
-                    
-                    title = snippet['title']
-                    channel = snippet['channelTitle']
-                    published = snippet['publishedAt'][:10]
-                    
-                    # Get video stats
-                    stats = video_stats.get(video_id, {})
-                    views = stats.get('statistics', {}).get('viewCount', 'N/A')
-                    duration = stats.get('contentDetails', {}).get('duration', 'N/A')
-                    
-                    # Format views
-                    if views != 'N/A':
-                        views = f"{int(views):,}"
                     
-                    # Format duration
-                    if duration != 'N/A':
-                        duration = self.format_duration(duration)
+                    views = f"{item['v_view_count']:,}" if item['v_view_count'] is not None else 'N/A'
+                    duration = self.format_duration(item['v_duration']) if item['v_duration'] else 'N/A'
                     
                     self.video_tree.insert('', 'end', text=str(i+1), 
-                                         values=(title, channel, duration, views, published),
+                                         values=(item['title'], item['channel_title'], duration, views,
+                                                 (item['published_at'] or '')[:10]),
                                          tags=(video_id,))
                 
-                self.update_status(f"Loaded {len(response['items'])} videos")
+                self.update_status(f"Loaded {len(items)} videos")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load videos: {str(e)}")
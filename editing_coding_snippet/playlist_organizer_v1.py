@@ -5,13 +5,15 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from typing import List, Dict, Optional, Any
 import threading
-from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials as OAuthCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 import pickle
 from datetime import datetime
+from youtube_store import build_youtube, get_youtube_store, YouTubeSync
+from youtube_client import YouTubeClient
+from playlist_reorder import target_order, plan_moves, move_to, apply_moves
 
 class YouTubePlaylistManager:
     """
@@ -39,6 +41,10 @@ class YouTubePlaylistManager:
         self.token_file = token_file
         self.youtube = None
         self._authenticated = False
+        # Playlists and their items are read from the local store, synced with conditional requests
+        self.store = get_youtube_store()
+        self.client = None
+        self.sync = None
     
     def authenticate(self):
         """
@@ -76,7 +82,9 @@ class YouTubePlaylistManager:
             with open(self.token_file, 'wb') as token:
                 pickle.dump(creds, token)
         
-        self.youtube = build('youtube', 'v3', credentials=creds)
+        self.youtube = build_youtube(creds)
+        self.client = YouTubeClient(self.youtube)
+        self.sync = YouTubeSync(self.youtube, self.store, self.client)
         self._authenticated = True
         return self.youtube
     
@@ -113,34 +121,21 @@ class YouTubePlaylistManager:
     def get_playlists(self, max_results: int = 50) -> List[Dict[str, Any]]:
         """Get all playlists for the authenticated user"""
         try:
+            self.sync.sync_playlists()
             playlists = []
-            next_page_token = None
             
-            while True:
-                request = self.youtube.playlists().list(
-                    part="snippet,status,contentDetails",
-                    mine=True,
-                    maxResults=min(max_results, 50),
-                    pageToken=next_page_token
-                )
-                response = request.execute()
-                
-                for item in response["items"]:
-                    playlist_info = {
-                        "id": item["id"],
-                        "title": item["snippet"]["title"],
-                        "description": item["snippet"]["description"],
-                        "privacy_status": item["status"]["privacyStatus"],
-                        "video_count": item["contentDetails"]["itemCount"],
-                        "created": item["snippet"]["publishedAt"]
-                    }
-                    playlists.append(playlist_info)
-                
-                next_page_token = response.get("nextPageToken")
-                if not next_page_token or len(playlists) >= max_results:
-                    break
+            for row in self.store.playlists(self.sync.channel_id())[:max_results]:
+                playlist_info = {
+                    "id": row["playlist_id"],
+                    "title": row["title"],
+                    "description": row["description"],
+                    "privacy_status": row["privacy_status"],
+                    "video_count": row["item_count"],
+                    "created": row["published_at"]
+                }
+                playlists.append(playlist_info)
             
-            return playlists[:max_results]
+            return playlists
             
         except Exception as e:
             raise Exception(f"Error retrieving playlists: {e}")
@@ -212,21 +207,23 @@ class YouTubePlaylistManager:
                 part="snippet",
                 body=body
             )
-            response = request.execute()
+            self.client.execute(request)
             return True
             
         except Exception as e:
             raise Exception(f"Error adding video to playlist: {e}")
     
     def add_multiple_videos_to_playlist(self, playlist_id: str, video_ids: List[str]) -> Dict[str, int]:
-        """Add multiple videos to a playlist"""
+        """Add multiple videos to a playlist, in order.
+        Inserts into one playlist go one at a time: concurrent writes to the
+        same playlist are often rejected and would land in any order."""
         results = {"success": 0, "failed": 0, "failed_ids": []}
         
         for video_id in video_ids:
             try:
                 self.add_video_to_playlist(playlist_id, video_id)
                 results["success"] += 1
-            except:
+            except Exception:
                 results["failed"] += 1
                 results["failed_ids"].append(video_id)
         
@@ -253,38 +250,27 @@ class YouTubePlaylistManager:
         except Exception as e:
             raise Exception(f"Error removing video from playlist: {e}")
     
-    def get_playlist_videos(self, playlist_id: str, max_results: int = 500) -> List[Dict[str, Any]]:
-        """Get all videos in a playlist"""
+    def get_playlist_videos(self, playlist_id: str, max_results: int = 500, refresh: bool = True) -> List[Dict[str, Any]]:
+        """Get all videos in a playlist (refresh=False: as last synced or reordered here)"""
         try:
+            # A single 304 when the playlist has not changed since it was last synced
+            if refresh:
+                self.sync.sync_playlist_items(playlist_id)
             videos = []
-            next_page_token = None
             
-            while True:
-                request = self.youtube.playlistItems().list(
-                    part="snippet,contentDetails",
-                    playlistId=playlist_id,
-                    maxResults=min(50, max_results - len(videos)),
-                    pageToken=next_page_token
-                )
-                response = request.execute()
-                
-                for i, item in enumerate(response["items"]):
-                    video_info = {
-                        "item_id": item["id"],
-                        "video_id": item["snippet"]["resourceId"]["videoId"],
-                        "title": item["snippet"]["title"],
-                        "description": item["snippet"]["description"],
-                        "position": item["snippet"]["position"],
-                        "added_date": item["snippet"]["publishedAt"],
-                        "thumbnail": item["snippet"]["thumbnails"]["default"]["url"]
-                    }
-                    videos.append(video_info)
-                
-                next_page_token = response.get("nextPageToken")
-                if not next_page_token or len(videos) >= max_results:
-                    break
+            for row in self.store.playlist_items(playlist_id)[:max_results]:
+                video_info = {
+                    "item_id": row["item_id"],
+                    "video_id": row["video_id"],
+                    "title": row["title"],
+                    "description": row["description"],
+                    "position": row["position"],
+                    "added_date": row["published_at"],
+                    "thumbnail": row["thumbnail"]
+                }
+                videos.append(video_info)
             
-            return videos[:max_results]
+            return videos
             
         except Exception as e:
             raise Exception(f"Error retrieving playlist videos: {e}")
@@ -292,10 +278,10 @@ class YouTubePlaylistManager:
     def reorder_playlist_video(self, playlist_id: str, video_id: str, new_position: int) -> bool:
         """Change the position of a video within a playlist"""
         try:
-            playlist_items = self.get_playlist_videos(playlist_id)
+            videos = self.get_playlist_videos(playlist_id)
             
             item_to_move = None
-            for item in playlist_items:
+            for item in videos:
                 if item["video_id"] == video_id:
                     item_to_move = item
                     break
@@ -303,26 +289,44 @@ class YouTubePlaylistManager:
             if not item_to_move:
                 raise Exception(f"Video {video_id} not found in playlist")
             
-            request = self.youtube.playlistItems().update(
-                part="snippet",
-                body={
-                    "id": item_to_move["item_id"],
-                    "snippet": {
-                        "playlistId": playlist_id,
-                        "resourceId": {
-                            "kind": "youtube#video",
-                            "videoId": video_id
-                        },
-                        "position": new_position
-                    }
-                }
-            )
-            request.execute()
+            current = [item["item_id"] for item in videos]
+            self.apply_playlist_order(playlist_id, videos, move_to(current, item_to_move["item_id"], new_position))
             return True
             
         except Exception as e:
             raise Exception(f"Error reordering video: {e}")
     
+    def sort_playlist(self, playlist_id: str, key: str = "title", reverse: bool = False, progress=None) -> int:
+        """Sort a playlist by title or episode number (see playlist_reorder.SORT_KEYS); returns the number of moves"""
+        try:
+            videos = self.get_playlist_videos(playlist_id)
+            return self.apply_playlist_order(playlist_id, videos, target_order(videos, key, reverse), progress)
+            
+        except Exception as e:
+            raise Exception(f"Error sorting playlist: {e}")
+    
+    def apply_playlist_order(self, playlist_id: str, videos: List[Dict[str, Any]], target: List[str], progress=None) -> int:
+        """Reorder the playlist from the order of videos to target (item ids) with the fewest position updates"""
+        current = [item["item_id"] for item in videos]
+        moves = plan_moves(current, target)
+        done = [0]
+        
+        def on_move(count, total):
+            done[0] = count
+            if progress:
+                progress(count, total)
+        
+        try:
+            apply_moves(self.client, self.youtube, playlist_id, moves,
+                        {item["item_id"]: item["video_id"] for item in videos}, on_move)
+        finally:
+            # Keep the cached order in step with the moves that went through
+            order = current
+            for item_id, position in moves[:done[0]]:
+                order = move_to(order, item_id, position)
+            self.store.reorder_playlist_items(playlist_id, order)
+        return len(moves)
+    
     def export_playlist_to_csv(self, playlist_id: str, filename: str = None) -> str:
         """Export playlist data to CSV file"""
         try:
@@ -427,6 +431,13 @@ class YouTubePlaylistManager:
 
 
 class YouTubePlaylistGUI:
+    # Sort menu label -> (playlist_reorder.SORT_KEYS key, reverse)
+    SORT_OPTIONS = {
+        "Title A-Z": ("title", False),
+        "Title Z-A": ("title", True),
+        "Episode number": ("episode", False),
+    }
+    
     def __init__(self, root):
         self.root = root
         self.root.title("YouTube Playlist Manager")
@@ -536,6 +547,12 @@ class YouTubePlaylistGUI:
         ttk.Button(reorder_frame, text="🔢 Set Position", 
                   command=self.set_video_position).pack(side=tk.LEFT, padx=(0, 5))
         
+        self.sort_var = tk.StringVar(value="Title A-Z")
+        ttk.Combobox(reorder_frame, textvariable=self.sort_var, values=list(self.SORT_OPTIONS),
+                     state="readonly", width=14).pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Button(reorder_frame, text="↕️ Sort Playlist", 
+                  command=self.sort_playlist).pack(side=tk.LEFT)
+        
         # Videos treeview
         video_frame = ttk.Frame(right_frame)
         video_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -613,15 +630,15 @@ class YouTubePlaylistGUI:
             self.current_playlist_id = self.playlists[index]['id']
             self.load_playlist_videos()
     
-    def load_playlist_videos(self):
-        """Load videos for the selected playlist"""
+    def load_playlist_videos(self, refresh=True):
+        """Load videos for the selected playlist (refresh=False: from the local cache, after our own moves)"""
         if not self.current_playlist_id:
             return
         
         def load_worker():
             try:
                 self.status_var.set("Loading videos...")
-                self.videos = self.manager.get_playlist_videos(self.current_playlist_id)
+                self.videos = self.manager.get_playlist_videos(self.current_playlist_id, refresh=refresh)
                 
                 # Update UI in main thread
                 self.root.after(0, self.update_video_tree)
@@ -879,7 +896,7 @@ class YouTubePlaylistGUI:
                 self.status_var.set("Moving video...")
                 self.manager.reorder_playlist_video(self.current_playlist_id, video_id, new_position)
                 self.status_var.set("Video moved successfully")
-                self.root.after(0, self.load_playlist_videos)
+                self.root.after(0, lambda: self.load_playlist_videos(refresh=False))
             except Exception as e:
                 self.status_var.set(f"Error moving video: {str(e)}")
                 messagebox.showerror("Error", f"Failed to move video:\n{str(e)}")
@@ -911,13 +928,36 @@ class YouTubePlaylistGUI:
                     self.status_var.set("Moving video...")
                     self.manager.reorder_playlist_video(self.current_playlist_id, video_id, new_position)
                     self.status_var.set("Video moved successfully")
-                    self.root.after(0, self.load_playlist_videos)
+                    self.root.after(0, lambda: self.load_playlist_videos(refresh=False))
                 except Exception as e:
                     self.status_var.set(f"Error moving video: {str(e)}")
                     messagebox.showerror("Error", f"Failed to move video:\n{str(e)}")
             
             threading.Thread(target=move_worker, daemon=True).start()
     
+    def sort_playlist(self):
+        """Sort the selected playlist with the fewest position updates"""
+        if not self.current_playlist_id:
+            messagebox.showwarning("Warning", "Please select a playlist first.")
+            return
+        
+        key, reverse = self.SORT_OPTIONS[self.sort_var.get()]
+        
+        def sort_worker():
+            try:
+                self.status_var.set("Planning reorder...")
+                moves = self.manager.sort_playlist(
+                    self.current_playlist_id, key, reverse,
+                    progress=lambda done, total: self.status_var.set(f"Moving videos... {done}/{total}"))
+                self.status_var.set(f"Playlist sorted with {moves} move(s)")
+            except Exception as e:
+                self.status_var.set(f"Error sorting playlist: {str(e)}")
+                messagebox.showerror("Error", f"Failed to sort playlist:\n{str(e)}")
+            finally:
+                self.root.after(0, lambda: self.load_playlist_videos(refresh=False))
+        
+        threading.Thread(target=sort_worker, daemon=True).start()
+    
     def export_json(self):
         """Export current playlist to JSON"""
         if not self.current_playlist_id:
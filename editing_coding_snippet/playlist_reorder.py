@@ -0,0 +1,130 @@
+import re
+import bisect
+import logging
+
+# Minimal-move playlist reordering. A playlist is reordered with one
+# playlistItems().update per moved item, and every update shifts the items
+# after it, so the plan is:
+#
+#   1. rank the current items by their target position,
+#   2. keep the longest increasing subsequence of those ranks in place (the
+#      largest set of items already in the right relative order),
+#   3. move every other item, in target order, to just after its target
+#      predecessor.
+#
+# That is len(items) - len(LIS) writes, the minimum for single-item moves.
+# The positions are computed against the list as it stands after the
+# previous moves, so the updates must run in order; a batch could apply
+# them in any order.
+
+EPISODE_PATTERN = re.compile(
+    r"\b(?:episode|ep|part|pt|day|lecture|lesson|chapter|session|video)\.?\s*#?\s*(\d+)|#\s*(\d+)", re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def natural_key(title):
+    """Case-insensitive key that orders "Part 2" before "Part 10\""""
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r"(\d+)", (title or "").casefold()) if part]
+
+
+def episode_number(title):
+    """Episode number in a title ("Ep. 12", "Part 3", "#7"), else its first number, else None"""
+    match = EPISODE_PATTERN.search(title or "")
+    if match:
+        return int(match.group(1) or match.group(2))
+    match = NUMBER_PATTERN.search(title or "")
+    return int(match.group()) if match else None
+
+
+def episode_key(title):
+    # Titles without a number go last, in title order
+    number = episode_number(title)
+    return (number is None, number or 0, natural_key(title))
+
+
+SORT_KEYS = {
+    "title": natural_key,
+    "episode": episode_key,
+}
+
+
+def target_order(items, key="title", reverse=False):
+    """item_ids of items ({"item_id", "title"}) sorted by SORT_KEYS[key]; ties keep their current order"""
+    key_func = SORT_KEYS[key]
+    return [item["item_id"] for item in sorted(items, key=lambda item: key_func(item["title"]), reverse=reverse)]
+
+
+def longest_increasing_subsequence(values):
+    """Indices of one longest strictly increasing subsequence of values, O(n log n)"""
+    tails, tail_indices = [], []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k else -1
+    result = []
+    i = tail_indices[-1] if tail_indices else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    return result[::-1]
+
+
+def plan_moves(current, target):
+    """[(item_id, position)] turning the order `current` into `target` with the fewest moves.
+
+    Each position is where the item goes in the list as left by the
+    moves before it (the semantics of a playlistItems().update).
+    """
+    if sorted(current) != sorted(target):
+        raise ValueError("current and target must contain the same items")
+    rank = {item_id: i for i, item_id in enumerate(target)}
+    keep = {current[i] for i in longest_increasing_subsequence([rank[item_id] for item_id in current])}
+    order = list(current)
+    moves = []
+    for i, item_id in enumerate(target):
+        if item_id in keep:
+            continue
+        order.remove(item_id)
+        position = order.index(target[i - 1]) + 1 if i else 0
+        order.insert(position, item_id)
+        moves.append((item_id, position))
+    return moves
+
+
+def move_to(current, item_id, position):
+    """current with item_id moved to position"""
+    order = [i for i in current if i != item_id]
+    order.insert(position, item_id)
+    return order
+
+
+def apply_moves(client, youtube, playlist_id, moves, video_ids, progress=None):
+    """Run planned moves one update each, in order. video_ids maps item_id -> video_id.
+
+    Returns the number of moves made; progress(done, total) is called after each.
+    """
+    for done, (item_id, position) in enumerate(moves, 1):
+        client.execute(youtube.playlistItems().update(
+            part="snippet",
+            body={
+                "id": item_id,
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": video_ids[item_id]},
+                    "position": position
+                }
+            }
+        ))
+        if progress:
+            progress(done, len(moves))
+    if moves:
+        logging.info(f"Reordered playlist {playlist_id} with {len(moves)} move(s)")
+    return len(moves)
@@ -0,0 +1,178 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+# On-disk cache of intermediate and final render artifacts (auto-edit, merge,
+# music mix, subtitle encode). Each stage key is derived from the key of the
+# stage before it plus the stage's own parameters, so a run only re-executes
+# the stages from the first changed input onwards, e.g. a subtitle style
+# tweak re-runs just the final encode.
+#
+# Intermediate entries are handed on to the next stage as they are, so a
+# video pins the entries it still reads (lookup/store with pin=True) until
+# it finishes; eviction by parallel workers skips pinned entries.
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RENDER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "render_stages")
+)
+DEFAULT_MAX_GB = float(os.environ.get("RENDER_CACHE_MAX_GB", "20"))
+SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def fingerprint_file(path, sample_bytes=SAMPLE_BYTES):
+    """Fast content fingerprint of a (large) media file.
+
+    Hashes the size plus the first and last sample_bytes instead of the whole
+    file; renamed or touched copies of the same video share one key.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode("utf-8"))
+    with open(path, "rb") as f:
+        digest.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(sample_bytes, size - sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def hash_text_file(path):
+    """SHA-256 of a small text artifact such as an .ass subtitle file"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU store of stage outputs, one file per stage key.
+
+    Like the transcription cache, recency is the file mtime (bumped on every
+    hit) so several GUI instances can share the directory. Pins are per
+    process.
+    """
+
+    def __init__(self, cache_dir=None, max_gb=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = int((DEFAULT_MAX_GB if max_gb is None else max_gb) * 1024 ** 3)
+        self.lock = threading.Lock()
+        self.pinned = {}  # entry path -> pin count
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def stage_key(self, stage, input_key, params=None):
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        raw = f"{stage}|{input_key}|{params_json}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key, suffix=".mp4"):
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def lookup(self, key, suffix=".mp4", pin=False):
+        """Path of the cached artifact for key, or None. With pin=True the
+        entry is kept from eviction until unpin()."""
+        path = self.entry_path(key, suffix)
+        with self.lock:
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            if pin:
+                self.pinned[path] = self.pinned.get(path, 0) + 1
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def pin(self, path):
+        with self.lock:
+            self.pinned[path] = self.pinned.get(path, 0) + 1
+
+    def unpin(self, *paths):
+        with self.lock:
+            for path in paths:
+                count = self.pinned.get(path, 0) - 1
+                if count > 0:
+                    self.pinned[path] = count
+                else:
+                    self.pinned.pop(path, None)
+
+    def store(self, key, artifact_path, move=False, suffix=".mp4", pin=False):
+        """Add artifact_path to the cache and return the cached path.
+
+        Temp intermediates are moved in (no copy); final outputs are copied so
+        the user's file and the cache entry never share an inode that ffmpeg
+        -y would later truncate. With pin=True the entry is pinned as by
+        lookup() (only when the cached path is returned).
+        """
+        target = self.entry_path(key, suffix)
+        if pin:
+            self.pin(target)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            if move:
+                shutil.move(artifact_path, temp_path)
+            else:
+                shutil.copyfile(artifact_path, temp_path)
+            os.replace(temp_path, target)
+        except Exception as e:
+            logging.warning(f"Could not write render cache entry: {e}")
+            if pin:
+                self.unpin(target)
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return artifact_path if os.path.exists(artifact_path) else None
+        self.evict(keep=target)
+        return target
+
+    def remove(self, key, suffix=".mp4"):
+        try:
+            os.remove(self.entry_path(key, suffix))
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        with self.lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep or path in self.pinned:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Process-wide cache instance using RENDER_CACHE_DIR / RENDER_CACHE_MAX_GB"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RenderCache()
+        return _default_cache
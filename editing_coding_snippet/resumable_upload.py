@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Parallel, resumable batch uploads for the YouTube Data API.
+#
+# Every video goes up as a chunked resumable session (CHUNK_SIZE bytes per
+# request), with UPLOAD_WORKERS sessions running at once. Each worker thread
+# has its own HTTP connection (googleapiclient's is not thread-safe). After
+# every chunk the session URI and byte offset are written to a JSON journal
+# keyed by the file's path, size and mtime:
+#
+#   uploading   {"uri", "offset", "total"}   resumed on the next run: the
+#               session is re-attached and the server reports the offset
+#   inserted    {"video_id"}                 upload finished; thumbnail and
+#               playlist still pending (these never re-upload the file)
+#   done        {"video_id"}                 skipped on later runs
+#
+# Thumbnail and playlist assignment run on a separate worker after the insert
+# returns, so the next upload starts immediately. With YOUTUBE_API_ENDPOINT
+# set (youtube_store.build_youtube) the uploads go to that server's
+# /upload/youtube/v3/videos, e.g. a local resumable-upload stand-in.
+
+DEFAULT_JOURNAL_PATH = os.environ.get(
+    "YOUTUBE_UPLOAD_JOURNAL",
+    os.path.join(os.path.expanduser("~"), ".cache", "youtube", "upload_journal.json")
+)
+CHUNK_ALIGN = 256 * 1024  # resumable chunks must be multiples of 256 KiB
+CHUNK_SIZE = int(float(os.environ.get("YOUTUBE_UPLOAD_CHUNK_MB", 8)) * 1024 * 1024)
+UPLOAD_WORKERS = int(os.environ.get("YOUTUBE_UPLOAD_WORKERS", 3))
+CHUNK_RETRIES = 5
+SESSION_GONE_STATUSES = {404, 410}
+
+
+def align_chunk_size(size):
+    return max(CHUNK_ALIGN, int(size) // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+def file_key(path):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def authorized_http_factory(youtube):
+    """New authorized HTTP connections with the credentials of a built service"""
+    import httplib2
+    import google_auth_httplib2
+    credentials = youtube._http.credentials
+    return lambda: google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+
+
+class UploadJournal:
+    """Thread-safe JSON file of upload state, rewritten atomically on every change"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_JOURNAL_PATH
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            return dict(self.entries.get(key, {}))
+
+    def update(self, key, **fields):
+        with self.lock:
+            entry = self.entries.setdefault(key, {})
+            entry.update(fields, updated=time.time())
+            self._save()
+
+    def forget(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class BatchUploader:
+    """Upload jobs ({"file", "body", ...}) as parallel resumable sessions.
+
+    after_insert(video_id, job) runs on a background worker once a video is
+    inserted (thumbnail, playlist); on_progress(job, sent, total) and
+    on_result(job, result) are called from worker threads.
+    """
+
+    def __init__(self, youtube, client=None, journal=None, workers=UPLOAD_WORKERS, chunk_size=CHUNK_SIZE,
+                 http_factory=None, after_insert=None, on_progress=None, on_result=None):
+        self.youtube = youtube
+        self.client = client
+        self.journal = journal or UploadJournal()
+        self.workers = max(1, int(workers))
+        self.chunk_size = align_chunk_size(chunk_size)
+        self.http_factory = http_factory or authorized_http_factory(youtube)
+        self.after_insert = after_insert
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self._local = threading.local()
+
+    def _http(self):
+        if not hasattr(self._local, "http"):
+            self._local.http = self.http_factory()
+        return self._local.http
+
+    def _request(self, job):
+        from googleapiclient.http import MediaFileUpload
+        media = MediaFileUpload(job["file"], chunksize=self.chunk_size, resumable=True)
+        return self.youtube.videos().insert(part=",".join(job["body"]), body=job["body"], media_body=media)
+
+    def _progress(self, job, sent, total):
+        if self.on_progress:
+            self.on_progress(job, sent, total)
+
+    def upload(self, job, stop_event=None):
+        """Upload one file, resuming a journaled session. Returns the video id, None if stopped."""
+        key = file_key(job["file"])
+        entry = self.journal.get(key)
+        if entry.get("video_id"):
+            logging.info(f"{os.path.basename(job['file'])} already uploaded as {entry['video_id']}")
+            return entry["video_id"]
+
+        request = self._request(job)
+        total = os.path.getsize(job["file"])
+        if entry.get("uri"):
+            # Re-attach to the session; the first next_chunk asks the server how much it has
+            request.resumable_uri = entry["uri"]
+            request.resumable_progress = entry.get("offset", 0)
+            request._in_error_state = True
+            logging.info(f"Resuming {os.path.basename(job['file'])} at {entry.get('offset', 0) / total:.0%}")
+        elif self.client:
+            self.client.meter.record("videos.insert")
+
+        response = None
+        attempt = 0
+        while response is None:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            try:
+                status, response = request.next_chunk(http=self._http())
+                attempt = 0
+            except Exception as e:
+                code = getattr(getattr(e, "resp", None), "status", None)
+                if code in SESSION_GONE_STATUSES and request.resumable_uri:
+                    # Session expired (they last about a week): start over
+                    logging.warning(f"Upload session of {os.path.basename(job['file'])} expired, restarting")
+                    self.journal.forget(key)
+                    request = self._request(job)
+                    continue
+                attempt += 1
+                if attempt > CHUNK_RETRIES or (code is not None and code < 500 and code != 429):
+                    raise
+                delay = min(64.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                logging.warning(f"Chunk of {os.path.basename(job['file'])} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                request._in_error_state = True
+                continue
+            if response is None:
+                self.journal.update(key, uri=request.resumable_uri, offset=request.resumable_progress,
+                                    total=total, title=job["body"].get("snippet", {}).get("title"))
+                self._progress(job, request.resumable_progress, total)
+
+        video_id = response["id"]
+        self.journal.update(key, uri=None, offset=total, video_id=video_id, status="inserted")
+        self._progress(job, total, total)
+        return video_id
+
+    def _finish(self, job, video_id):
+        key = file_key(job["file"])
+        try:
+            if self.after_insert:
+                self.after_insert(video_id, job)
+            self.journal.update(key, status="done")
+            result = {"video_id": video_id, "error": None}
+        except Exception as e:
+            result = {"video_id": video_id, "error": f"uploaded, but post-processing failed: {e}"}
+        if self.on_result:
+            self.on_result(job, result)
+        return result
+
+    def upload_all(self, jobs, stop_event=None):
+        """Upload jobs with `workers` sessions at once; [{"video_id", "error"}] in job order"""
+        results = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-post") as post, \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload") as pool:
+            post_futures = {}
+
+            def run(index, job):
+                try:
+                    entry = self.journal.get(file_key(job["file"]))
+                    if entry.get("status") == "done":
+                        results[index] = {"video_id": entry["video_id"], "error": None, "skipped": True}
+                        if self.on_result:
+                            self.on_result(job, results[index])
+                        return
+                    video_id = self.upload(job, stop_event)
+                    if video_id is None:
+                        results[index] = {"video_id": None, "error": "stopped"}
+                        return
+                    post_futures[index] = post.submit(self._finish, job, video_id)
+                except Exception as e:
+                    results[index] = {"video_id": None, "error": str(e)}
+                    if self.on_result:
+                        self.on_result(job, results[index])
+
+            for future in [pool.submit(run, i, job) for i, job in enumerate(jobs)]:
+                future.result()
+            for index, future in post_futures.items():
+                results[index] = future.result()
+        return results
@@ -0,0 +1,180 @@
+import os
+import shutil
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Segment-parallel libx264 encoding. A single x264 process stops scaling after
+# a few cores at the fast presets (lookahead and frame threads serialize), so
+# long videos are cut into independent segments that are encoded by several
+# ffmpeg processes at once and joined with the concat demuxer (-c copy, no
+# re-encode):
+#
+#   1. plan_segments() picks cut points near equal-length targets, snapped to
+#      the source's keyframes (encoders place those at scene cuts, and seeking
+#      to one decodes nothing extra).
+#   2. Each segment is decoded from its input seek point and encoded video-only
+#      into MPEG-TS. Filters run on source time: frames are shifted by the
+#      segment start before the subtitle filter and back to zero after it, so
+#      one full-length ASS file serves every segment.
+#   3. The segments are concatenated and muxed with the audio of the source,
+#      encoded once in full (per-segment AAC would add priming gaps).
+
+MIN_SEGMENT_SECONDS = 20.0
+SEGMENTS_PER_WORKER = 2
+KEYFRAME_SNAP_SECONDS = 5.0
+
+
+class SegmentEncodeError(Exception):
+    pass
+
+
+def default_workers():
+    return max(1, os.cpu_count() or 1)
+
+
+def _popen_kwargs():
+    return {'creationflags': subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}
+
+
+def _run(cmd):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True, **_popen_kwargs())
+
+
+def probe_duration(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True, timeout=60, **_popen_kwargs()
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        raise SegmentEncodeError(f"Could not read the duration of {os.path.basename(str(path))}")
+
+
+def probe_keyframes(path):
+    """Keyframe times of the first video stream, from packet flags (no decoding)"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+         "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True, timeout=600, **_popen_kwargs()
+    )
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                keyframes.append(float(pts_time))
+            except ValueError:
+                continue
+    return sorted(keyframes)
+
+
+def plan_segments(path, workers=None, min_segment=MIN_SEGMENT_SECONDS, duration=None, keyframes=None):
+    """[(start, end)] covering the whole video, or a single segment if splitting does not pay off.
+
+    Aims for SEGMENTS_PER_WORKER segments per worker (so a slow segment does
+    not leave cores idle at the end) but never shorter than min_segment. Each
+    cut moves to the nearest keyframe within KEYFRAME_SNAP_SECONDS; without
+    one the cut stays put, which is still exact, the encoder just decodes from
+    the previous keyframe.
+    """
+    workers = workers or default_workers()
+    duration = probe_duration(path) if duration is None else duration
+    count = min(workers * SEGMENTS_PER_WORKER, int(duration // min_segment))
+    if workers < 2 or count < 2:
+        return [(0.0, duration)]
+    if keyframes is None:
+        keyframes = probe_keyframes(path)
+    cuts = []
+    for i in range(1, count):
+        target = duration * i / count
+        nearest = min(keyframes, key=lambda t: abs(t - target), default=None)
+        cut = nearest if nearest is not None and abs(nearest - target) <= KEYFRAME_SNAP_SECONDS else target
+        if cut - (cuts[-1] if cuts else 0.0) >= min_segment / 2 and duration - cut >= min_segment / 2:
+            cuts.append(cut)
+    bounds = [0.0, *cuts, duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def segment_command(input_path, output_path, start, end, codec_args, video_filter=None, threads=None, last=False):
+    cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.6f}"]
+    if not last:
+        cmd += ["-t", f"{end - start:.6f}"]
+    cmd += ["-i", str(input_path), "-map", "0:v:0", "-an", "-sn"]
+    if video_filter:
+        cmd += ["-vf", f"setpts=PTS+{start:.6f}/TB,{video_filter},setpts=PTS-STARTPTS"]
+    cmd += list(codec_args)
+    if threads and "-threads" not in codec_args:
+        cmd += ["-threads", str(threads)]
+    return cmd + ["-f", "mpegts", str(output_path)]
+
+
+def mux_command(list_path, source_path, output_path, audio_inputs=(), audio_filter=None,
+                audio_args=("-c:a", "aac", "-b:a", "192k")):
+    """Concatenated video plus the source's audio.
+
+    Input 0 is the source and audio_inputs follow it, so an audio filter
+    written for the single-pass encode ([0:a] = source, [1:a] = first extra
+    input, output [audio_out]) works unchanged.
+    """
+    video_input = 1 + list(audio_inputs).count("-i")
+    cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-i", str(source_path), *audio_inputs,
+           "-f", "concat", "-safe", "0", "-i", str(list_path)]
+    if audio_filter:
+        cmd += ["-filter_complex", audio_filter, "-map", f"{video_input}:v", "-map", "[audio_out]", "-shortest"]
+    else:
+        cmd += ["-map", f"{video_input}:v", "-map", "0:a?"]
+    return cmd + ["-c:v", "copy", *audio_args, "-movflags", "+faststart", str(output_path)]
+
+
+def encode_segmented(input_path, output_path, codec_args, video_filter=None, segments=None, workers=None,
+                     audio_inputs=(), audio_filter=None, audio_args=("-c:a", "aac", "-b:a", "192k"),
+                     runner=None, stop_check=None):
+    """Encode input_path to output_path with segments running in parallel.
+
+    codec_args are the libx264 arguments of the single-pass encode. runner(cmd)
+    runs one ffmpeg command; it raises CalledProcessError on failure and may
+    return None when the user stopped processing (default: subprocess.run).
+    Returns False if stopped, True on success; raises SegmentEncodeError or
+    CalledProcessError on failure.
+    """
+    runner = runner or _run
+    workers = workers or default_workers()
+    segments = segments or plan_segments(input_path, workers)
+    workers = min(workers, len(segments))
+    threads = max(1, default_workers() // workers)
+    temp_dir = tempfile.mkdtemp(prefix="segments_")
+    try:
+        paths = [os.path.join(temp_dir, f"segment_{i:04d}.ts") for i in range(len(segments))]
+        logging.info(f"🧩 Encoding {len(segments)} segments with {workers} parallel encoder(s), {threads} thread(s) each")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment-encode") as executor:
+            futures = {
+                executor.submit(runner, segment_command(input_path, path, start, end, codec_args, video_filter,
+                                                        threads, last=i == len(segments) - 1)): i
+                for i, (path, (start, end)) in enumerate(zip(paths, segments))
+            }
+            stopped = False
+            for future in as_completed(futures):
+                if future.result() is None:
+                    stopped = True
+                if stop_check and stop_check():
+                    stopped = True
+            if stopped:
+                return False
+        list_path = os.path.join(temp_dir, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                if not os.path.exists(path) or not os.path.getsize(path):
+                    raise SegmentEncodeError(f"Segment {os.path.basename(path)} was not created")
+                f.write("file '{}'\n".format(path.replace("\\", "/").replace("'", "'\\''")))
+        if runner(mux_command(list_path, input_path, output_path, audio_inputs, audio_filter, audio_args)) is None:
+            return False
+        if not os.path.exists(output_path):
+            raise SegmentEncodeError("Concatenated output file was not created")
+        return True
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -8,7 +8,8 @@ from pathlib import Path
 import logging
 from tkinter import ttk, filedialog, messagebox, colorchooser
 import tkinter as tk
-from faster_whisper import WhisperModel
+from whisper_server import load_whisper_model
+from transcription_cache import get_transcription_cache, hash_audio_file
 import time
 import tempfile
 import traceback
@@ -1071,6 +1072,8 @@ class OptimizedVideoProcessor:
         self.progress_queue = progress_queue
         self.video_title_map = video_title_map
         self.whisper_model = None
+        self.whisper_model_name = None
+        self.transcription_cache = get_transcription_cache()
         self.stop_event = stop_event
         self.random_colors_list = ["#FFFFFF", "#FFFF00", "#FF0000", "#00FF00", "#0000FF", 
                                   "#FF00FF", "#00FFFF", "#FFA500", "#000000", "#808080"]
@@ -1088,16 +1091,19 @@ class OptimizedVideoProcessor:
         if self.whisper_model is None:
             logging.info("🧠 Loading Whisper model...", extra={'is_status': True})
             try:
-                self.whisper_model = WhisperModel("large-v3", compute_type="int8")
+                self.whisper_model = load_whisper_model("large-v3", compute_type="int8")
+                self.whisper_model_name = "large-v3"
                 logging.info("✅ Loaded large-v3 Whisper model")
             except Exception as e:
                 logging.warning(f"⚠️ Could not load 'large-v3' model, trying 'small'. Reason: {e}")
                 try:
-                    self.whisper_model = WhisperModel("small", compute_type="int8")
+                    self.whisper_model = load_whisper_model("small", compute_type="int8")
+                    self.whisper_model_name = "small"
                     logging.info("✅ Loaded small Whisper model")
                 except Exception as e2:
                     logging.warning(f"⚠️ Could not load 'small' model, falling back to 'tiny'. Reason: {e2}")
-                    self.whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
+                    self.whisper_model = load_whisper_model("tiny", device="cpu", compute_type="int8")
+                    self.whisper_model_name = "tiny"
                     logging.info("✅ Loaded tiny Whisper model")
         return self.whisper_model
 
@@ -1411,15 +1417,22 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                 logging.warning(f"Audio extraction failed for SRT generation: {os.path.basename(video_path)}")
                 return
             logging.info(f"🧠 Generating SRT for: {os.path.basename(video_path)}", extra={'is_status': True})
-            model = self.get_whisper_model()
-            segments, _ = model.transcribe(temp_audio, language="en", word_timestamps=False)
-            with open(srt_path, "w", encoding="utf-8") as f:
-                for i, seg in enumerate(segments, 1):
+            params = {"language": "en", "word_timestamps": False}
+            cache_key, segments = self.get_cached_transcription(temp_audio, params)
+            if segments is None:
+                model = self.get_whisper_model()
+                raw_segments, _ = model.transcribe(temp_audio, **params)
+                segments = []
+                for seg in raw_segments:
                     text = seg.text.strip()
                     if text:
                         start = max(0, getattr(seg, 'start', 0))
-                        end = getattr(seg, 'end', start + 1)
-                        f.write(f"{i}\n{self.format_srt_time(start)} --> {self.format_srt_time(end)}\n{text}\n\n")
+                        segments.append({"text": text, "start": start, "end": getattr(seg, 'end', start + 1)})
+                if segments:
+                    self.transcription_cache.put(cache_key, segments)
+            with open(srt_path, "w", encoding="utf-8") as f:
+                for i, seg in enumerate(segments, 1):
+                    f.write(f"{i}\n{self.format_srt_time(seg['start'])} --> {self.format_srt_time(seg['end'])}\n{seg['text']}\n\n")
             size_kb = os.path.getsize(srt_path) / 1024 if os.path.exists(srt_path) else 0
             logging.info(f"✅ SRT generated: {os.path.basename(srt_path)} ({size_kb:.1f} KB)")
         except Exception as e:
@@ -1447,6 +1460,24 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
         return True
 
+    def get_cached_transcription(self, audio_path, params):
+        """Return (cache_key, records) for audio_path; records is None on a cache miss.
+
+        Until a model is loaded the key assumes large-v3. On a miss the model is
+        loaded and, if a smaller fallback model was used, the lookup is repeated
+        under that model's name so its own cached results are still found.
+        """
+        audio_hash = hash_audio_file(audio_path)
+        model_name = self.whisper_model_name or "large-v3"
+        cache_key = self.transcription_cache.make_key(audio_path, model_name, params, audio_hash=audio_hash)
+        records = self.transcription_cache.get(cache_key)
+        if records is None and self.whisper_model_name is None:
+            self.get_whisper_model()
+            if self.whisper_model_name != model_name:
+                cache_key = self.transcription_cache.make_key(audio_path, self.whisper_model_name, params, audio_hash=audio_hash)
+                records = self.transcription_cache.get(cache_key)
+        return cache_key, records
+
     def transcribe_audio_optimized(self, audio_path):
         try:
             if self.check_stop():
@@ -1455,11 +1486,14 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                 logging.error(f"Audio file not found: {audio_path}")
                 return []
             logging.info(f"🧠 Transcribing: {os.path.basename(audio_path)}", extra={'is_status': True})
+            params = {"beam_size": 1, "best_of": 1, "word_timestamps": True,
+                      "language": "en", "condition_on_previous_text": False}
+            cache_key, cached_words = self.get_cached_transcription(audio_path, params)
+            if cached_words is not None:
+                logging.info(f"⚡ Loaded {len(cached_words)} words from transcription cache")
+                return cached_words
             model = self.get_whisper_model()
-            segments, _ = model.transcribe(
-                audio_path, beam_size=1, best_of=1, word_timestamps=True,
-                language="en", condition_on_previous_text=False
-            )
+            segments, _ = model.transcribe(audio_path, **params)
             words = []
             for segment in segments:
                 if self.check_stop():
@@ -1473,6 +1507,8 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                                 "end": max(w.start, w.end),
                                 "confidence": getattr(w, 'probability', 0.5)
                             })
+            if words and not self.check_stop():
+                self.transcription_cache.put(cache_key, words)
             logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
             return words
         except Exception as e:
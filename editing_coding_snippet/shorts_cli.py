@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+from shorts_pipeline import OptimizedVideoProcessor, run_job_config, preview_job_config, load_video_title_map
+
+# Headless runner for the shorts pipeline. Takes the job config JSON written
+# by shorts_gui_v16.py's "Save Config" (or a directory of them) and renders
+# it without importing Tk. Progress goes to stdout as JSON lines, one object
+# per event:
+#   {"event": "job_start", "job": ..., "videos": n}
+#   {"event": "progress", "job": ..., "percent": 42.0}
+#   {"event": "status" | "log", "job": ..., "level": "INFO", "message": ...}
+#   {"event": "job_end", "job": ..., "ok": true, "processed": n, "failed": [...], "seconds": s}
+#   {"event": "job_end", "job": ..., "ok": true, "skipped": true, ...}  no videos in this shard
+#   {"event": "summary", "jobs": n, "failed_jobs": n, "stopped": false}
+# --preview emits {"event": "preview", "path": ...} per job and
+# --benchmark-encode {"event": "benchmark", "results": [...]} instead of
+# rendering.
+# Human-readable logs go to stderr. Exit status: 0 all good, 1 some video or
+# job failed, 2 invalid job spec, 130 stopped by SIGINT/SIGTERM.
+#
+#   python shorts_cli.py jobs/ --shard 0/3        # machine 1 of 3
+#   python shorts_cli.py job.json --preview 30:10  # 10 s style check from 0:30
+
+PATH_KEYS = ("output_dir", "extra_video", "background_music")
+PATH_LIST_KEYS = ("input_videos", "external_srt_files")
+
+
+class JobSpecError(Exception):
+    pass
+
+
+class EventWriter:
+    """JSON-lines event sink; also stands in for the processor's progress queue"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+        self.job = None
+
+    def emit(self, event, **fields):
+        record = {"ts": round(time.time(), 3), "event": event, "job": self.job, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def put(self, item):
+        # The processor only ever puts ("PROGRESS", percent) on its queue
+        kind, value = item
+        if kind == "PROGRESS":
+            self.emit("progress", percent=round(float(value), 1))
+        else:
+            self.emit(kind.lower(), message=value)
+
+
+class EventLogHandler(logging.Handler):
+    """Forward log records as "status" (is_status=True) or "log" events"""
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record):
+        try:
+            event = "status" if getattr(record, 'is_status', False) else "log"
+            self.writer.emit(event, level=record.levelname, message=record.getMessage())
+        except Exception:
+            pass
+
+
+def find_job_specs(paths):
+    """Expand files and directories (their *.json, sorted) into spec paths"""
+    specs = []
+    for path in paths:
+        if os.path.isdir(path):
+            specs.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".json")
+            ))
+        else:
+            specs.append(path)
+    return specs
+
+
+def load_job_spec(path, shard=None):
+    """Read a job config, resolve relative paths against its folder and
+    keep only this shard's videos (shard = (index, count))."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise JobSpecError(f"Cannot read job spec {path}: {e}")
+    if not isinstance(config, dict):
+        raise JobSpecError(f"Job spec {path} is not a JSON object")
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def resolve(value):
+        return value if not value or os.path.isabs(value) else os.path.normpath(os.path.join(base_dir, value))
+
+    for key in PATH_KEYS:
+        config[key] = resolve(config.get(key))
+    for key in PATH_LIST_KEYS:
+        config[key] = [resolve(value) for value in config.get(key) or []]
+
+    if shard is not None:
+        index, count = shard
+        keep = range(index, len(config["input_videos"]), count)
+        config["input_videos"] = [config["input_videos"][i] for i in keep]
+        if config.get("use_external_subs"):
+            config["external_srt_files"] = [config["external_srt_files"][i] for i in keep
+                                            if i < len(config["external_srt_files"])]
+
+    if not config.get("output_dir"):
+        raise JobSpecError(f"Job spec {path} has no output_dir")
+    missing = [video for video in config["input_videos"] if not os.path.exists(video)]
+    if missing:
+        raise JobSpecError(f"Job spec {path}: input video(s) not found: {', '.join(missing)}")
+    if config.get("use_external_subs") and len(config["external_srt_files"]) != len(config["input_videos"]):
+        raise JobSpecError(f"Job spec {path}: {len(config['external_srt_files'])} SRT files for {len(config['input_videos'])} videos")
+    return config
+
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must look like INDEX/COUNT, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, COUNT)")
+    return index, count
+
+
+def parse_window(value):
+    try:
+        start, duration = (float(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("window must look like START:DURATION in seconds, e.g. 30:10")
+    if start < 0 or duration <= 0:
+        raise argparse.ArgumentTypeError("window start must be >= 0 and duration > 0")
+    return start, duration
+
+
+def run_preview(processor, writer, config, window):
+    path = preview_job_config(processor, config, 0, *window)
+    writer.emit("preview", ok=path is not None, path=path)
+    return path is not None
+
+
+def run_benchmark(processor, writer, config, window):
+    results = processor.benchmark_encode_profiles(config["input_videos"][0], config.get("quality_preset", "fast"), *window)
+    writer.emit("benchmark", video=config["input_videos"][0], start=window[0], duration=window[1], results=results)
+    return bool(results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render shorts from saved job configs without the GUI")
+    parser.add_argument("specs", nargs="+", help="job config JSON files or directories of them")
+    parser.add_argument("--titles", default="video_titles.json", help="video title map (default: video_titles.json)")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="INDEX/COUNT: only render every COUNT-th video starting at INDEX (split a batch across machines)")
+    parser.add_argument("--parallel-videos", type=int, default=None, help="override parallel_videos of every job")
+    parser.add_argument("--x264-profile", choices=list(OptimizedVideoProcessor.X264_PROFILES), default=None,
+                        help="override x264_profile of every job")
+    parser.add_argument("--dry-run", action="store_true", help="validate the job specs and exit")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--preview", type=parse_window, metavar="START:DURATION", default=None,
+                      help="only render a low-res subtitle preview of each job's first video")
+    mode.add_argument("--benchmark-encode", type=parse_window, metavar="START:DURATION", default=None,
+                      help="encode a window of each job's first video with every x264 profile and report time, size and SSIM")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    writer = EventWriter()
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    logger.handlers.clear()
+    logger.addHandler(EventLogHandler(writer))
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(console_handler)
+
+    try:
+        jobs = [(spec, load_job_spec(spec, args.shard)) for spec in find_job_specs(args.specs)]
+    except JobSpecError as e:
+        writer.emit("error", message=str(e))
+        return 2
+    if args.dry_run:
+        for spec, config in jobs:
+            writer.job = spec
+            writer.emit("job_plan", videos=config["input_videos"], output_dir=config["output_dir"])
+        return 0
+
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logging.warning("🛑 Stop requested. Finishing videos in progress...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    processor = OptimizedVideoProcessor(writer, load_video_title_map(args.titles), stop_event)
+    failed_jobs = 0
+    for spec, config in jobs:
+        if stop_event.is_set():
+            break
+        if args.parallel_videos:
+            config["parallel_videos"] = args.parallel_videos
+        if args.x264_profile:
+            config["x264_profile"] = args.x264_profile
+        writer.job = spec
+        processor.reset_counters()
+        if not config["input_videos"]:
+            # --shard can leave a spec with nothing for this machine
+            writer.emit("job_end", ok=True, skipped=True, processed=0, failed=[], error=None, seconds=0)
+            continue
+        writer.emit("job_start", videos=len(config["input_videos"]), output_dir=config["output_dir"])
+        started = time.time()
+        error = None
+        try:
+            os.makedirs(config["output_dir"], exist_ok=True)
+            if args.preview:
+                ok = run_preview(processor, writer, config, args.preview)
+            elif args.benchmark_encode:
+                ok = run_benchmark(processor, writer, config, args.benchmark_encode)
+            else:
+                run_job_config(processor, config)
+                ok = True
+        except Exception as e:
+            error = str(e)
+            ok = False
+        ok = ok and not processor.failed_videos and not stop_event.is_set()
+        failed_jobs += not ok
+        writer.emit("job_end", ok=ok, processed=processor.processed_videos, failed=list(processor.failed_videos),
+                    error=error, seconds=round(time.time() - started, 1))
+    writer.job = None
+    writer.emit("summary", jobs=len(jobs), failed_jobs=failed_jobs, stopped=stop_event.is_set())
+    if stop_event.is_set():
+        return 130
+    return 1 if failed_jobs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,15 @@
 import os
+import sys
 import subprocess
 import json
 import threading
 import queue
-import shutil
-from pathlib import Path
 import logging
 from tkinter import ttk, filedialog, messagebox, colorchooser
 import tkinter as tk
-from faster_whisper import WhisperModel
-import time
-import tempfile
+from loudness import DEFAULT_TARGET_LUFS
+from shorts_pipeline import OptimizedVideoProcessor, run_job_config, preview_job_config, load_video_title_map
 import traceback
-import random
 # --- Custom Logging Handler ---
 class TkinterLogHandler(logging.Handler):
     """Custom logging handler to redirect logs to a Tkinter widget via a queue."""
@@ -81,18 +78,7 @@ class VideoProcessorGUI:
         logger.addHandler(console_handler)
         logging.info("Logging initialized for Video Processor Pro.")
     def load_video_titles(self):
-        try:
-            with open("video_titles.json", "r", encoding="utf-8") as f:
-                self.video_title_map = json.load(f)
-        except FileNotFoundError:
-            logging.info("Video titles file not found, using empty mapping")
-            self.video_title_map = []
-        except json.JSONDecodeError as e:
-            logging.warning(f"Invalid JSON in video_titles.json: {e}")
-            self.video_title_map = []
-        except Exception as e:
-            logging.warning(f"Could not load video titles: {e}")
-            self.video_title_map = []
+        self.video_title_map = load_video_title_map("video_titles.json")
     def setup_ui(self):
         title_frame = tk.Frame(self.root, bg='#2c3e50', height=60)
         title_frame.pack(fill='x', padx=10, pady=10)
@@ -235,6 +221,17 @@ class VideoProcessorGUI:
                                     values=["ultrafast", "fast", "medium", "slow"],
                                     state="readonly", width=12)
         quality_combo.pack(pady=2)
+        x264_frame = tk.Frame(options_row1, bg='#f0f0f0')
+        x264_frame.pack(side='left', padx=(0, 30))
+        tk.Label(x264_frame, text="x264 Tuning:", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(anchor='w')
+        self.x264_profile_var = tk.StringVar(value="standard")
+        x264_combo = ttk.Combobox(x264_frame, textvariable=self.x264_profile_var,
+                                  values=list(OptimizedVideoProcessor.X264_PROFILES),
+                                  state="readonly", width=12)
+        x264_combo.pack(pady=2)
+        self.create_tooltip(x264_combo, "screen: screen recordings (-tune animation)\n"
+                                        "slides: mostly still frames (-tune stillimage)\n"
+                                        "Ignored when NVENC is used")
         volume_frame = tk.Frame(options_row1, bg='#f0f0f0')
         volume_frame.pack(side='left')
         tk.Label(volume_frame, text="Music Volume:", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(anchor='w')
@@ -247,6 +244,12 @@ class VideoProcessorGUI:
         self.volume_label = tk.Label(volume_control_frame, text="0.30", font=("Arial", 9), bg='#f0f0f0')
         self.volume_label.pack(side='left', padx=(5, 0))
         volume_scale.configure(command=lambda val: self.volume_label.config(text=f"{float(val):.2f}"))
+        parallel_frame = tk.Frame(options_row1, bg='#f0f0f0')
+        parallel_frame.pack(side='left', padx=(30, 0))
+        tk.Label(parallel_frame, text="Parallel Videos:", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(anchor='w')
+        self.parallel_videos_var = tk.IntVar(value=2)
+        tk.Spinbox(parallel_frame, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.parallel_videos_var,
+                   width=5, state='readonly').pack(pady=2, anchor='w')
         options_row2 = tk.Frame(options_frame, bg='#f0f0f0')
         options_row2.pack(fill='x', padx=10, pady=8)
         self.auto_edit_var = tk.BooleanVar(value=False)
@@ -262,6 +265,18 @@ class VideoProcessorGUI:
         self.speech_borders_var = tk.BooleanVar(value=True)
         tk.Checkbutton(options_row2, text="🗣️ Add Border Boxes to Spoken Words",
                       variable=self.speech_borders_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
+        self.fused_render_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_row2, text="⚡ Fused Render (Music + Subtitles in a Single Encode Pass)",
+                      variable=self.fused_render_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
+        self.render_cache_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_row2, text="♻️ Render Cache (Only Re-run Stages Whose Inputs Changed)",
+                      variable=self.render_cache_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
+        self.loudness_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_row2, text=f"🔊 Normalize Loudness ({DEFAULT_TARGET_LUFS:g} LUFS, EBU R128)",
+                      variable=self.loudness_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
+        self.segment_encoding_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_row2, text="🧩 Segment-Parallel Encoding (Long Videos Use All Cores, libx264)",
+                      variable=self.segment_encoding_var, bg='#f0f0f0', font=("Arial", 10, "bold")).pack(anchor='w', pady=2)
         subtitle_frame = tk.LabelFrame(self.scrollable_main_frame, text="📝 Advanced Subtitle Customization",
                                       font=("Arial", 12, "bold"), bg='#f0f0f0', padx=15, pady=15)
         subtitle_frame.pack(fill='x', pady=10, padx=10)
@@ -449,6 +464,23 @@ class VideoProcessorGUI:
                                  font=("Arial", 14, "bold"), pady=12, padx=30, state='disabled',
                                  relief='flat', cursor='hand2')
         self.stop_btn.pack(side='left')
+        preview_frame = tk.Frame(self.scrollable_main_frame, bg='#f0f0f0')
+        preview_frame.pack(pady=(0, 15))
+        tk.Label(preview_frame, text="Preview from (s):", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(side='left')
+        self.preview_start_var = tk.DoubleVar(value=0.0)
+        tk.Spinbox(preview_frame, from_=0, to=36000, increment=5, textvariable=self.preview_start_var,
+                   width=7).pack(side='left', padx=(5, 15))
+        tk.Label(preview_frame, text="Length (s):", font=("Arial", 10, "bold"), bg='#f0f0f0').pack(side='left')
+        self.preview_duration_var = tk.DoubleVar(value=10.0)
+        tk.Spinbox(preview_frame, from_=1, to=120, increment=5, textvariable=self.preview_duration_var,
+                   width=5).pack(side='left', padx=(5, 15))
+        self.preview_btn = tk.Button(preview_frame, text="👁️ QUICK PREVIEW",
+                                     command=self.start_preview, bg='#8e44ad', fg='white',
+                                     font=("Arial", 10, "bold"), padx=15, pady=5, relief='flat',
+                                     cursor='hand2')
+        self.preview_btn.pack(side='left')
+        self.create_tooltip(self.preview_btn, "Renders the selected (or first) video's window at 480p/15 fps\n"
+                                              "with the current subtitle style, in seconds")
         progress_frame = tk.LabelFrame(self.scrollable_main_frame, text="📊 Processing Progress & Logs",
                                       font=("Arial", 12, "bold"), bg='#f0f0f0', padx=15, pady=15)
         progress_frame.pack(fill='both', expand=True, pady=10, padx=10)
@@ -819,45 +851,55 @@ class VideoProcessorGUI:
         self.clear_logs()
         thread = threading.Thread(target=self.process_videos_thread, daemon=True)
         thread.start()
+    def start_preview(self):
+        if not self.input_videos:
+            messagebox.showwarning("No Videos", "Please select videos first.")
+            return
+        try:
+            start = max(0.0, float(self.preview_start_var.get()))
+            duration = max(1.0, float(self.preview_duration_var.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Preview start and length must be numbers")
+            return
+        selected = self.input_listbox.curselection()
+        video_index = selected[0] if selected else 0
+        self.preview_btn.config(state='disabled', text="⏳ RENDERING...")
+        thread = threading.Thread(target=self._preview_thread, args=(video_index, start, duration), daemon=True)
+        thread.start()
+    def _preview_thread(self, video_index, start, duration):
+        try:
+            processor = OptimizedVideoProcessor(self.progress_queue, self.video_title_map, threading.Event())
+            preview_path = preview_job_config(processor, self.collect_config(), video_index, start, duration)
+            if preview_path:
+                self.progress_queue.put(("LOG", f"👁️ Preview saved: {preview_path}"))
+                self.open_file(preview_path)
+            else:
+                self.progress_queue.put(("LOG", "⚠️ Preview could not be rendered, see log"))
+        except Exception as e:
+            self.progress_queue.put(("LOG", f"❌ Preview failed: {e}"))
+        finally:
+            self.root.after(0, lambda: self.preview_btn.config(state='normal', text="👁️ QUICK PREVIEW"))
+    def open_file(self, path):
+        try:
+            if os.name == 'nt':
+                os.startfile(path)
+            else:
+                subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", path])
+        except Exception as e:
+            logging.warning(f"Could not open {os.path.basename(path)}: {e}")
     def stop_processing(self):
         if not self.processing:
             return
         if messagebox.askquestion("Stop Processing",
-                                 "Are you sure you want to stop processing?\nCurrent video will be completed, but remaining videos will be skipped.",
+                                 "Are you sure you want to stop processing?\nVideos in progress will be completed, but remaining videos will be skipped.",
                                  icon='warning') == 'yes':
             self.stop_event.set()
-            logging.warning("🛑 Stop requested by user. Finishing current video...")
+            logging.warning("🛑 Stop requested by user. Finishing videos in progress...")
             self.stop_btn.config(state='disabled', text="⏳ STOPPING...")
     def process_videos_thread(self):
         try:
             processor = OptimizedVideoProcessor(self.progress_queue, self.video_title_map, self.stop_event)
-            subtitle_settings = {
-                'color': self.subtitle_color,
-                'mode': self.subtitle_mode_var.get(),
-                'size': self.subtitle_size_var.get(),
-                'words_count': self.words_count_var.get(),
-                'enable_borders': self.speech_borders_var.get(),
-                'border_color': self.border_color,
-                'border_thickness': self.border_thickness_var.get(),
-                'font_family': self.font_family_var.get(),
-                'bold': self.bold_var.get(),
-                'italic': self.italic_var.get(),
-                'position': self.position_var.get(),
-                'enable_animation': self.enable_animation_var.get(),
-                'animation_type': self.animation_type_var.get(),
-                'prefix': self.prefix_var.get(),
-                'suffix': self.suffix_var.get(),
-                'case_style': self.case_var.get(),
-                'random_colors': self.random_colors_var.get(),
-                'enable_bg_box': self.enable_bg_box_var.get(),
-                'bg_opacity': self.bg_opacity_var.get()
-            }
-            processor.process_all_videos(
-                self.input_videos, self.extra_video if self.enable_merge_var.get() else None,
-                self.output_dir, self.background_music, self.quality_var.get(), self.gpu_var.get(),
-                self.volume_var.get(), self.ducking_var.get(), self.auto_edit_var.get(),
-                subtitle_settings, self.use_external_subs_var.get(), self.external_srt_files
-            )
+            run_job_config(processor, self.collect_config())
             if self.stop_event.is_set():
                 self.progress_queue.put(("STOPPED", "🛑 Processing stopped by user"))
             else:
@@ -924,10 +966,16 @@ class VideoProcessorGUI:
            
             self.quality_var.set(config.get('quality_preset', 'fast'))
             self.volume_var.set(config.get('music_volume', 0.30))
+            self.parallel_videos_var.set(config.get('parallel_videos', 2))
             self.auto_edit_var.set(config.get('enable_auto_edit', False))
             self.gpu_var.set(config.get('enable_gpu', True))
             self.ducking_var.set(config.get('enable_ducking', True))
             self.speech_borders_var.set(config.get('enable_speech_borders', True))
+            self.fused_render_var.set(config.get('fused_render', True))
+            self.render_cache_var.set(config.get('render_cache', True))
+            self.loudness_var.set(config.get('normalize_loudness', False))
+            self.segment_encoding_var.set(config.get('segment_encoding', True))
+            self.x264_profile_var.set(config.get('x264_profile', 'standard'))
             self.subtitle_mode_var.set(config.get('subtitle_mode', 'single'))
             self.words_count_var.set(config.get('words_count', 3))
             self.border_thickness_var.set(config.get('border_thickness', 3))
@@ -962,18 +1010,25 @@ class VideoProcessorGUI:
             messagebox.showinfo("Success", "Config loaded successfully! You can now start processing.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load config: {str(e)}")
-    def save_config(self):
-        config = {
+    def collect_config(self):
+        """The current job as the config dict used by Save Config and shorts_cli.py"""
+        return {
             "input_videos": self.input_videos,
             "extra_video": self.extra_video,
             "background_music": self.background_music,
             "output_dir": self.output_dir,
             "quality_preset": self.quality_var.get(),
             "music_volume": self.volume_var.get(),
+            "parallel_videos": self.parallel_videos_var.get(),
             "enable_auto_edit": self.auto_edit_var.get(),
             "enable_gpu": self.gpu_var.get(),
             "enable_ducking": self.ducking_var.get(),
             "enable_speech_borders": self.speech_borders_var.get(),
+            "fused_render": self.fused_render_var.get(),
+            "render_cache": self.render_cache_var.get(),
+            "normalize_loudness": self.loudness_var.get(),
+            "segment_encoding": self.segment_encoding_var.get(),
+            "x264_profile": self.x264_profile_var.get(),
             "subtitle_mode": self.subtitle_mode_var.get(),
             "words_count": self.words_count_var.get(),
             "border_thickness": self.border_thickness_var.get(),
@@ -996,6 +1051,8 @@ class VideoProcessorGUI:
             "use_external_subs": self.use_external_subs_var.get(),
             "external_srt_files": self.external_srt_files
         }
+    def save_config(self):
+        config = self.collect_config()
         file = filedialog.asksaveasfilename(
             defaultextension=".json",
             filetypes=[("JSON Files", "*.json")],
@@ -1005,777 +1062,6 @@ class VideoProcessorGUI:
             with open(file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4)
             messagebox.showinfo("Success", f"Config saved to: {file}")
-# --- Video Processing Class ---
-class OptimizedVideoProcessor:
-    def __init__(self, progress_queue, video_title_map, stop_event):
-        self.progress_queue = progress_queue
-        self.video_title_map = video_title_map
-        self.whisper_model = None
-        self.stop_event = stop_event
-        self.random_colors_list = ["#FFFFFF", "#FFFF00", "#FF0000", "#00FF00", "#0000FF",
-                                  "#FF00FF", "#00FFFF", "#FFA500", "#000000", "#808080"]
-    def update_progress(self, percentage):
-        try:
-            self.progress_queue.put(("PROGRESS", max(0, min(100, percentage))))
-        except Exception:
-            pass
-    def check_stop(self):
-        return self.stop_event.is_set()
-    def get_video_title(self, videoname):
-        base = os.path.splitext(os.path.basename(videoname))[0]
-        m = self.video_title_map
-        if isinstance(m, dict):
-            return m.get(base, base)
-        elif isinstance(m, list):
-            for item in m:
-                if isinstance(item, dict) and os.path.splitext(item.get("filename", ""))[0] == base:
-                    return item.get("title", base)
-        return base
-
-    def get_whisper_model(self):
-        if self.whisper_model is None:
-            logging.info("🧠 Loading Whisper model...", extra={'is_status': True})
-            try:
-                self.whisper_model = WhisperModel("large-v3", compute_type="int8")
-                logging.info("✅ Loaded large-v3 Whisper model")
-            except Exception as e:
-                logging.warning(f"⚠️ Could not load 'large-v3' model, trying 'small'. Reason: {e}")
-                try:
-                    self.whisper_model = WhisperModel("small", compute_type="int8")
-                    logging.info("✅ Loaded small Whisper model")
-                except Exception as e2:
-                    logging.warning(f"⚠️ Could not load 'small' model, falling back to 'tiny'. Reason: {e2}")
-                    self.whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
-                    logging.info("✅ Loaded tiny Whisper model")
-        return self.whisper_model
-    def hex_to_ass_color(self, hex_color):
-        try:
-            hex_color = hex_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            return f"&H00{b:02X}{g:02X}{r:02X}"
-        except Exception:
-            return "&H00FFFFFF"
-    def hex_to_ass_color_with_alpha(self, hex_color, opacity):
-        try:
-            hex_color = hex_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            alpha = int(255 * (1 - opacity))
-            return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
-        except Exception:
-            return "&H80000000"
-    def format_ass_time(self, seconds):
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        cs = int((seconds * 100) % 100)
-        return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
-    def format_srt_time(self, seconds):
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        ms = int((seconds % 1) * 1000)
-        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
-    def srt_time_to_seconds(self, time_str):
-        try:
-            parts = time_str.replace(',', '.').split(':')
-            if len(parts) == 3:
-                h, m, s = parts
-                return int(h) * 3600 + int(m) * 60 + float(s)
-            return 0.0
-        except Exception:
-            return 0.0
-    def get_animation_tag(self, animation_type, start, end):
-        duration = end - start
-        if animation_type == "Fade In/Out":
-            fade_in = int(duration * 1000 * 0.2)
-            fade_out = int(duration * 1000 * 0.2)
-            return f"fad({fade_in},{fade_out})"
-        elif animation_type == "Pop Up":
-            return "t(0,200,fscx150 fscy150)t(200,300,fscx100 fscy100)"
-        elif animation_type == "Slide In":
-            return "move(-200,0,0,0)"
-        elif animation_type == "Bounce":
-            return "t(0,100,fscy120)t(100,200,fscy100)t(200,300,fscy110)t(300,400,fscy100)"
-        return ""
-    def generate_ass_subtitles_enhanced(self, content, ass_path, settings):
-        if self.check_stop():
-            return
-        try:
-            mode = settings['mode']
-            subtitle_color = settings['color']
-            subtitle_size = settings['size']
-            words_count = settings['words_count']
-            random_colors = settings.get('random_colors', False)
-            prefix = settings.get('prefix', '')
-            suffix = settings.get('suffix', '')
-            case_style = settings.get('case_style', 'Uppercase')
-            enable_bg_box = settings.get('enable_bg_box', False)
-            bg_opacity = settings.get('bg_opacity', 0.5)
-            font_name = settings['font_family']
-            bold = "-1" if settings['bold'] else "0"
-            italic = "1" if settings['italic'] else "0"
-            underline = "0"
-            strikeout = "0"
-            secondary = "&H000000FF"
-            back = self.hex_to_ass_color_with_alpha("#000000", bg_opacity) if enable_bg_box else "&H00000000"
-            scale_x = "100"
-            scale_y = "100"
-            spacing = "0"
-            angle = "0"
-            border_style = "3" if enable_bg_box else "1"
-            shadow = "0"
-            alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
-            alignment = alignment_map[settings['position']]
-            margin_l = "10"
-            margin_r = "10"
-            margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
-            encoding = "1"
-            if settings['enable_borders']:
-                outline_color = self.hex_to_ass_color(settings['border_color'])
-                outline = str(settings['border_thickness'])
-                size_border = str(subtitle_size + 2)
-                outline_border = str(int(outline) + 1) if outline != "0" else "1"
-            else:
-                outline_color = "&H00000000"
-                outline = "0"
-                size_border = str(subtitle_size)
-                outline_border = "0"
-            format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
-            primary_default = self.hex_to_ass_color(subtitle_color)
-            style_line = f"Style: Default,{font_name},{subtitle_size},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-            style_border = f"Style: SpeechBorder,{font_name},{size_border},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-            if mode == "single":
-                sub_items = [{'start': w.get('start', 0), 'end': w.get('end', 0), 'text': w.get('word', '').strip()} for w in content if w.get('word', '').strip()]
-            else:
-                sub_items = self.generate_grouped_subtitles(content, words_count)
-            with open(ass_path, "w", encoding="utf-8") as f:
-                f.write(f"""[Script Info]
-Title: Enhanced Subtitles with Speech Recognition
-ScriptType: v4.00+
-[V4+ Styles]
-{format_str}
-{style_line}""")
-                if settings['enable_borders']:
-                    f.write(f"\n{style_border}")
-                f.write(f"""
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-""")
-                style_name = "SpeechBorder" if settings['enable_borders'] else "Default"
-                enable_animation = settings.get('enable_animation', False)
-                animation_type = settings.get('animation_type', 'Fade In/Out')
-                for item in sub_items:
-                    if self.check_stop():
-                        break
-                    start, end = item.get('start', 0), item.get('end', 0)
-                    text = item.get('text', '').strip()
-                    if case_style == "Lowercase":
-                        text = text.lower()
-                    elif case_style == "Title Case":
-                        text = text.title()
-                    else:
-                        text = text.upper()
-                    text = f"{prefix}{text}{suffix}"
-                    if not text or end <= start:
-                        continue
-                    primary_color = self.hex_to_ass_color(random.choice(self.random_colors_list)) if random_colors else primary_default
-                    animation_tag = self.get_animation_tag(animation_type, start, end) if enable_animation else ""
-                    tags = f"\\c{primary_color}"
-                    if animation_tag:
-                        tags += f"\\{animation_tag}"
-                    full_text = f"{{{tags}}}{text}"
-                    f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{full_text}\n")
-            mode_text = {"single": "single word", "multiple": f"{words_count} words per subtitle"}[mode]
-            border_text = " with speech border boxes" if settings['enable_borders'] else ""
-            animation_text = f" with {animation_type} animation" if enable_animation else ""
-            branding_text = f" with prefix '{prefix}' and suffix '{suffix}'" if prefix or suffix else ""
-            case_text = f" in {case_style.lower()} case"
-            color_text = " with random colors" if random_colors else ""
-            bg_box_text = f" with background box (opacity {bg_opacity:.2f})" if enable_bg_box else ""
-            logging.info(f"✅ Generated enhanced ASS subtitles with {mode_text}{border_text}{animation_text}{branding_text}{case_text}{color_text}{bg_box_text}")
-        except Exception as e:
-            logging.error(f"❌ Enhanced ASS subtitle generation failed: {e}", exc_info=True)
-            raise
-    def generate_ass_from_srt(self, srt_path, ass_path, settings):
-        if self.check_stop():
-            return
-        try:
-            segments = self.parse_srt(srt_path)
-            if not segments:
-                logging.warning("No valid segments found in SRT file.")
-                return
-            # Reuse the same style computations as generate_ass_subtitles_enhanced
-            subtitle_color = settings['color']
-            subtitle_size = settings['size']
-            words_count = settings['words_count']
-            random_colors = settings.get('random_colors', False)
-            prefix = settings.get('prefix', '')
-            suffix = settings.get('suffix', '')
-            case_style = settings.get('case_style', 'Uppercase')
-            enable_bg_box = settings.get('enable_bg_box', False)
-            bg_opacity = settings.get('bg_opacity', 0.5)
-            font_name = settings['font_family']
-            bold = "-1" if settings['bold'] else "0"
-            italic = "1" if settings['italic'] else "0"
-            underline = "0"
-            strikeout = "0"
-            secondary = "&H000000FF"
-            back = self.hex_to_ass_color_with_alpha("#000000", bg_opacity) if enable_bg_box else "&H00000000"
-            scale_x = "100"
-            scale_y = "100"
-            spacing = "0"
-            angle = "0"
-            border_style = "3" if enable_bg_box else "1"
-            shadow = "0"
-            alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
-            alignment = alignment_map[settings['position']]
-            margin_l = "10"
-            margin_r = "10"
-            margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
-            encoding = "1"
-            if settings['enable_borders']:
-                outline_color = self.hex_to_ass_color(settings['border_color'])
-                outline = str(settings['border_thickness'])
-                size_border = str(subtitle_size + 2)
-                outline_border = str(int(outline) + 1) if outline != "0" else "1"
-            else:
-                outline_color = "&H00000000"
-                outline = "0"
-                size_border = str(subtitle_size)
-                outline_border = "0"
-            format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
-            primary_default = self.hex_to_ass_color(subtitle_color)
-            style_line = f"Style: Default,{font_name},{subtitle_size},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-            style_border = f"Style: SpeechBorder,{font_name},{size_border},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
-            if settings['mode'] == "single":
-                sub_items = []
-                for seg in segments:
-                    words = [w.strip() for w in seg['text'].split() if w.strip()]
-                    if words:
-                        dur = seg['end'] - seg['start']
-                        for i, w_text in enumerate(words):
-                            w_start = seg['start'] + (i / len(words)) * dur
-                            w_end = seg['start'] + ((i + 1) / len(words)) * dur
-                            sub_items.append({'start': w_start, 'end': w_end, 'text': w_text})
-            else:
-                sub_items = []
-                for seg in segments:
-                    words = [w.strip() for w in seg['text'].split() if w.strip()]
-                    if words:
-                        dur = seg['end'] - seg['start']
-                        for i in range(0, len(words), words_count):
-                            group_words = words[i:i + words_count]
-                            if group_words:
-                                group_text = ' '.join(group_words)
-                                g_start = seg['start'] + (i / len(words)) * dur
-                                g_end = seg['start'] + ((i + len(group_words)) / len(words)) * dur
-                                sub_items.append({'start': g_start, 'end': g_end, 'text': group_text})
-            with open(ass_path, "w", encoding="utf-8") as f:
-                f.write(f"""[Script Info]
-Title: Enhanced Subtitles from SRT
-ScriptType: v4.00+
-[V4+ Styles]
-{format_str}
-{style_line}""")
-                if settings['enable_borders']:
-                    f.write(f"\n{style_border}")
-                f.write(f"""
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-""")
-                style_name = "SpeechBorder" if settings['enable_borders'] else "Default"
-                enable_animation = settings.get('enable_animation', False)
-                animation_type = settings.get('animation_type', 'Fade In/Out')
-                for item in sub_items:
-                    if self.check_stop():
-                        break
-                    start, end = item.get('start', 0), item.get('end', 0)
-                    text = item.get('text', '').strip()
-                    if case_style == "Lowercase":
-                        text = text.lower()
-                    elif case_style == "Title Case":
-                        text = text.title()
-                    else:
-                        text = text.upper()
-                    text = f"{prefix}{text}{suffix}"
-                    if not text or end <= start:
-                        continue
-                    primary_color = self.hex_to_ass_color(random.choice(self.random_colors_list)) if random_colors else primary_default
-                    animation_tag = self.get_animation_tag(animation_type, start, end) if enable_animation else ""
-                    tags = f"\\c{primary_color}"
-                    if animation_tag:
-                        tags += f"\\{animation_tag}"
-                    full_text = f"{{{tags}}}{text}"
-                    f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{full_text}\n")
-            mode_text = {"single": "single word", "multiple": f"{words_count} words per subtitle"}[settings['mode']]
-            border_text = " with speech border boxes" if settings['enable_borders'] else ""
-            animation_text = f" with {animation_type} animation" if enable_animation else ""
-            branding_text = f" with prefix '{prefix}' and suffix '{suffix}'" if prefix or suffix else ""
-            case_text = f" in {case_style.lower()} case"
-            color_text = " with random colors" if random_colors else ""
-            bg_box_text = f" with background box (opacity {bg_opacity:.2f})" if enable_bg_box else ""
-            logging.info(f"✅ Generated ASS from SRT with {mode_text}{border_text}{animation_text}{branding_text}{case_text}{color_text}{bg_box_text}")
-        except Exception as e:
-            logging.error(f"❌ ASS generation from SRT failed: {e}", exc_info=True)
-            raise
-    def parse_srt(self, srt_path):
-        segments = []
-        try:
-            with open(srt_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip().split('\n\n')
-            for block in content:
-                lines = [line.strip() for line in block.split('\n') if line.strip()]
-                if len(lines) >= 3 and lines[0].isdigit():
-                    time_line = lines[1]
-                    text = ' '.join(lines[2:])
-                    if ' --> ' in time_line:
-                        start_str, end_str = [t.strip() for t in time_line.split(' --> ')]
-                        start = self.srt_time_to_seconds(start_str)
-                        end = self.srt_time_to_seconds(end_str)
-                        segments.append({'start': start, 'end': end, 'text': text})
-        except Exception as e:
-            logging.error(f"Failed to parse SRT {srt_path}: {e}")
-        return segments
-    def generate_srt_from_video(self, video_path, srt_path):
-        temp_audio = os.path.join(tempfile.gettempdir(), f"temp_srt_audio_{random.randint(1000, 9999)}.mp3")
-        try:
-            if self.check_stop():
-                return
-            if not self.extract_audio(video_path, temp_audio):
-                logging.warning(f"Audio extraction failed for SRT generation: {os.path.basename(video_path)}")
-                return
-            logging.info(f"🧠 Generating SRT for: {os.path.basename(video_path)}", extra={'is_status': True})
-            model = self.get_whisper_model()
-            segments, _ = model.transcribe(temp_audio, language="en", word_timestamps=False)
-            with open(srt_path, "w", encoding="utf-8") as f:
-                for i, seg in enumerate(segments, 1):
-                    text = seg.text.strip()
-                    if text:
-                        start = max(0, getattr(seg, 'start', 0))
-                        end = getattr(seg, 'end', start + 1)
-                        f.write(f"{i}\n{self.format_srt_time(start)} --> {self.format_srt_time(end)}\n{text}\n\n")
-            size_kb = os.path.getsize(srt_path) / 1024 if os.path.exists(srt_path) else 0
-            logging.info(f"✅ SRT generated: {os.path.basename(srt_path)} ({size_kb:.1f} KB)")
-        except Exception as e:
-            logging.error(f"❌ SRT generation failed for {os.path.basename(video_path)}: {e}")
-        finally:
-            if os.path.exists(temp_audio):
-                try:
-                    os.remove(temp_audio)
-                except Exception:
-                    pass
-    def check_ffmpeg_availability(self):
-        missing_tools = []
-        try:
-            subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ FFmpeg is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            missing_tools.append("FFmpeg")
-        try:
-            subprocess.run(["auto-editor", "--version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ auto-editor is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            missing_tools.append("auto-editor")
-        if missing_tools:
-            raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
-        return True
-    def transcribe_audio_optimized(self, audio_path):
-        try:
-            if self.check_stop():
-                return []
-            if not os.path.exists(audio_path):
-                logging.error(f"Audio file not found: {audio_path}")
-                return []
-            logging.info(f"🧠 Transcribing: {os.path.basename(audio_path)}", extra={'is_status': True})
-            model = self.get_whisper_model()
-            segments, _ = model.transcribe(
-                audio_path, beam_size=1, best_of=1, word_timestamps=True,
-                language="en", condition_on_previous_text=False
-            )
-            words = []
-            for segment in segments:
-                if self.check_stop():
-                    break
-                if hasattr(segment, 'words') and segment.words:
-                    for w in segment.words:
-                        if w.word and w.word.strip():
-                            words.append({
-                                "word": w.word.strip(),
-                                "start": max(0, w.start),
-                                "end": max(w.start, w.end),
-                                "confidence": getattr(w, 'probability', 0.5)
-                            })
-            logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
-            return words
-        except Exception as e:
-            logging.error(f"❌ Transcription failed: {e}", exc_info=True)
-            return []
-    def generate_grouped_subtitles(self, words, words_per_group):
-        if not words:
-            return []
-        grouped_subtitles = []
-        for i in range(0, len(words), words_per_group):
-            group = words[i:i + words_per_group]
-            if group:
-                try:
-                    text = " ".join([w["word"] for w in group if w.get("word")])
-                    start_time = group[0]["start"]
-                    end_time = group[-1]["end"]
-                    avg_confidence = sum(w.get("confidence", 0.5) for w in group) / len(group)
-                    if end_time > start_time and text.strip():
-                        grouped_subtitles.append({
-                            "text": text.strip(),
-                            "start": start_time,
-                            "end": end_time,
-                            "confidence": avg_confidence
-                        })
-                except Exception as e:
-                    logging.warning(f"⚠️ Error grouping subtitle segment: {e}")
-                    continue
-        return grouped_subtitles
-    def _copy_file_safely(self, src, dst):
-        try:
-            if not os.path.exists(src):
-                raise FileNotFoundError(f"Source file not found: {src}")
-            dst_dir = os.path.dirname(dst)
-            os.makedirs(dst_dir, exist_ok=True)
-            shutil.copy2(src, dst)
-            logging.info(f"📋 Copied original video to output: {os.path.basename(dst)}")
-        except Exception as copy_error:
-            logging.error(f"❌ Failed to copy video: {copy_error}")
-            raise
-    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=1):
-        try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
-            start_time = time.time()
-            while process.poll() is None:
-                if self.check_stop():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                if timeout and (time.time() - start_time) > timeout:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    raise subprocess.TimeoutExpired(cmd, timeout)
-                time.sleep(check_stop_interval)
-            stdout, stderr = process.communicate()
-            if process.returncode != 0:
-                raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
-            return process
-        except Exception as e:
-            if self.check_stop():
-                return None
-            raise
-    def add_background_music_with_ducking(self, video_path, music_path, output_path, volume=0.15, enable_ducking=True):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"🎵 Adding background music: {os.path.basename(music_path)}", extra={'is_status': True})
-            for file_path, file_type in [(video_path, "Video"), (music_path, "Music")]:
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
-            if not enable_ducking:
-                logging.info("🎵 Adding music without ducking...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
-            else:
-                logging.info("🎵 Adding music with smart ducking based on speech recognition...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a]asplit[original][sidechain];[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];[original][ducked_music]amix=inputs=2:duration=first[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Background music added successfully with speech-aware ducking (Size: {size_mb:.1f}MB)")
-                return True
-            else:
-                raise Exception("Output file was not created")
-        except Exception as e:
-            logging.error(f"❌ Failed to add background music: {e}")
-            return False
-   
-    def auto_edit_video(self, input_path, output_path):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"✂️ Auto-editing: {os.path.basename(input_path)}", extra={'is_status': True})
-            if not os.path.exists(input_path):
-                raise FileNotFoundError(f"Video file not found: {input_path}")
-            cmd = [
-                "auto-editor", input_path, "--no-open",
-                "--output", output_path,
-                "--edit", "audio:threshold=-30dB,margin=0.1s"
-            ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Auto-edited video successfully (Size: {size_mb:.1f} MB)")
-                return True
-            else:
-                raise Exception("Auto-edited output file was not created")
-        except Exception as e:
-            logging.error(f"❌ Auto-edit failed: {e}")
-            return False
-    def merge_videos(self, main_video, extra_video, output_path):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"🔗 Merging videos: {os.path.basename(main_video)} + {os.path.basename(extra_video)}", extra={'is_status': True})
-            for video_path in [main_video, extra_video]:
-                if not os.path.exists(video_path):
-                    raise FileNotFoundError(f"Video file not found: {video_path}")
-            concat_file = os.path.join(tempfile.gettempdir(), "concat_list.txt")
-            with open(concat_file, 'w', encoding='utf-8') as f:
-                f.write(f"file '{main_video}'\nfile '{extra_video}'")
-            cmd = [
-                "ffmpeg", "-y", "-loglevel", "warning", "-f", "concat",
-                "-safe", "0", "-i", concat_file,
-                "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", output_path
-            ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Merged videos successfully (Size: {size_mb:.1f} MB)")
-                return True
-            else:
-                raise Exception("Merged output file was not created")
-        except Exception as e:
-            logging.error(f"❌ Video merging failed: {e}")
-            return False
-        finally:
-            if os.path.exists(concat_file):
-                try:
-                    os.remove(concat_file)
-                except Exception:
-                    pass
-    def encode_video_with_subtitles(self, input_path, subtitle_path, output_path, quality, use_gpu):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"🎬 Encoding video with subtitles: {os.path.basename(input_path)}", extra={'is_status': True})
-            if not os.path.exists(input_path):
-                raise FileNotFoundError(f"Video file not found: {input_path}")
-            if not os.path.exists(subtitle_path):
-                raise FileNotFoundError(f"Subtitle file not found: {subtitle_path}")
-            # Use pathlib for cross-platform path handling
-            input_path = str(Path(input_path).resolve())
-            subtitle_path = str(Path(subtitle_path).resolve())
-            output_path = str(Path(output_path).resolve())
-            # Convert subtitle path to use forward slashes and escape for FFmpeg
-            subtitle_path_escaped = subtitle_path.replace('\\', '/').replace(':', '\\:')
-            # Select preset
-            preset = quality if quality in ["ultrafast", "fast", "medium", "slow"] else "fast"
-            # Try NVENC first if enabled and available
-            if use_gpu and self.is_nvenc_available():
-                codec = "h264_nvenc"
-                nvenc_preset_map = {"ultrafast": "p1", "fast": "p2", "medium": "p4", "slow": "p7"}
-                preset_value = nvenc_preset_map.get(preset, "p4")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", input_path,
-                    "-vf", f"ass='{subtitle_path_escaped}'",
-                    "-c:v", codec, "-preset:v", preset_value,
-                    "-rc:v", "vbr", "-cq:v", "23",
-                    "-c:a", "aac", "-b:a", "192k", output_path
-                ]
-                try:
-                    process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-                    if process is None:
-                        return False
-                    if os.path.exists(output_path):
-                        size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                        logging.info(f"✅ Encoded video with subtitles successfully using NVENC (Size: {size_mb:.1f} MB)")
-                        return True
-                    else:
-                        raise Exception("Encoded output file was not created")
-                except subprocess.CalledProcessError as e:
-                    logging.warning(f"⚠️ NVENC encoding failed: {e.stderr}. Falling back to libx264.")
-            # Fallback to libx264
-            codec = "libx264"
-            cmd = [
-                "ffmpeg", "-y", "-loglevel", "warning", "-i", input_path,
-                "-vf", f"ass='{subtitle_path_escaped}'",
-                "-c:v", codec, "-preset", preset, "-crf", "23",
-                "-c:a", "aac", "-b:a", "192k", output_path
-            ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Encoded video with subtitles successfully using libx264 (Size: {size_mb:.1f} MB)")
-                return True
-            else:
-                raise Exception("Encoded output file was not created")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"❌ Video encoding with subtitles failed: {e}. FFmpeg output: {e.stderr}")
-            return False
-        except Exception as e:
-            logging.error(f"❌ Video encoding with subtitles failed: {e}")
-            return False
-    def is_nvenc_available(self):
-        try:
-            result = subprocess.run(["ffmpeg", "-encoders"], capture_output=True, text=True, timeout=10)
-            return "h264_nvenc" in result.stdout
-        except Exception:
-            return False
-    def extract_audio(self, video_path, audio_path):
-        if self.check_stop():
-            return False
-        try:
-            logging.info(f"🔊 Extracting audio from: {os.path.basename(video_path)}")
-            if not os.path.exists(video_path):
-                raise FileNotFoundError(f"Video file not found: {video_path}")
-            cmd = [
-                "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                "-vn", "-acodec", "mp3", "-q:a", "2", audio_path
-            ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=600)
-            if process is None:
-                return False
-            if os.path.exists(audio_path):
-                logging.info("✅ Audio extracted successfully")
-                return True
-            else:
-                raise Exception("Audio file was not created")
-        except Exception as e:
-            logging.error(f"❌ Audio extraction failed: {e}")
-            return False
-    def process_all_videos(self, input_videos, extra_video, output_dir, background_music, quality, use_gpu, music_volume, enable_ducking, enable_auto_edit, subtitle_settings, use_external=False, external_srt_files=None):
-        try:
-            self.check_ffmpeg_availability()
-            total_videos = len(input_videos)
-            processed_videos = 0
-            temp_dir = tempfile.gettempdir()
-            for idx, video_path in enumerate(input_videos, 1):
-                if self.check_stop():
-                    break
-                logging.info(f"📼 Processing video {idx}/{total_videos}: {os.path.basename(video_path)}", extra={'is_status': True})
-                video_name = os.path.splitext(os.path.basename(video_path))[0]
-                # Robust title lookup
-                video_title = self.get_video_title(video_path)
-                if self.video_title_map:
-                    try:
-                        for item in self.video_title_map:
-                            if isinstance(item, dict) and "filename" in item and "title" in item:
-                                if item["filename"] == video_name:
-                                    video_title = item["title"]
-                                    break
-                        else:
-                            logging.warning(f"No title found for '{video_name}' in video_title_map, using filename")
-                    except Exception as e:
-                        logging.warning(f"Invalid video_title_map structure: {e}, using filename")
-                self.update_progress((processed_videos / total_videos) * 100)
-                try:
-                    temp_audio = os.path.join(temp_dir, f"temp_audio_{idx}.mp3")
-                    temp_subtitle = os.path.join(temp_dir, f"temp_sub_{idx}.ass")
-                    final_output = os.path.join(output_dir, f"{video_title}_processed.mp4")
-                    current_video = video_path
-                    auto_edited_path = None
-                    merged_path = None
-                    music_output = None
-                    if enable_auto_edit:
-                        auto_edited_path = os.path.join(temp_dir, f"auto_edited_{idx}.mp4")
-                        if self.auto_edit_video(video_path, auto_edited_path):
-                            current_video = auto_edited_path
-                        else:
-                            current_video = video_path
-                    if extra_video:
-                        merged_path = os.path.join(temp_dir, f"merged_{idx}.mp4")
-                        if self.merge_videos(current_video, extra_video, merged_path):
-                            current_video = merged_path
-                        else:
-                            logging.warning("⚠️ Video merging failed, proceeding with current video")
-                    # Generate subtitles after edits and merge
-                    has_subs = False
-                    words = None
-                    if use_external:
-                        srt_path = external_srt_files[idx - 1]
-                        if os.path.exists(srt_path):
-                            self.generate_ass_from_srt(srt_path, temp_subtitle, subtitle_settings)
-                            has_subs = os.path.exists(temp_subtitle)
-                        else:
-                            logging.warning(f"⚠️ SRT file not found for {video_name}: {srt_path}")
-                    else:
-                        if self.extract_audio(current_video, temp_audio):
-                            words = self.transcribe_audio_optimized(temp_audio)
-                            if words:
-                                self.generate_ass_subtitles_enhanced(words, temp_subtitle, subtitle_settings)
-                                has_subs = os.path.exists(temp_subtitle)
-                            else:
-                                logging.warning(f"⚠️ No words transcribed for {video_name}")
-                        else:
-                            logging.warning(f"⚠️ Audio extraction failed for {video_name}")
-                    # Add music
-                    if background_music:
-                        music_output = os.path.join(temp_dir, f"music_{idx}.mp4")
-                        if self.add_background_music_with_ducking(current_video, background_music, music_output, music_volume, enable_ducking):
-                            current_video = music_output
-                        else:
-                            logging.warning("⚠️ Adding background music failed, proceeding without music")
-                    # Encode with subs if available
-                    if has_subs:
-                        if self.encode_video_with_subtitles(current_video, temp_subtitle, final_output, quality, use_gpu):
-                            logging.info(f"✅ Processed {video_title} with subtitles")
-                        else:
-                            logging.warning(f"⚠️ Encoding with subtitles failed for {video_title}, copying original")
-                            self._copy_file_safely(video_path, final_output)
-                    else:
-                        self._copy_file_safely(video_path, final_output)
-                    processed_videos += 1
-                    self.update_progress((processed_videos / total_videos) * 100)
-                except Exception as e:
-                    logging.error(f"❌ Error processing video {video_name}: {e}", exc_info=True)
-                    self._copy_file_safely(video_path, os.path.join(output_dir, f"{video_title}_failed.mp4"))
-                    processed_videos += 1
-                    self.update_progress((processed_videos / total_videos) * 100)
-                finally:
-                    temp_files = [temp_audio, temp_subtitle]
-                    if auto_edited_path:
-                        temp_files.append(auto_edited_path)
-                    if merged_path:
-                        temp_files.append(merged_path)
-                    if music_output:
-                        temp_files.append(music_output)
-                    for temp_file in temp_files:
-                        if temp_file and os.path.exists(temp_file):
-                            try:
-                                os.remove(temp_file)
-                            except Exception:
-                                pass
-            if not self.check_stop():
-                logging.info(f"🎉 Completed processing {processed_videos}/{total_videos} videos", extra={'is_status': True})
-        except Exception as e:
-            logging.error(f"❌ Fatal error in processing pipeline: {e}", exc_info=True)
-            raise
 if __name__ == "__main__":
     try:
         root = tk.Tk()
@@ -0,0 +1,1308 @@
+import os
+import subprocess
+import json
+import threading
+import shutil
+from pathlib import Path
+import logging
+from whisper_server import load_whisper_model
+from transcription_cache import get_transcription_cache, hash_audio
+from audio_source import load_audio, WHISPER_SAMPLE_RATE
+from render_cache import get_render_cache, fingerprint_file, hash_text_file
+from loudness import measure_file, normalization_gain_db, DEFAULT_TARGET_LUFS
+from segment_encoder import plan_segments, encode_segmented, SegmentEncodeError
+from stream_probe import concat_videos
+import time
+import tempfile
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+# Render pipeline of the shorts tool, free of any Tk import so it can run on
+# headless render boxes. shorts_gui_v16.py (Tk front end) and shorts_cli.py
+# (batch/cron runner) both drive it with the same job config JSON that the
+# GUI's Save Config writes; run_job_config() maps that JSON onto
+# process_all_videos().
+
+class OptimizedVideoProcessor:
+    # Max number of videos allowed in each pipeline stage at the same time.
+    # Encoding and auto-edit are CPU-bound (libx264 already uses every core),
+    # so they run one at a time; the lighter stages overlap across videos.
+    DEFAULT_STAGE_LIMITS = {
+        "auto_edit": 1,
+        "merge": 2,
+        "extract_audio": 4,
+        "transcribe": 1,
+        "music": 2,
+        "encode": 1,
+    }
+    AUTO_EDIT_ARGS = ["--edit", "audio:threshold=-30dB,margin=0.1s"]
+    # amix scales each of its two inputs by 1/2
+    AMIX_GAIN_DB = -6.02
+    # libx264 tuning on top of the quality preset. Shorts sources are mostly
+    # screen recordings: large flat areas, sharp text, little motion. "screen"
+    # (-tune animation) and "slides" (-tune stillimage) fit that content, and
+    # both trim reference frames and rc-lookahead, which buy little on low
+    # motion but cost encode time. benchmark_encode_profiles() measures the
+    # speed/size/SSIM trade-off on a real source.
+    X264_PROFILES = {
+        "standard": [],
+        "screen": ["-tune", "animation", "-x264-params", "ref=2:rc-lookahead=20"],
+        "slides": ["-tune", "stillimage", "-x264-params", "ref=2:rc-lookahead=10"],
+    }
+    # Preview proxies: downscaled, low fps, ultrafast, only the chosen window
+    PREVIEW_HEIGHT = 480
+    PREVIEW_FPS = 15
+    PREVIEW_CRF = 30
+    def __init__(self, progress_queue, video_title_map, stop_event):
+        self.progress_queue = progress_queue
+        self.video_title_map = video_title_map
+        self.whisper_model = None
+        self.whisper_model_name = None
+        self.transcription_cache = get_transcription_cache()
+        self.render_cache = None
+        self.loudness_target = None
+        self.x264_profile = "standard"
+        self.x264_threads = 0
+        self.segment_encoding = False
+        self.encode_limit = 1
+        self.whisper_model_lock = threading.Lock()
+        self.stop_event = stop_event
+        self.stage_semaphores = {}
+        self.progress_lock = threading.Lock()
+        self.reset_counters()
+        self.random_colors_list = ["#FFFFFF", "#FFFF00", "#FF0000", "#00FF00", "#0000FF",
+                                  "#FF00FF", "#00FFFF", "#FFA500", "#000000", "#808080"]
+    def reset_counters(self):
+        """Forget the processed/failed tallies of the previous run"""
+        self.processed_videos = 0
+        self.failed_videos = []
+    def configure_stage_limits(self, stage_limits=None):
+        limits = dict(self.DEFAULT_STAGE_LIMITS)
+        if stage_limits:
+            limits.update(stage_limits)
+        self.stage_semaphores = {
+            stage: threading.BoundedSemaphore(max(1, int(limit))) for stage, limit in limits.items()
+        }
+        return limits
+    @contextmanager
+    def pipeline_stage(self, stage):
+        semaphore = self.stage_semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+    def run_cached_stage(self, stage, input_key, params, output_path, run_fn, final=False, pins=None):
+        """Run one render stage through the render cache.
+
+        Returns (path, key). path is the artifact to continue with (the cache
+        entry itself for intermediates, output_path for final outputs) or None
+        if the stage failed; key is the input_key for the next stage.
+        Intermediate cache entries are pinned and appended to pins; the
+        caller unpins them once the video is done.
+        """
+        if self.render_cache is None or input_key is None:
+            return (output_path if run_fn() else None), None
+        key = self.render_cache.stage_key(stage, input_key, params)
+        cached = self.render_cache.lookup(key, pin=True)
+        if cached:
+            logging.info(f"⚡ Render cache hit: {stage} ({os.path.basename(output_path)})")
+            if not final:
+                pins.append(cached)
+                return cached, key
+            try:
+                shutil.copyfile(cached, output_path)
+            finally:
+                self.render_cache.unpin(cached)
+            return output_path, key
+        if not run_fn():
+            return None, key
+        if final:
+            self.render_cache.store(key, output_path)
+            return output_path, key
+        stored = self.render_cache.store(key, output_path, move=True, pin=True)
+        if stored == self.render_cache.entry_path(key):
+            pins.append(stored)
+        return stored, key
+    def file_key(self, path):
+        if self.render_cache is None:
+            return None
+        try:
+            return fingerprint_file(path)
+        except OSError as e:
+            logging.warning(f"⚠️ Render cache disabled for {os.path.basename(path)}: {e}")
+            return None
+    def loudness_gain_db(self, path, offset_db=0.0):
+        """Volume gain (dB) that brings path's audio to the loudness target.
+
+        The measurement is cached per file, so only the first render of a
+        source measures it. offset_db accounts for level changes applied
+        before the gain (e.g. amix). Returns None when normalization is off.
+        """
+        if self.loudness_target is None:
+            return None
+        try:
+            measurement = measure_file(path, stop_check=self.check_stop)
+        except Exception as e:
+            logging.warning(f"⚠️ Loudness measurement failed for {os.path.basename(path)}: {e}")
+            return None
+        if measurement is None:
+            return None
+        shifted = {name: value + offset_db for name, value in measurement.items() if name in ("integrated", "peak")}
+        gain_db = normalization_gain_db(shifted, self.loudness_target)
+        logging.info(f"🔊 {os.path.basename(path)}: {measurement['integrated']:.1f} LUFS, applying {gain_db:+.1f} dB")
+        return gain_db
+    def audio_gain_args(self, gain_db):
+        return ["-af", f"volume={gain_db:.2f}dB"] if gain_db else []
+    def update_progress(self, percentage):
+        try:
+            self.progress_queue.put(("PROGRESS", max(0, min(100, percentage))))
+        except Exception:
+            pass
+    def check_stop(self):
+        return self.stop_event.is_set()
+    def get_video_title(self, videoname):
+        base = os.path.splitext(os.path.basename(videoname))[0]
+        m = self.video_title_map
+        if isinstance(m, dict):
+            return m.get(base, base)
+        elif isinstance(m, list):
+            for item in m:
+                if isinstance(item, dict) and os.path.splitext(item.get("filename", ""))[0] == base:
+                    return item.get("title", base)
+        return base
+
+    def get_whisper_model(self):
+        with self.whisper_model_lock:
+            return self._load_whisper_model()
+    def _load_whisper_model(self):
+        if self.whisper_model is None:
+            logging.info("🧠 Loading Whisper model...", extra={'is_status': True})
+            try:
+                self.whisper_model = load_whisper_model("large-v3", compute_type="int8")
+                self.whisper_model_name = "large-v3"
+                logging.info("✅ Loaded large-v3 Whisper model")
+            except Exception as e:
+                logging.warning(f"⚠️ Could not load 'large-v3' model, trying 'small'. Reason: {e}")
+                try:
+                    self.whisper_model = load_whisper_model("small", compute_type="int8")
+                    self.whisper_model_name = "small"
+                    logging.info("✅ Loaded small Whisper model")
+                except Exception as e2:
+                    logging.warning(f"⚠️ Could not load 'small' model, falling back to 'tiny'. Reason: {e2}")
+                    self.whisper_model = load_whisper_model("tiny", device="cpu", compute_type="int8")
+                    self.whisper_model_name = "tiny"
+                    logging.info("✅ Loaded tiny Whisper model")
+        return self.whisper_model
+    def hex_to_ass_color(self, hex_color):
+        try:
+            hex_color = hex_color.lstrip('#')
+            r = int(hex_color[0:2], 16)
+            g = int(hex_color[2:4], 16)
+            b = int(hex_color[4:6], 16)
+            return f"&H00{b:02X}{g:02X}{r:02X}"
+        except Exception:
+            return "&H00FFFFFF"
+    def hex_to_ass_color_with_alpha(self, hex_color, opacity):
+        try:
+            hex_color = hex_color.lstrip('#')
+            r = int(hex_color[0:2], 16)
+            g = int(hex_color[2:4], 16)
+            b = int(hex_color[4:6], 16)
+            alpha = int(255 * (1 - opacity))
+            return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+        except Exception:
+            return "&H80000000"
+    def format_ass_time(self, seconds):
+        h = int(seconds // 3600)
+        m = int((seconds % 3600) // 60)
+        s = int(seconds % 60)
+        cs = int((seconds * 100) % 100)
+        return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+    def format_srt_time(self, seconds):
+        h = int(seconds // 3600)
+        m = int((seconds % 3600) // 60)
+        s = int(seconds % 60)
+        ms = int((seconds % 1) * 1000)
+        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+    def srt_time_to_seconds(self, time_str):
+        try:
+            parts = time_str.replace(',', '.').split(':')
+            if len(parts) == 3:
+                h, m, s = parts
+                return int(h) * 3600 + int(m) * 60 + float(s)
+            return 0.0
+        except Exception:
+            return 0.0
+    def get_animation_tag(self, animation_type, start, end):
+        duration = end - start
+        if animation_type == "Fade In/Out":
+            fade_in = int(duration * 1000 * 0.2)
+            fade_out = int(duration * 1000 * 0.2)
+            return f"fad({fade_in},{fade_out})"
+        elif animation_type == "Pop Up":
+            return "t(0,200,fscx150 fscy150)t(200,300,fscx100 fscy100)"
+        elif animation_type == "Slide In":
+            return "move(-200,0,0,0)"
+        elif animation_type == "Bounce":
+            return "t(0,100,fscy120)t(100,200,fscy100)t(200,300,fscy110)t(300,400,fscy100)"
+        return ""
+    def generate_ass_subtitles_enhanced(self, content, ass_path, settings):
+        if self.check_stop():
+            return
+        try:
+            mode = settings['mode']
+            subtitle_color = settings['color']
+            subtitle_size = settings['size']
+            words_count = settings['words_count']
+            random_colors = settings.get('random_colors', False)
+            prefix = settings.get('prefix', '')
+            suffix = settings.get('suffix', '')
+            case_style = settings.get('case_style', 'Uppercase')
+            enable_bg_box = settings.get('enable_bg_box', False)
+            bg_opacity = settings.get('bg_opacity', 0.5)
+            font_name = settings['font_family']
+            bold = "-1" if settings['bold'] else "0"
+            italic = "1" if settings['italic'] else "0"
+            underline = "0"
+            strikeout = "0"
+            secondary = "&H000000FF"
+            back = self.hex_to_ass_color_with_alpha("#000000", bg_opacity) if enable_bg_box else "&H00000000"
+            scale_x = "100"
+            scale_y = "100"
+            spacing = "0"
+            angle = "0"
+            border_style = "3" if enable_bg_box else "1"
+            shadow = "0"
+            alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
+            alignment = alignment_map[settings['position']]
+            margin_l = "10"
+            margin_r = "10"
+            margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
+            encoding = "1"
+            if settings['enable_borders']:
+                outline_color = self.hex_to_ass_color(settings['border_color'])
+                outline = str(settings['border_thickness'])
+                size_border = str(subtitle_size + 2)
+                outline_border = str(int(outline) + 1) if outline != "0" else "1"
+            else:
+                outline_color = "&H00000000"
+                outline = "0"
+                size_border = str(subtitle_size)
+                outline_border = "0"
+            format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
+            primary_default = self.hex_to_ass_color(subtitle_color)
+            style_line = f"Style: Default,{font_name},{subtitle_size},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+            style_border = f"Style: SpeechBorder,{font_name},{size_border},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+            if mode == "single":
+                sub_items = [{'start': w.get('start', 0), 'end': w.get('end', 0), 'text': w.get('word', '').strip()} for w in content if w.get('word', '').strip()]
+            else:
+                sub_items = self.generate_grouped_subtitles(content, words_count)
+            with open(ass_path, "w", encoding="utf-8") as f:
+                f.write(f"""[Script Info]
+Title: Enhanced Subtitles with Speech Recognition
+ScriptType: v4.00+
+[V4+ Styles]
+{format_str}
+{style_line}""")
+                if settings['enable_borders']:
+                    f.write(f"\n{style_border}")
+                f.write(f"""
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+""")
+                style_name = "SpeechBorder" if settings['enable_borders'] else "Default"
+                enable_animation = settings.get('enable_animation', False)
+                animation_type = settings.get('animation_type', 'Fade In/Out')
+                for item in sub_items:
+                    if self.check_stop():
+                        break
+                    start, end = item.get('start', 0), item.get('end', 0)
+                    text = item.get('text', '').strip()
+                    if case_style == "Lowercase":
+                        text = text.lower()
+                    elif case_style == "Title Case":
+                        text = text.title()
+                    else:
+                        text = text.upper()
+                    text = f"{prefix}{text}{suffix}"
+                    if not text or end <= start:
+                        continue
+                    primary_color = self.hex_to_ass_color(random.choice(self.random_colors_list)) if random_colors else primary_default
+                    animation_tag = self.get_animation_tag(animation_type, start, end) if enable_animation else ""
+                    tags = f"\\c{primary_color}"
+                    if animation_tag:
+                        tags += f"\\{animation_tag}"
+                    full_text = f"{{{tags}}}{text}"
+                    f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{full_text}\n")
+            mode_text = {"single": "single word", "multiple": f"{words_count} words per subtitle"}[mode]
+            border_text = " with speech border boxes" if settings['enable_borders'] else ""
+            animation_text = f" with {animation_type} animation" if enable_animation else ""
+            branding_text = f" with prefix '{prefix}' and suffix '{suffix}'" if prefix or suffix else ""
+            case_text = f" in {case_style.lower()} case"
+            color_text = " with random colors" if random_colors else ""
+            bg_box_text = f" with background box (opacity {bg_opacity:.2f})" if enable_bg_box else ""
+            logging.info(f"✅ Generated enhanced ASS subtitles with {mode_text}{border_text}{animation_text}{branding_text}{case_text}{color_text}{bg_box_text}")
+        except Exception as e:
+            logging.error(f"❌ Enhanced ASS subtitle generation failed: {e}", exc_info=True)
+            raise
+    def generate_ass_from_srt(self, srt_path, ass_path, settings):
+        if self.check_stop():
+            return
+        try:
+            segments = self.parse_srt(srt_path)
+            if not segments:
+                logging.warning("No valid segments found in SRT file.")
+                return
+            # Reuse the same style computations as generate_ass_subtitles_enhanced
+            subtitle_color = settings['color']
+            subtitle_size = settings['size']
+            words_count = settings['words_count']
+            random_colors = settings.get('random_colors', False)
+            prefix = settings.get('prefix', '')
+            suffix = settings.get('suffix', '')
+            case_style = settings.get('case_style', 'Uppercase')
+            enable_bg_box = settings.get('enable_bg_box', False)
+            bg_opacity = settings.get('bg_opacity', 0.5)
+            font_name = settings['font_family']
+            bold = "-1" if settings['bold'] else "0"
+            italic = "1" if settings['italic'] else "0"
+            underline = "0"
+            strikeout = "0"
+            secondary = "&H000000FF"
+            back = self.hex_to_ass_color_with_alpha("#000000", bg_opacity) if enable_bg_box else "&H00000000"
+            scale_x = "100"
+            scale_y = "100"
+            spacing = "0"
+            angle = "0"
+            border_style = "3" if enable_bg_box else "1"
+            shadow = "0"
+            alignment_map = {"Bottom": 2, "Top": 8, "Center": 5}
+            alignment = alignment_map[settings['position']]
+            margin_l = "10"
+            margin_r = "10"
+            margin_v = "90" if settings['position'] == "Bottom" else "10" if settings['position'] == "Top" else "0"
+            encoding = "1"
+            if settings['enable_borders']:
+                outline_color = self.hex_to_ass_color(settings['border_color'])
+                outline = str(settings['border_thickness'])
+                size_border = str(subtitle_size + 2)
+                outline_border = str(int(outline) + 1) if outline != "0" else "1"
+            else:
+                outline_color = "&H00000000"
+                outline = "0"
+                size_border = str(subtitle_size)
+                outline_border = "0"
+            format_str = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
+            primary_default = self.hex_to_ass_color(subtitle_color)
+            style_line = f"Style: Default,{font_name},{subtitle_size},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+            style_border = f"Style: SpeechBorder,{font_name},{size_border},{primary_default},{secondary},{outline_color},{back},{bold},{italic},{underline},{strikeout},{scale_x},{scale_y},{spacing},{angle},{border_style},{outline_border},{shadow},{alignment},{margin_l},{margin_r},{margin_v},{encoding}"
+            if settings['mode'] == "single":
+                sub_items = []
+                for seg in segments:
+                    words = [w.strip() for w in seg['text'].split() if w.strip()]
+                    if words:
+                        dur = seg['end'] - seg['start']
+                        for i, w_text in enumerate(words):
+                            w_start = seg['start'] + (i / len(words)) * dur
+                            w_end = seg['start'] + ((i + 1) / len(words)) * dur
+                            sub_items.append({'start': w_start, 'end': w_end, 'text': w_text})
+            else:
+                sub_items = []
+                for seg in segments:
+                    words = [w.strip() for w in seg['text'].split() if w.strip()]
+                    if words:
+                        dur = seg['end'] - seg['start']
+                        for i in range(0, len(words), words_count):
+                            group_words = words[i:i + words_count]
+                            if group_words:
+                                group_text = ' '.join(group_words)
+                                g_start = seg['start'] + (i / len(words)) * dur
+                                g_end = seg['start'] + ((i + len(group_words)) / len(words)) * dur
+                                sub_items.append({'start': g_start, 'end': g_end, 'text': group_text})
+            with open(ass_path, "w", encoding="utf-8") as f:
+                f.write(f"""[Script Info]
+Title: Enhanced Subtitles from SRT
+ScriptType: v4.00+
+[V4+ Styles]
+{format_str}
+{style_line}""")
+                if settings['enable_borders']:
+                    f.write(f"\n{style_border}")
+                f.write(f"""
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+""")
+                style_name = "SpeechBorder" if settings['enable_borders'] else "Default"
+                enable_animation = settings.get('enable_animation', False)
+                animation_type = settings.get('animation_type', 'Fade In/Out')
+                for item in sub_items:
+                    if self.check_stop():
+                        break
+                    start, end = item.get('start', 0), item.get('end', 0)
+                    text = item.get('text', '').strip()
+                    if case_style == "Lowercase":
+                        text = text.lower()
+                    elif case_style == "Title Case":
+                        text = text.title()
+                    else:
+                        text = text.upper()
+                    text = f"{prefix}{text}{suffix}"
+                    if not text or end <= start:
+                        continue
+                    primary_color = self.hex_to_ass_color(random.choice(self.random_colors_list)) if random_colors else primary_default
+                    animation_tag = self.get_animation_tag(animation_type, start, end) if enable_animation else ""
+                    tags = f"\\c{primary_color}"
+                    if animation_tag:
+                        tags += f"\\{animation_tag}"
+                    full_text = f"{{{tags}}}{text}"
+                    f.write(f"Dialogue: 0,{self.format_ass_time(start)},{self.format_ass_time(end)},{style_name},,0,0,0,,{full_text}\n")
+            mode_text = {"single": "single word", "multiple": f"{words_count} words per subtitle"}[settings['mode']]
+            border_text = " with speech border boxes" if settings['enable_borders'] else ""
+            animation_text = f" with {animation_type} animation" if enable_animation else ""
+            branding_text = f" with prefix '{prefix}' and suffix '{suffix}'" if prefix or suffix else ""
+            case_text = f" in {case_style.lower()} case"
+            color_text = " with random colors" if random_colors else ""
+            bg_box_text = f" with background box (opacity {bg_opacity:.2f})" if enable_bg_box else ""
+            logging.info(f"✅ Generated ASS from SRT with {mode_text}{border_text}{animation_text}{branding_text}{case_text}{color_text}{bg_box_text}")
+        except Exception as e:
+            logging.error(f"❌ ASS generation from SRT failed: {e}", exc_info=True)
+            raise
+    def parse_srt(self, srt_path):
+        segments = []
+        try:
+            with open(srt_path, 'r', encoding='utf-8') as f:
+                content = f.read().strip().split('\n\n')
+            for block in content:
+                lines = [line.strip() for line in block.split('\n') if line.strip()]
+                if len(lines) >= 3 and lines[0].isdigit():
+                    time_line = lines[1]
+                    text = ' '.join(lines[2:])
+                    if ' --> ' in time_line:
+                        start_str, end_str = [t.strip() for t in time_line.split(' --> ')]
+                        start = self.srt_time_to_seconds(start_str)
+                        end = self.srt_time_to_seconds(end_str)
+                        segments.append({'start': start, 'end': end, 'text': text})
+        except Exception as e:
+            logging.error(f"Failed to parse SRT {srt_path}: {e}")
+        return segments
+    def generate_srt_from_video(self, video_path, srt_path):
+        try:
+            if self.check_stop():
+                return
+            audio = self.extract_audio(video_path)
+            if audio is None:
+                logging.warning(f"Audio extraction failed for SRT generation: {os.path.basename(video_path)}")
+                return
+            logging.info(f"🧠 Generating SRT for: {os.path.basename(video_path)}", extra={'is_status': True})
+            params = {"language": "en", "word_timestamps": False}
+            cache_key, segments = self.get_cached_transcription(audio, params)
+            if segments is None:
+                model = self.get_whisper_model()
+                raw_segments, _ = model.transcribe(audio, **params)
+                segments = []
+                for seg in raw_segments:
+                    text = seg.text.strip()
+                    if text:
+                        start = max(0, getattr(seg, 'start', 0))
+                        segments.append({"text": text, "start": start, "end": getattr(seg, 'end', start + 1)})
+                if segments:
+                    self.transcription_cache.put(cache_key, segments)
+            with open(srt_path, "w", encoding="utf-8") as f:
+                for i, seg in enumerate(segments, 1):
+                    f.write(f"{i}\n{self.format_srt_time(seg['start'])} --> {self.format_srt_time(seg['end'])}\n{seg['text']}\n\n")
+            size_kb = os.path.getsize(srt_path) / 1024 if os.path.exists(srt_path) else 0
+            logging.info(f"✅ SRT generated: {os.path.basename(srt_path)} ({size_kb:.1f} KB)")
+        except Exception as e:
+            logging.error(f"❌ SRT generation failed for {os.path.basename(video_path)}: {e}")
+    def check_ffmpeg_availability(self):
+        missing_tools = []
+        try:
+            subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True, timeout=10)
+            logging.info("✅ FFmpeg is available")
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            missing_tools.append("FFmpeg")
+        try:
+            subprocess.run(["auto-editor", "--version"], capture_output=True, check=True, text=True, timeout=10)
+            logging.info("✅ auto-editor is available")
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            missing_tools.append("auto-editor")
+        if missing_tools:
+            raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
+        return True
+    def get_cached_transcription(self, audio, params):
+        """Return (cache_key, records) for audio (path or samples); records is None on a cache miss.
+
+        Until a model is loaded the key assumes large-v3. On a miss the model is
+        loaded and, if a smaller fallback model was used, the lookup is repeated
+        under that model's name so its own cached results are still found.
+        """
+        audio_hash = hash_audio(audio)
+        model_name = self.whisper_model_name or "large-v3"
+        cache_key = self.transcription_cache.make_key(audio, model_name, params, audio_hash=audio_hash)
+        records = self.transcription_cache.get(cache_key)
+        if records is None and self.whisper_model_name is None:
+            self.get_whisper_model()
+            if self.whisper_model_name != model_name:
+                cache_key = self.transcription_cache.make_key(audio, self.whisper_model_name, params, audio_hash=audio_hash)
+                records = self.transcription_cache.get(cache_key)
+        return cache_key, records
+    def transcribe_audio_optimized(self, audio, label=None):
+        """Transcribe a file path or 16 kHz mono float32 samples from extract_audio()"""
+        try:
+            if self.check_stop():
+                return []
+            if isinstance(audio, str):
+                if not os.path.exists(audio):
+                    logging.error(f"Audio file not found: {audio}")
+                    return []
+                label = label or os.path.basename(audio)
+            logging.info(f"🧠 Transcribing: {label or 'audio'}", extra={'is_status': True})
+            params = {"beam_size": 1, "best_of": 1, "word_timestamps": True,
+                      "language": "en", "condition_on_previous_text": False}
+            cache_key, cached_words = self.get_cached_transcription(audio, params)
+            if cached_words is not None:
+                logging.info(f"⚡ Loaded {len(cached_words)} words from transcription cache")
+                return cached_words
+            model = self.get_whisper_model()
+            segments, _ = model.transcribe(audio, **params)
+            words = []
+            for segment in segments:
+                if self.check_stop():
+                    break
+                if hasattr(segment, 'words') and segment.words:
+                    for w in segment.words:
+                        if w.word and w.word.strip():
+                            words.append({
+                                "word": w.word.strip(),
+                                "start": max(0, w.start),
+                                "end": max(w.start, w.end),
+                                "confidence": getattr(w, 'probability', 0.5)
+                            })
+            if words and not self.check_stop():
+                self.transcription_cache.put(cache_key, words)
+            logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
+            return words
+        except Exception as e:
+            logging.error(f"❌ Transcription failed: {e}", exc_info=True)
+            return []
+    def generate_grouped_subtitles(self, words, words_per_group):
+        if not words:
+            return []
+        grouped_subtitles = []
+        for i in range(0, len(words), words_per_group):
+            group = words[i:i + words_per_group]
+            if group:
+                try:
+                    text = " ".join([w["word"] for w in group if w.get("word")])
+                    start_time = group[0]["start"]
+                    end_time = group[-1]["end"]
+                    avg_confidence = sum(w.get("confidence", 0.5) for w in group) / len(group)
+                    if end_time > start_time and text.strip():
+                        grouped_subtitles.append({
+                            "text": text.strip(),
+                            "start": start_time,
+                            "end": end_time,
+                            "confidence": avg_confidence
+                        })
+                except Exception as e:
+                    logging.warning(f"⚠️ Error grouping subtitle segment: {e}")
+                    continue
+        return grouped_subtitles
+    def _copy_file_safely(self, src, dst):
+        try:
+            if not os.path.exists(src):
+                raise FileNotFoundError(f"Source file not found: {src}")
+            dst_dir = os.path.dirname(dst)
+            os.makedirs(dst_dir, exist_ok=True)
+            shutil.copy2(src, dst)
+            logging.info(f"📋 Copied original video to output: {os.path.basename(dst)}")
+        except Exception as copy_error:
+            logging.error(f"❌ Failed to copy video: {copy_error}")
+            raise
+    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=1):
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+            start_time = time.time()
+            while process.poll() is None:
+                if self.check_stop():
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                    return None
+                if timeout and (time.time() - start_time) > timeout:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                time.sleep(check_stop_interval)
+            stdout, stderr = process.communicate()
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
+            return process
+        except Exception as e:
+            if self.check_stop():
+                return None
+            raise
+    def add_background_music_with_ducking(self, video_path, music_path, output_path, volume=0.15, enable_ducking=True):
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"🎵 Adding background music: {os.path.basename(music_path)}", extra={'is_status': True})
+            for file_path, file_type in [(video_path, "Video"), (music_path, "Music")]:
+                if not os.path.exists(file_path):
+                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
+            if not enable_ducking:
+                logging.info("🎵 Adding music without ducking...")
+            else:
+                logging.info("🎵 Adding music with smart ducking based on speech recognition...")
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
+                "-stream_loop", "-1", "-i", music_path,
+                "-filter_complex", self.build_music_filter(volume, enable_ducking),
+                "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
+            ]
+            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+            if process is None:
+                return False
+            if os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                logging.info(f"✅ Background music added successfully with speech-aware ducking (Size: {size_mb:.1f}MB)")
+                return True
+            else:
+                raise Exception("Output file was not created")
+        except Exception as e:
+            logging.error(f"❌ Failed to add background music: {e}")
+            return False
+   
+    def build_music_filter(self, volume, enable_ducking, gain_db=None):
+        # Audio part of the filter graph: input 0 is the video, input 1 the looped music.
+        gain = f",volume={gain_db:.2f}dB" if gain_db else ""
+        if not enable_ducking:
+            return f"[1:a]volume={volume}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2{gain}[audio_out]"
+        return (f"[1:a]volume={volume}[music];[0:a]asplit[original][sidechain];"
+                f"[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];"
+                f"[original][ducked_music]amix=inputs=2:duration=first{gain}[audio_out]")
+    def escape_subtitle_path(self, subtitle_path):
+        # Convert subtitle path to use forward slashes and escape for FFmpeg
+        return str(Path(subtitle_path).resolve()).replace('\\', '/').replace(':', '\\:')
+    def video_codec_args(self, quality, nvenc, x264_profile=None, threads=None):
+        preset = quality if quality in ["ultrafast", "fast", "medium", "slow"] else "fast"
+        if nvenc:
+            nvenc_preset_map = {"ultrafast": "p1", "fast": "p2", "medium": "p4", "slow": "p7"}
+            return ["-c:v", "h264_nvenc", "-preset:v", nvenc_preset_map.get(preset, "p4"), "-rc:v", "vbr", "-cq:v", "23"]
+        profile = self.X264_PROFILES.get(x264_profile or self.x264_profile, [])
+        threads = self.x264_threads if threads is None else threads
+        return ["-c:v", "libx264", "-preset", preset, "-crf", "23", *profile, *(["-threads", str(threads)] if threads else [])]
+    def configure_x264(self, x264_profile, encode_limit):
+        """Select the x264 profile and split the cores between concurrent encodes"""
+        if x264_profile not in self.X264_PROFILES:
+            logging.warning(f"⚠️ Unknown x264 profile '{x264_profile}', using 'standard'")
+            x264_profile = "standard"
+        self.x264_profile = x264_profile
+        # x264 sizes its own thread pool for the whole machine; with several
+        # encodes at once that oversubscribes the cores, so give each a share
+        encode_limit = max(1, int(encode_limit))
+        self.encode_limit = encode_limit
+        self.x264_threads = max(1, (os.cpu_count() or 1) // encode_limit) if encode_limit > 1 else 0
+    def encode_in_segments(self, input_path, output_path, quality, video_filter, audio_inputs=(), audio_filter=None, audio_args=()):
+        """libx264 encode split into segments encoded in parallel (see segment_encoder).
+
+        Returns None when segment encoding is off, the video is too short to
+        split or splitting failed (the caller then encodes in one pass),
+        otherwise the result of encode_segmented().
+        """
+        if not self.segment_encoding:
+            return None
+        # This encode's share of the cores when several encodes run at once
+        workers = max(1, (os.cpu_count() or 1) // self.encode_limit)
+        try:
+            segments = plan_segments(input_path, workers)
+            if len(segments) < 2:
+                return None
+            started = time.time()
+            done = encode_segmented(
+                input_path, output_path, self.video_codec_args(quality, False, threads=0), video_filter,
+                segments, workers, audio_inputs, audio_filter, [*audio_args, "-c:a", "aac", "-b:a", "192k"],
+                runner=lambda cmd: self.run_subprocess_with_timeout(cmd, timeout=3600, check_stop_interval=0.5),
+                stop_check=self.check_stop)
+            if done:
+                logging.info(f"🧩 Segment-parallel encode finished in {time.time() - started:.1f}s")
+            return done
+        except (SegmentEncodeError, subprocess.CalledProcessError) as e:
+            if self.check_stop():
+                return False
+            logging.warning(f"⚠️ Segment-parallel encode failed ({getattr(e, 'stderr', None) or e}), encoding in one pass")
+            return None
+    def render_with_music_and_subtitles(self, video_path, music_path, subtitle_path, output_path, quality, use_gpu, volume=0.15, enable_ducking=True):
+        """Burn subtitles and mix ducked background music in one decode/encode pass.
+
+        With loudness normalization on, the gain is estimated from the speech
+        track (music sits well below it) and applied after the mix.
+        """
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"⚡ Fused render (music + subtitles): {os.path.basename(video_path)}", extra={'is_status': True})
+            for file_path, file_type in [(video_path, "Video"), (music_path, "Music"), (subtitle_path, "Subtitle")]:
+                if not os.path.exists(file_path):
+                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
+            video_path = str(Path(video_path).resolve())
+            output_path = str(Path(output_path).resolve())
+            gain_db = self.loudness_gain_db(video_path, offset_db=self.AMIX_GAIN_DB)
+            filter_graph = f"[0:v]ass='{self.escape_subtitle_path(subtitle_path)}'[video_out];" + self.build_music_filter(volume, enable_ducking, gain_db)
+            encoders = [True, False] if use_gpu and self.is_nvenc_available() else [False]
+            for nvenc in encoders:
+                if not nvenc:
+                    segmented = self.encode_in_segments(
+                        video_path, output_path, quality, f"ass='{self.escape_subtitle_path(subtitle_path)}'",
+                        audio_inputs=["-stream_loop", "-1", "-i", music_path],
+                        audio_filter=self.build_music_filter(volume, enable_ducking, gain_db))
+                    if segmented is not None:
+                        if segmented:
+                            size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                            logging.info(f"✅ Fused render finished using segment-parallel libx264 (Size: {size_mb:.1f} MB)")
+                        return segmented
+                cmd = [
+                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
+                    "-stream_loop", "-1", "-i", music_path,
+                    "-filter_complex", filter_graph,
+                    "-map", "[video_out]", "-map", "[audio_out]",
+                    *self.video_codec_args(quality, nvenc),
+                    "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
+                ]
+                try:
+                    process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+                except subprocess.CalledProcessError as e:
+                    if nvenc:
+                        logging.warning(f"⚠️ NVENC fused render failed: {e.stderr}. Falling back to libx264.")
+                        continue
+                    raise
+                if process is None:
+                    return False
+                if os.path.exists(output_path):
+                    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                    logging.info(f"✅ Fused render finished using {'NVENC' if nvenc else 'libx264'} (Size: {size_mb:.1f} MB)")
+                    return True
+                raise Exception("Fused render output file was not created")
+            return False
+        except subprocess.CalledProcessError as e:
+            logging.error(f"❌ Fused render failed: {e}. FFmpeg output: {e.stderr}")
+            return False
+        except Exception as e:
+            logging.error(f"❌ Fused render failed: {e}")
+            return False
+    def auto_edit_video(self, input_path, output_path):
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"✂️ Auto-editing: {os.path.basename(input_path)}", extra={'is_status': True})
+            if not os.path.exists(input_path):
+                raise FileNotFoundError(f"Video file not found: {input_path}")
+            cmd = [
+                "auto-editor", input_path, "--no-open",
+                "--output", output_path,
+                *self.AUTO_EDIT_ARGS
+            ]
+            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+            if process is None:
+                return False
+            if os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                logging.info(f"✅ Auto-edited video successfully (Size: {size_mb:.1f} MB)")
+                return True
+            else:
+                raise Exception("Auto-edited output file was not created")
+        except Exception as e:
+            logging.error(f"❌ Auto-edit failed: {e}")
+            return False
+    def merge_videos(self, main_video, extra_video, output_path):
+        """Append extra_video to main_video.
+
+        Clips whose streams already match are stream-copied; only a clip in a
+        different format (usually the short extra video) is re-encoded.
+        """
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"🔗 Merging videos: {os.path.basename(main_video)} + {os.path.basename(extra_video)}", extra={'is_status': True})
+            for video_path in [main_video, extra_video]:
+                if not os.path.exists(video_path):
+                    raise FileNotFoundError(f"Video file not found: {video_path}")
+            reencoded = concat_videos([main_video, extra_video], output_path,
+                                      runner=lambda cmd: self.run_subprocess_with_timeout(cmd, timeout=3600, check_stop_interval=0.2))
+            if reencoded is None:
+                return False
+            if os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                mode = "stream copy" if not reencoded else f"{reencoded} clip(s) re-encoded"
+                logging.info(f"✅ Merged videos successfully, {mode} (Size: {size_mb:.1f} MB)")
+                return True
+            else:
+                raise Exception("Merged output file was not created")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"❌ Video merging failed: {e}. FFmpeg output: {e.stderr}")
+            return False
+        except Exception as e:
+            logging.error(f"❌ Video merging failed: {e}")
+            return False
+    def encode_video_with_subtitles(self, input_path, subtitle_path, output_path, quality, use_gpu):
+        if self.check_stop():
+            return False
+        try:
+            logging.info(f"🎬 Encoding video with subtitles: {os.path.basename(input_path)}", extra={'is_status': True})
+            if not os.path.exists(input_path):
+                raise FileNotFoundError(f"Video file not found: {input_path}")
+            if not os.path.exists(subtitle_path):
+                raise FileNotFoundError(f"Subtitle file not found: {subtitle_path}")
+            # Use pathlib for cross-platform path handling
+            input_path = str(Path(input_path).resolve())
+            output_path = str(Path(output_path).resolve())
+            subtitle_path_escaped = self.escape_subtitle_path(subtitle_path)
+            # Loudness normalization rides along in this encode (no extra pass)
+            audio_args = self.audio_gain_args(self.loudness_gain_db(input_path))
+            # Try NVENC first if enabled and available
+            if use_gpu and self.is_nvenc_available():
+                cmd = [
+                    "ffmpeg", "-y", "-loglevel", "warning", "-i", input_path,
+                    "-vf", f"ass='{subtitle_path_escaped}'",
+                    *self.video_codec_args(quality, True),
+                    *audio_args, "-c:a", "aac", "-b:a", "192k", output_path
+                ]
+                try:
+                    process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+                    if process is None:
+                        return False
+                    if os.path.exists(output_path):
+                        size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                        logging.info(f"✅ Encoded video with subtitles successfully using NVENC (Size: {size_mb:.1f} MB)")
+                        return True
+                    else:
+                        raise Exception("Encoded output file was not created")
+                except subprocess.CalledProcessError as e:
+                    logging.warning(f"⚠️ NVENC encoding failed: {e.stderr}. Falling back to libx264.")
+            # Fallback to libx264, split across cores for long videos
+            segmented = self.encode_in_segments(input_path, output_path, quality, f"ass='{subtitle_path_escaped}'",
+                                                audio_args=audio_args)
+            if segmented is not None:
+                if segmented:
+                    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                    logging.info(f"✅ Encoded video with subtitles successfully using segment-parallel libx264 (Size: {size_mb:.1f} MB)")
+                return segmented
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "warning", "-i", input_path,
+                "-vf", f"ass='{subtitle_path_escaped}'",
+                *self.video_codec_args(quality, False),
+                *audio_args, "-c:a", "aac", "-b:a", "192k", output_path
+            ]
+            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
+            if process is None:
+                return False
+            if os.path.exists(output_path):
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                logging.info(f"✅ Encoded video with subtitles successfully using libx264 (Size: {size_mb:.1f} MB)")
+                return True
+            else:
+                raise Exception("Encoded output file was not created")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"❌ Video encoding with subtitles failed: {e}. FFmpeg output: {e.stderr}")
+            return False
+        except Exception as e:
+            logging.error(f"❌ Video encoding with subtitles failed: {e}")
+            return False
+    def render_preview(self, video_path, subtitle_path, output_path, start=0.0, duration=10.0, height=None, fps=None):
+        """Burn subtitles into a small ultrafast proxy of [start, start + duration).
+
+        Input seeking decodes only the window. The subtitle times are absolute,
+        so frames are shifted back to source time for the ass filter and to
+        zero after it. Subtitles are drawn after the downscale, which keeps
+        libass cheap; their layout scales with the frame, so it matches the
+        final render.
+        """
+        if self.check_stop():
+            return False
+        height = height or self.PREVIEW_HEIGHT
+        fps = fps or self.PREVIEW_FPS
+        try:
+            logging.info(f"👁️ Preview render: {os.path.basename(video_path)} ({start:.1f}s + {duration:.1f}s)", extra={'is_status': True})
+            for file_path, file_type in [(video_path, "Video"), (subtitle_path, "Subtitle")]:
+                if not os.path.exists(file_path):
+                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
+            video_filter = (f"fps={fps},scale=-2:'min({height},ih)',setpts=PTS+{start:.3f}/TB,"
+                            f"ass='{self.escape_subtitle_path(subtitle_path)}',setpts=PTS-STARTPTS")
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "warning", "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+                "-i", str(Path(video_path).resolve()), "-vf", video_filter,
+                "-c:v", "libx264", "-preset", "ultrafast", "-crf", str(self.PREVIEW_CRF),
+                "-c:a", "aac", "-b:a", "96k", str(Path(output_path).resolve())
+            ]
+            started = time.time()
+            process = self.run_subprocess_with_timeout(cmd, timeout=600, check_stop_interval=0.1)
+            if process is None:
+                return False
+            if os.path.exists(output_path):
+                logging.info(f"✅ Preview ready in {time.time() - started:.1f}s: {os.path.basename(output_path)}")
+                return True
+            raise Exception("Preview output file was not created")
+        except subprocess.CalledProcessError as e:
+            logging.error(f"❌ Preview render failed: {e}. FFmpeg output: {e.stderr}")
+            return False
+        except Exception as e:
+            logging.error(f"❌ Preview render failed: {e}")
+            return False
+    def preview_video(self, video_path, output_path, subtitle_settings, start=0.0, duration=10.0, srt_path=None):
+        """Subtitle style check: subtitles for the window only, then render_preview().
+
+        Without an SRT only the window's audio is decoded and transcribed (and
+        cached like any other transcription). Auto-edit, merge and music are
+        skipped; the preview shows the source as it is.
+        """
+        fd, ass_path = tempfile.mkstemp(suffix=".ass")
+        os.close(fd)
+        try:
+            if srt_path:
+                self.generate_ass_from_srt(srt_path, ass_path, subtitle_settings)
+            else:
+                audio = load_audio(video_path, start=start, duration=duration, stop_check=self.check_stop)
+                if audio is None or not len(audio):
+                    logging.warning(f"⚠️ No audio in the preview window of {os.path.basename(video_path)}")
+                    return False
+                words = self.transcribe_audio_optimized(audio, label=f"{os.path.basename(video_path)} @ {start:.1f}s")
+                if not words:
+                    logging.warning("⚠️ No words transcribed in the preview window")
+                    return False
+                words = [dict(w, start=w["start"] + start, end=w["end"] + start) for w in words]
+                self.generate_ass_subtitles_enhanced(words, ass_path, subtitle_settings)
+            if not os.path.getsize(ass_path):
+                return False
+            return self.render_preview(video_path, ass_path, output_path, start, duration)
+        finally:
+            if os.path.exists(ass_path):
+                os.remove(ass_path)
+    def measure_ssim(self, encoded_path, source_path, start, duration):
+        """Mean SSIM (All) of encoded_path against the same window of source_path"""
+        cmd = [
+            "ffmpeg", "-nostdin", "-loglevel", "info", "-i", encoded_path,
+            "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", source_path,
+            "-lavfi", "[0:v][1:v]ssim", "-f", "null", "-"
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=3600)
+        for line in reversed(result.stderr.splitlines()):
+            if "SSIM" in line and "All:" in line:
+                return float(line.split("All:")[1].split()[0])
+        return None
+    def benchmark_encode_profiles(self, video_path, quality, start=0.0, duration=30.0, profiles=None):
+        """Encode one window of video_path with each x264 profile.
+
+        Returns [{"profile", "seconds", "size_mb", "ssim"}]; the video-only
+        encodes run one at a time, so the wall times are comparable.
+        """
+        results = []
+        temp_dir = tempfile.mkdtemp(prefix="x264_bench_")
+        try:
+            for profile in profiles or list(self.X264_PROFILES):
+                if self.check_stop():
+                    break
+                output_path = os.path.join(temp_dir, f"{profile}.mp4")
+                cmd = [
+                    "ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+                    "-i", video_path, "-an", *self.video_codec_args(quality, False, profile), output_path
+                ]
+                started = time.time()
+                subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=3600)
+                seconds = time.time() - started
+                result = {
+                    "profile": profile,
+                    "seconds": round(seconds, 2),
+                    "size_mb": round(os.path.getsize(output_path) / (1024 * 1024), 2),
+                    "ssim": self.measure_ssim(output_path, video_path, start, duration),
+                }
+                logging.info(f"⏱️ x264 '{profile}': {result['seconds']}s, {result['size_mb']} MB, SSIM {result['ssim']}")
+                results.append(result)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return results
+    def is_nvenc_available(self):
+        try:
+            result = subprocess.run(["ffmpeg", "-encoders"], capture_output=True, text=True, timeout=10)
+            return "h264_nvenc" in result.stdout
+        except Exception:
+            return False
+    def extract_audio(self, video_path):
+        """Decode the audio track straight into memory as 16 kHz mono float32.
+
+        Returns None on failure or stop; no temp file and no mp3 re-encode.
+        """
+        if self.check_stop():
+            return None
+        try:
+            logging.info(f"🔊 Extracting audio from: {os.path.basename(video_path)}")
+            audio = load_audio(video_path, stop_check=self.check_stop)
+            if audio is None:
+                return None
+            if len(audio) == 0:
+                raise Exception("No audio samples decoded")
+            logging.info(f"✅ Audio extracted successfully ({len(audio) / WHISPER_SAMPLE_RATE:.1f}s)")
+            return audio
+        except Exception as e:
+            logging.error(f"❌ Audio extraction failed: {e}")
+            return None
+    def process_all_videos(self, input_videos, extra_video, output_dir, background_music, quality, use_gpu, music_volume, enable_ducking, enable_auto_edit, subtitle_settings, use_external=False, external_srt_files=None, max_workers=1, stage_limits=None, fused_render=False, use_render_cache=True, loudness_target=None, x264_profile="standard", segment_encoding=True):
+        self.reset_counters()
+        try:
+            self.check_ffmpeg_availability()
+            self.render_cache = get_render_cache() if use_render_cache else None
+            self.loudness_target = loudness_target
+            total_videos = len(input_videos)
+            if total_videos == 0:
+                return
+            limits = self.configure_stage_limits(stage_limits)
+            self.configure_x264(x264_profile, limits.get("encode", 1))
+            self.segment_encoding = segment_encoding
+            workers = max(1, min(int(max_workers or 1), total_videos))
+            self.update_progress(0)
+            logging.info(f"⚙️ Pipeline: {workers} parallel video(s), stage limits {limits}")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="video-pipeline") as executor:
+                futures = [
+                    executor.submit(
+                        self.process_single_video, idx, video_path, total_videos, extra_video, output_dir,
+                        background_music, quality, use_gpu, music_volume, enable_ducking, enable_auto_edit,
+                        subtitle_settings, use_external, external_srt_files, fused_render
+                    )
+                    for idx, video_path in enumerate(input_videos, 1)
+                ]
+                for future in as_completed(futures):
+                    future.result()
+            if not self.check_stop():
+                logging.info(f"🎉 Completed processing {self.processed_videos}/{total_videos} videos", extra={'is_status': True})
+        except Exception as e:
+            logging.error(f"❌ Fatal error in processing pipeline: {e}", exc_info=True)
+            raise
+    def mark_video_done(self, total_videos):
+        with self.progress_lock:
+            self.processed_videos += 1
+            self.update_progress((self.processed_videos / total_videos) * 100)
+    def process_single_video(self, idx, video_path, total_videos, extra_video, output_dir, background_music, quality, use_gpu, music_volume, enable_ducking, enable_auto_edit, subtitle_settings, use_external=False, external_srt_files=None, fused_render=False):
+        if self.check_stop():
+            return
+        logging.info(f"📼 Processing video {idx}/{total_videos}: {os.path.basename(video_path)}", extra={'is_status': True})
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        temp_dir = tempfile.gettempdir()
+        # Robust title lookup
+        video_title = self.get_video_title(video_path)
+        if self.video_title_map:
+            try:
+                for item in self.video_title_map:
+                    if isinstance(item, dict) and "filename" in item and "title" in item:
+                        if item["filename"] == video_name:
+                            video_title = item["title"]
+                            break
+                else:
+                    logging.warning(f"No title found for '{video_name}' in video_title_map, using filename")
+            except Exception as e:
+                logging.warning(f"Invalid video_title_map structure: {e}, using filename")
+        temp_subtitle = os.path.join(temp_dir, f"temp_sub_{idx}.ass")
+        auto_edited_path = None
+        merged_path = None
+        music_output = None
+        # Render cache entries this video still reads; released when it is done
+        pinned = []
+        try:
+            final_output = os.path.join(output_dir, f"{video_title}_processed.mp4")
+            current_video = video_path
+            # Render cache key of current_video; each stage derives the next one
+            current_key = self.file_key(video_path)
+            if enable_auto_edit:
+                auto_edited_path = os.path.join(temp_dir, f"auto_edited_{idx}.mp4")
+                with self.pipeline_stage("auto_edit"):
+                    auto_edited, auto_key = self.run_cached_stage(
+                        "auto_edit", current_key, {"args": self.AUTO_EDIT_ARGS}, auto_edited_path,
+                        lambda: self.auto_edit_video(video_path, auto_edited_path), pins=pinned)
+                if auto_edited:
+                    current_video, current_key = auto_edited, auto_key
+            if extra_video:
+                merged_path = os.path.join(temp_dir, f"merged_{idx}.mp4")
+                extra_key = self.file_key(extra_video)
+                with self.pipeline_stage("merge"):
+                    merged, merge_key = self.run_cached_stage(
+                        "merge", current_key if extra_key else None, {"extra": extra_key}, merged_path,
+                        lambda: self.merge_videos(current_video, extra_video, merged_path), pins=pinned)
+                if merged:
+                    current_video, current_key = merged, merge_key
+                else:
+                    logging.warning("⚠️ Video merging failed, proceeding with current video")
+            # Generate subtitles after edits and merge
+            has_subs = False
+            words = None
+            if use_external:
+                srt_path = external_srt_files[idx - 1]
+                if os.path.exists(srt_path):
+                    self.generate_ass_from_srt(srt_path, temp_subtitle, subtitle_settings)
+                    has_subs = os.path.exists(temp_subtitle)
+                else:
+                    logging.warning(f"⚠️ SRT file not found for {video_name}: {srt_path}")
+            else:
+                with self.pipeline_stage("extract_audio"):
+                    audio = self.extract_audio(current_video)
+                if audio is not None:
+                    with self.pipeline_stage("transcribe"):
+                        words = self.transcribe_audio_optimized(audio, label=video_name)
+                    del audio
+                    if words:
+                        self.generate_ass_subtitles_enhanced(words, temp_subtitle, subtitle_settings)
+                        has_subs = os.path.exists(temp_subtitle)
+                    else:
+                        logging.warning(f"⚠️ No words transcribed for {video_name}")
+                else:
+                    logging.warning(f"⚠️ Audio extraction failed for {video_name}")
+            music_key = self.file_key(background_music) if background_music else None
+            music_params = {"music": music_key, "filter": self.build_music_filter(music_volume, enable_ducking)}
+            encode_params = {"quality": quality, "use_gpu": use_gpu, "loudness": self.loudness_target,
+                             "x264_profile": self.x264_profile}
+            if has_subs and self.render_cache is not None:
+                encode_params["subtitles"] = hash_text_file(temp_subtitle)
+            # Music and subtitles in a single encode pass, no intermediate MP4
+            if fused_render and background_music and has_subs:
+                with self.pipeline_stage("encode"):
+                    fused, _ = self.run_cached_stage(
+                        "fused_render", current_key if music_key else None, {**music_params, **encode_params}, final_output,
+                        lambda: self.render_with_music_and_subtitles(current_video, background_music, temp_subtitle, final_output, quality, use_gpu, music_volume, enable_ducking),
+                        final=True)
+                if fused:
+                    logging.info(f"✅ Processed {video_title} with subtitles and music (fused render)")
+                    return
+                if self.check_stop():
+                    return
+                logging.warning(f"⚠️ Fused render failed for {video_title}, falling back to separate music and encode passes")
+            # Add music
+            if background_music:
+                music_output = os.path.join(temp_dir, f"music_{idx}.mp4")
+                with self.pipeline_stage("music"):
+                    music_added, mixed_key = self.run_cached_stage(
+                        "music", current_key if music_key else None, music_params, music_output,
+                        lambda: self.add_background_music_with_ducking(current_video, background_music, music_output, music_volume, enable_ducking), pins=pinned)
+                if music_added:
+                    current_video, current_key = music_added, mixed_key
+                else:
+                    logging.warning("⚠️ Adding background music failed, proceeding without music")
+            # Encode with subs if available
+            if has_subs:
+                with self.pipeline_stage("encode"):
+                    encoded, _ = self.run_cached_stage(
+                        "encode", current_key, encode_params, final_output,
+                        lambda: self.encode_video_with_subtitles(current_video, temp_subtitle, final_output, quality, use_gpu),
+                        final=True)
+                if encoded:
+                    logging.info(f"✅ Processed {video_title} with subtitles")
+                else:
+                    logging.warning(f"⚠️ Encoding with subtitles failed for {video_title}, copying original")
+                    self._copy_file_safely(video_path, final_output)
+            else:
+                self._copy_file_safely(video_path, final_output)
+        except Exception as e:
+            logging.error(f"❌ Error processing video {video_name}: {e}", exc_info=True)
+            self.failed_videos.append(video_path)
+            self._copy_file_safely(video_path, os.path.join(output_dir, f"{video_title}_failed.mp4"))
+        finally:
+            if self.render_cache is not None and pinned:
+                self.render_cache.unpin(*pinned)
+            self.mark_video_done(total_videos)
+            temp_files = [temp_subtitle]
+            if auto_edited_path:
+                temp_files.append(auto_edited_path)
+            if merged_path:
+                temp_files.append(merged_path)
+            if music_output:
+                temp_files.append(music_output)
+            for temp_file in temp_files:
+                if temp_file and os.path.exists(temp_file):
+                    try:
+                        os.remove(temp_file)
+                    except Exception:
+                        pass
+
+# --- Job config (the JSON written by the GUI's "Save Config") ---
+def load_video_title_map(path="video_titles.json"):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.info("Video titles file not found, using empty mapping")
+    except json.JSONDecodeError as e:
+        logging.warning(f"Invalid JSON in {os.path.basename(path)}: {e}")
+    except Exception as e:
+        logging.warning(f"Could not load video titles: {e}")
+    return []
+def subtitle_settings_from_config(config):
+    return {
+        'color': config.get('subtitle_color', '#FFFFFF'),
+        'mode': config.get('subtitle_mode', 'single'),
+        'size': config.get('subtitle_size', 24),
+        'words_count': config.get('words_count', 3),
+        'enable_borders': config.get('enable_speech_borders', True),
+        'border_color': config.get('border_color', '#000000'),
+        'border_thickness': config.get('border_thickness', 3),
+        'font_family': config.get('font_family', 'Arial'),
+        'bold': config.get('bold', True),
+        'italic': config.get('italic', False),
+        'position': config.get('position', 'Bottom'),
+        'enable_animation': config.get('enable_animation', False),
+        'animation_type': config.get('animation_type', 'Fade In/Out'),
+        'prefix': config.get('prefix', ''),
+        'suffix': config.get('suffix', ''),
+        'case_style': config.get('case_style', 'Uppercase'),
+        'random_colors': config.get('random_colors', False),
+        'enable_bg_box': config.get('enable_bg_box', False),
+        'bg_opacity': config.get('bg_opacity', 0.5)
+    }
+def run_job_config(processor, config):
+    """Run one job config through processor.process_all_videos (defaults as in the GUI)"""
+    processor.process_all_videos(
+        config.get('input_videos', []),
+        config.get('extra_video') if config.get('enable_merge', False) else None,
+        config.get('output_dir'), config.get('background_music'),
+        config.get('quality_preset', 'fast'), config.get('enable_gpu', True),
+        config.get('music_volume', 0.30), config.get('enable_ducking', True),
+        config.get('enable_auto_edit', False), subtitle_settings_from_config(config),
+        config.get('use_external_subs', False), config.get('external_srt_files', []),
+        max_workers=config.get('parallel_videos', 2), fused_render=config.get('fused_render', True),
+        use_render_cache=config.get('render_cache', True),
+        loudness_target=DEFAULT_TARGET_LUFS if config.get('normalize_loudness', False) else None,
+        x264_profile=config.get('x264_profile', 'standard'),
+        segment_encoding=config.get('segment_encoding', True)
+    )
+def preview_job_config(processor, config, video_index=0, start=0.0, duration=10.0):
+    """Render <output_dir>/<title>_preview.mp4 for one video of a job config.
+
+    Returns the preview path, or None if it could not be rendered.
+    """
+    videos = config.get('input_videos') or []
+    if not 0 <= video_index < len(videos):
+        raise ValueError(f"No input video #{video_index + 1} in this job")
+    video_path = videos[video_index]
+    srt_path = None
+    if config.get('use_external_subs', False):
+        srt_files = config.get('external_srt_files') or []
+        srt_path = srt_files[video_index] if video_index < len(srt_files) else None
+        if not srt_path or not os.path.exists(srt_path):
+            raise ValueError(f"SRT file not found for {os.path.basename(video_path)}")
+    output_path = os.path.join(config.get('output_dir') or tempfile.gettempdir(),
+                               f"{processor.get_video_title(video_path)}_preview.mp4")
+    if processor.preview_video(video_path, output_path, subtitle_settings_from_config(config),
+                               start, duration, srt_path):
+        return output_path
+    return None
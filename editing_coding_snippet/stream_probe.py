@@ -0,0 +1,219 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+import subprocess
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Optional
+
+# Stream-compatibility probe for concatenation. Joining clips used to mean
+# re-encoding every input (or blindly stream-copying and hoping they match).
+# Here each input is probed once with ffprobe (cached per path, size and
+# mtime) and reduced to a concat signature: video codec, profile, size,
+# pixel format and frame rate plus audio codec, sample rate and channels.
+# Inputs whose signature equals the reference (the clip with the longest
+# duration) are only remuxed to MPEG-TS with -c copy; the others are
+# re-encoded to match it. The TS parts are then joined with the concat
+# demuxer, again without re-encoding.
+#
+# MPEG-TS carries everything on one 90 kHz clock and repeats the H.264
+# parameter sets in-band, so container time bases and encoder-specific
+# headers of otherwise matching inputs do not force a re-encode.
+
+ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "mpeg4": "mpeg4",
+    "vp9": "libvpx-vp9",
+}
+AUDIO_ENCODERS = {
+    "aac": "aac",
+    "mp3": "libmp3lame",
+    "opus": "libopus",
+    "ac3": "ac3",
+}
+H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+
+
+class StreamProbeError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """First video and audio stream of a media file, as ffprobe reports them"""
+    duration: float
+    video_codec: Optional[str] = None
+    profile: Optional[str] = None
+    width: int = 0
+    height: int = 0
+    pix_fmt: Optional[str] = None
+    frame_rate: Optional[str] = None
+    time_base: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: int = 0
+    channels: int = 0
+
+    def signature(self):
+        """Fields that must be equal for two clips to be concatenated by stream copy"""
+        return (self.video_codec, self.profile, self.width, self.height, self.pix_fmt, self.frame_rate,
+                self.audio_codec, self.sample_rate, self.channels)
+
+    def mismatches(self, other):
+        names = ("codec", "profile", "width", "height", "pix_fmt", "fps", "audio", "sample_rate", "channels")
+        return [name for name, mine, theirs in zip(names, self.signature(), other.signature()) if mine != theirs]
+
+    def describe(self):
+        audio = f"{self.audio_codec} {self.sample_rate} Hz x{self.channels}" if self.audio_codec else "no audio"
+        return f"{self.video_codec} {self.width}x{self.height} {self.pix_fmt} @ {self.frame_rate}, {audio}"
+
+
+def _popen_kwargs():
+    return {'creationflags': subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}
+
+
+@lru_cache(maxsize=256)
+def _probe(path, size, mtime_ns):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries",
+         "format=duration:stream=codec_type,codec_name,profile,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels",
+         "-of", "json", path],
+        capture_output=True, text=True, timeout=60, **_popen_kwargs()
+    )
+    if result.returncode != 0:
+        raise StreamProbeError(f"ffprobe failed for {os.path.basename(path)}: {result.stderr.strip()[:300]}")
+    data = json.loads(result.stdout or "{}")
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    try:
+        duration = float(data.get("format", {}).get("duration", 0) or 0)
+    except ValueError:
+        duration = 0.0
+    return StreamInfo(
+        duration=duration,
+        video_codec=video.get("codec_name"),
+        profile=video.get("profile"),
+        width=int(video.get("width") or 0),
+        height=int(video.get("height") or 0),
+        pix_fmt=video.get("pix_fmt"),
+        frame_rate=video.get("r_frame_rate"),
+        time_base=video.get("time_base"),
+        audio_codec=audio.get("codec_name"),
+        sample_rate=int(audio.get("sample_rate") or 0),
+        channels=int(audio.get("channels") or 0),
+    )
+
+
+def probe_streams(path):
+    """StreamInfo of path; repeated probes of an unchanged file are free"""
+    path = os.path.abspath(str(path))
+    stat = os.stat(path)
+    return _probe(path, stat.st_size, stat.st_mtime_ns)
+
+
+def choose_reference(infos):
+    """The format to conform to: the one covering the most playback time, so the least is re-encoded"""
+    totals = {}
+    for info in infos:
+        totals[info.signature()] = totals.get(info.signature(), 0.0) + info.duration
+    best = max(totals, key=totals.get)
+    return next(info for info in infos if info.signature() == best)
+
+
+def remux_ts_command(path, output_ts):
+    return ["ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-i", str(path),
+            "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", "-f", "mpegts", str(output_ts)]
+
+
+def conform_command(path, output_ts, reference, info=None):
+    """Re-encode path into MPEG-TS with reference's stream parameters"""
+    info = info or probe_streams(path)
+    if reference.video_codec not in ENCODERS:
+        raise StreamProbeError(f"No encoder to match video codec {reference.video_codec}")
+    cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-i", str(path)]
+    add_silence = reference.audio_codec and not info.audio_codec
+    if add_silence:
+        layout = "mono" if reference.channels == 1 else "stereo"
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={reference.sample_rate}:cl={layout}"]
+    w, h = reference.width, reference.height
+    video_filter = (f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+                    f"setsar=1,fps={reference.frame_rate},format={reference.pix_fmt}")
+    cmd += ["-map", "0:v:0", "-vf", video_filter, "-c:v", ENCODERS[reference.video_codec], "-preset", "fast", "-crf", "20"]
+    if reference.video_codec == "h264" and reference.profile in H264_PROFILES:
+        cmd += ["-profile:v", H264_PROFILES[reference.profile]]
+    if reference.audio_codec:
+        cmd += ["-map", "1:a:0" if add_silence else "0:a:0",
+                "-c:a", AUDIO_ENCODERS.get(reference.audio_codec, "aac"), "-b:a", "192k",
+                "-ar", str(reference.sample_rate), "-ac", str(reference.channels)]
+        if add_silence:
+            cmd += ["-shortest"]
+    else:
+        cmd += ["-an"]
+    return cmd + ["-f", "mpegts", str(output_ts)]
+
+
+def _run(cmd):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True, **_popen_kwargs())
+
+
+def prepare_for_concat(path, output_ts, reference, runner=None):
+    """Write path as an MPEG-TS part matching reference. Returns True if it was
+    stream-copied, False if it had to be re-encoded; None if runner reports a stop."""
+    runner = runner or _run
+    info = probe_streams(path)
+    if info.signature() == reference.signature():
+        copied = True
+        cmd = remux_ts_command(path, output_ts)
+    else:
+        copied = False
+        logging.info(f"Re-encoding {os.path.basename(str(path))} to match ({', '.join(info.mismatches(reference))} differ): "
+                     f"{info.describe()} -> {reference.describe()}")
+        cmd = conform_command(path, output_ts, reference, info)
+    if runner(cmd) is None:
+        return None
+    return copied
+
+
+def concat_videos(paths, output_path, runner=None, temp_dir=None):
+    """Join paths into output_path, re-encoding only the clips that do not match.
+
+    runner(cmd) runs one ffmpeg command (raises CalledProcessError on failure,
+    may return None when stopped). Returns the number of re-encoded clips, or
+    None if stopped.
+    """
+    runner = runner or _run
+    reference = choose_reference([probe_streams(path) for path in paths])
+    work_dir = tempfile.mkdtemp(prefix="concat_", dir=temp_dir)
+    try:
+        parts = []
+        reencoded = 0
+        for i, path in enumerate(paths):
+            part = os.path.join(work_dir, f"part_{i:03d}.ts")
+            copied = prepare_for_concat(path, part, reference, runner)
+            if copied is None:
+                return None
+            reencoded += not copied
+            parts.append(part)
+        list_path = os.path.join(work_dir, "parts.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for part in parts:
+                f.write("file '{}'\n".format(part.replace("\\", "/").replace("'", "'\\''")))
+        cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+               "-map", "0:v", "-map", "0:a?", "-c", "copy", "-movflags", "+faststart", str(output_path)]
+        if runner(cmd) is None:
+            return None
+        logging.info(f"Joined {len(paths)} clips: {len(paths) - reencoded} stream-copied, {reencoded} re-encoded")
+        return reencoded
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,217 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+
+# On-disk cache of Whisper results shared by all the subtitle tools.
+# Entries are keyed by audio content hash + model name + decode parameters,
+# so re-rendering already transcribed footage (e.g. after a subtitle style
+# change) skips Whisper entirely.
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WHISPER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "whisper_transcripts")
+)
+DEFAULT_MAX_MB = float(os.environ.get("WHISPER_CACHE_MAX_MB", "512"))
+CACHE_FORMAT_VERSION = 1
+TIME_FIELDS = ("start", "end")
+
+
+def hash_audio_file(audio_path, block_size=1024 * 1024):
+    """SHA-256 of the audio file content"""
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_audio(audio):
+    """SHA-256 of a file path's content or of an in-memory sample array"""
+    if isinstance(audio, (str, os.PathLike)):
+        return hash_audio_file(audio)
+    digest = hashlib.sha256()
+    digest.update(f"{audio.dtype.str}{audio.shape}".encode("utf-8"))
+    if not audio.flags.c_contiguous:
+        audio = audio.copy()
+    digest.update(memoryview(audio).cast("B"))
+    return digest.hexdigest()
+
+
+def describe_audio(audio):
+    if isinstance(audio, (str, os.PathLike)):
+        return os.path.basename(str(audio))
+    return "in-memory audio"
+
+
+def encode_records(records):
+    """Pack a list of word/segment dicts into compact columnar JSON + zlib.
+
+    Times are stored as integer milliseconds and the field names only once.
+    """
+    fields = []
+    for record in records:
+        for key in record:
+            if key not in fields:
+                fields.append(key)
+    rows = []
+    for record in records:
+        row = []
+        for field in fields:
+            value = record.get(field)
+            if field in TIME_FIELDS and value is not None:
+                value = int(round(float(value) * 1000))
+            elif isinstance(value, float):
+                value = round(value, 4)
+            row.append(value)
+        rows.append(row)
+    payload = {"v": CACHE_FORMAT_VERSION, "fields": fields, "rows": rows}
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_records(blob):
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    if payload.get("v") != CACHE_FORMAT_VERSION:
+        return None
+    fields = payload["fields"]
+    records = []
+    for row in payload["rows"]:
+        record = {}
+        for field, value in zip(fields, row):
+            if value is None:
+                continue
+            if field in TIME_FIELDS:
+                value = value / 1000.0
+            record[field] = value
+        records.append(record)
+    return records
+
+
+class TranscriptionCache:
+    """Size-bounded LRU cache of transcriptions stored as one file per entry.
+
+    Recency is tracked with the file mtime (bumped on every hit), so the
+    cache can be shared safely between several GUIs and scripts.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = int((DEFAULT_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, audio, model_name, params=None, audio_hash=None):
+        audio_hash = audio_hash or hash_audio(audio)
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        raw = f"{audio_hash}|{model_name}|{params_json}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wtc")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                records = decode_records(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable transcription cache entry {key[:12]}: {e}")
+            self.remove(key)
+            return None
+        if records is None:
+            self.remove(key)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return records
+
+    def put(self, key, records):
+        blob = encode_records(records)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(temp_path, self.entry_path(key))
+        except Exception as e:
+            logging.warning(f"Could not write transcription cache entry: {e}")
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+        self.evict()
+
+    def remove(self, key):
+        try:
+            os.remove(self.entry_path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        with self.lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".wtc"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_transcription_cache():
+    """Process-wide cache instance using WHISPER_CACHE_DIR / WHISPER_CACHE_MAX_MB"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptionCache()
+        return _default_cache
+
+
+def cached_transcription(audio, model_name, params, transcribe_fn, cache=None):
+    """Return cached records for audio (path or samples) or run transcribe_fn() and store them.
+
+    Empty results are not cached so a failed run is retried next time.
+    """
+    cache = cache or get_transcription_cache()
+    try:
+        key = cache.make_key(audio, model_name, params)
+    except Exception as e:
+        logging.warning(f"Transcription cache unavailable: {e}")
+        return transcribe_fn()
+    records = cache.get(key)
+    if records is not None:
+        logging.info(f"⚡ Transcription cache hit: {describe_audio(audio)} ({len(records)} entries)")
+        return records
+    records = transcribe_fn()
+    if records:
+        cache.put(key, records)
+    return records
@@ -5,7 +5,8 @@ import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from pathlib import Path
 import logging
-from faster_whisper import WhisperModel
+from whisper_server import load_whisper_model
+from transcription_cache import get_transcription_cache
 import ffmpeg
 import re
 import threading
@@ -216,8 +217,29 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
     
     model = None
     all_words = []
+    cache = get_transcription_cache()
+    cache_key = None
     
     try:
+        # Decode options that affect the result; any change invalidates cached words
+        cache_params = {
+            "beam_size": 5, "word_timestamps": True, "language": "en",
+            "condition_on_previous_text": False, "temperature": 0.0,
+            "compression_ratio_threshold": 2.4, "log_prob_threshold": -1.0,
+            "no_speech_threshold": 0.6, "initial_prompt": "This is a tutorial video with clear speech.",
+            "single_pass_limit": 600, "chunk_duration": 180, "overlap_duration": 10
+        }
+        try:
+            cache_key = cache.make_key(audio_path, "base", cache_params)
+            cached_words = cache.get(cache_key)
+            if cached_words is not None:
+                logging.info(f"⚡ Transcription cache hit: {len(cached_words)} words, skipping Whisper")
+                if progress_callback:
+                    progress_callback()
+                return cached_words
+        except Exception as e:
+            logging.warning(f"Transcription cache unavailable: {e}")
+        
         # Get audio duration
         try:
             probe = ffmpeg.probe(str(audio_path))
@@ -234,7 +256,7 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
         
         # Initialize model with optimal settings for longer transcription
         logging.info("Loading Whisper model...")
-        model = WhisperModel("base", device="cpu", compute_type="int8", num_workers=1)
+        model = load_whisper_model("base", device="cpu", compute_type="int8", num_workers=1)
         
         # Determine processing strategy based on duration
         if duration <= 600:  # 10 minutes or less - process as single file
@@ -461,6 +483,9 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
         else:
             logging.warning("No words extracted from transcription")
         
+        if all_words and cache_key:
+            cache.put(cache_key, all_words)
+        
         return all_words
         
     except Exception as e:
@@ -5,16 +5,19 @@ import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, colorchooser, font
 from pathlib import Path
 import logging
-from faster_whisper import WhisperModel
-import ffmpeg
+from whisper_server import load_whisper_model
+from transcription_cache import get_transcription_cache, hash_audio
+from audio_source import load_audio, WHISPER_SAMPLE_RATE
+from segment_encoder import plan_segments, encode_segmented, SegmentEncodeError
 import re
 import threading
-import tempfile
 import time
 import atexit
 import signal
 import sys
 import gc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 
@@ -194,51 +197,179 @@ def get_video_duration(file_path):
         logging.warning(f"Could not get video duration: {e}")
         return 300.0
 
-def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3600):
+# Decode options shared by the single-pass, serial-chunk and parallel-chunk paths
+WHISPER_DECODE_OPTIONS = {
+    "beam_size": 5,
+    "word_timestamps": True,
+    "language": "en",
+    "condition_on_previous_text": False,
+    "temperature": 0.0,
+    "compression_ratio_threshold": 2.4,
+    "log_prob_threshold": -1.0,
+    "no_speech_threshold": 0.6,
+    "initial_prompt": "This is a tutorial video with clear speech."
+}
+
+# Processes used to decode long-audio chunks in parallel (1 = serial)
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", max(1, min(4, (os.cpu_count() or 2) // 2))))
+
+# Parallel libx264 encoders for the subtitle burn of long videos (1 = single pass)
+ENCODE_WORKERS = int(os.environ.get("ENCODE_WORKERS", os.cpu_count() or 1))
+
+_CHUNK_MODEL = None
+
+def _init_chunk_worker(model_size, cpu_threads):
+    """Pool initializer: every worker process owns one int8 CTranslate2 model"""
+    global _CHUNK_MODEL
+    from faster_whisper import WhisperModel
+    _CHUNK_MODEL = WhisperModel(model_size, device="cpu", compute_type="int8", cpu_threads=cpu_threads, num_workers=1)
+
+def chunk_samples(audio, chunk_info):
+    """Slice one chunk out of the in-memory 16 kHz track (a view, no copy)"""
+    return audio[int(chunk_info['start'] * WHISPER_SAMPLE_RATE):int(chunk_info['end'] * WHISPER_SAMPLE_RATE)]
+
+def _transcribe_chunk_worker(chunk_audio, chunk_info):
+    """Transcribe one chunk's samples and return its words on the absolute timeline"""
+    start_time = chunk_info['start']
+    if len(chunk_audio) < WHISPER_SAMPLE_RATE // 10:
+        return chunk_info['chunk_id'], []
+    
+    segments, info = _CHUNK_MODEL.transcribe(chunk_audio, **WHISPER_DECODE_OPTIONS)
+    
+    words = []
+    for segment in segments:
+        if hasattr(segment, 'words') and segment.words:
+            for w in segment.words:
+                if (w.word and w.word.strip() and
+                    w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
+                    words.append({
+                        "word": w.word.strip(),
+                        "start": float(w.start) + start_time,
+                        "end": float(w.end) + start_time
+                    })
+    return chunk_info['chunk_id'], words
+
+def stitch_chunk_words(chunks, chunk_words):
+    """
+    Deterministically merge per-chunk words into one timeline.
+    
+    Chunk k covers [start, processing_end + overlap] and chunk k+1 starts at
+    processing_end, so both have audio for the overlap window. The seam is put
+    in the middle of that window, where neither chunk is cut mid-context:
+    words starting before the seam come from chunk k, the rest from chunk k+1.
+    A word repeated right at the seam is kept once.
+    """
+    merged = []
+    previous_seam = 0.0
+    for index, chunk_info in enumerate(chunks):
+        if index + 1 < len(chunks):
+            seam = (chunk_info['processing_end'] + chunk_info['end']) / 2
+        else:
+            seam = float('inf')
+        for word in sorted(chunk_words.get(chunk_info['chunk_id'], []), key=lambda w: w["start"]):
+            if not (previous_seam <= word["start"] < seam):
+                continue
+            if merged:
+                last_word = merged[-1]
+                if (word["word"].lower() == last_word["word"].lower() and
+                        word["start"] < last_word["end"]):
+                    continue
+            merged.append(word)
+        previous_seam = seam
+    return merged
+
+def transcribe_chunks_parallel(audio, chunks, workers, progress_callback=None, model_size="base"):
+    """Decode overlapping chunks concurrently and stitch them at the overlap seams"""
+    workers = max(1, min(workers, len(chunks)))
+    cpu_threads = max(1, (os.cpu_count() or workers) // workers)
+    logging.info(f"Transcribing {len(chunks)} chunks in parallel with {workers} processes ({cpu_threads} threads each)")
+    
+    chunk_words = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_chunk_worker,
+                             initargs=(model_size, cpu_threads)) as executor:
+        futures = {
+            executor.submit(_transcribe_chunk_worker, chunk_samples(audio, chunk_info), chunk_info): chunk_info
+            for chunk_info in chunks
+        }
+        for future in as_completed(futures):
+            chunk_info = futures[future]
+            try:
+                chunk_id, words = future.result()
+                chunk_words[chunk_id] = words
+                logging.info(f"Chunk {chunk_id + 1}/{len(chunks)} complete: {len(words)} words extracted")
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                logging.warning(f"Failed to process chunk {chunk_info['chunk_id'] + 1}: {e}")
+            if progress_callback:
+                progress_callback()
+    
+    return stitch_chunk_words(chunks, chunk_words)
+
+def transcribe_audio_improved(audio, progress_callback=None, max_duration=3600, parallel_workers=None):
     """
     FIXED: More robust transcription with proper timestamp synchronization for long videos
+    
+    audio is a media file path or 16 kHz mono float32 samples from load_audio().
+    Audio longer than 10 minutes is split into overlapping chunks; with
+    parallel_workers > 1 the chunks are decoded concurrently in a process pool.
     """
-    logging.info(f"🧠 Starting transcription: {audio_path}")
+    if parallel_workers is None:
+        parallel_workers = TRANSCRIBE_WORKERS
     
-    if not os.path.exists(audio_path):
-        logging.error(f"Audio file not found: {audio_path}")
-        return []
+    if isinstance(audio, (str, Path)):
+        logging.info(f"🧠 Starting transcription: {audio}")
+        if not os.path.exists(audio):
+            logging.error(f"Audio file not found: {audio}")
+            return []
+        try:
+            audio = load_audio(audio)
+        except Exception as e:
+            logging.error(f"Could not decode audio: {e}")
+            return []
+    else:
+        logging.info(f"🧠 Starting transcription: {len(audio) / WHISPER_SAMPLE_RATE:.1f}s of in-memory audio")
     
     model = None
     all_words = []
+    cache = get_transcription_cache()
+    cache_key = None
+    audio_hash = None
     
     try:
+        # Decode options that affect the result; any change invalidates cached words.
+        # chunk_merge is the path expected to run; the key is rebuilt if another one does
+        cache_params = {
+            **WHISPER_DECODE_OPTIONS,
+            "single_pass_limit": 600, "chunk_duration": 180, "overlap_duration": 10,
+            "chunk_merge": "overlap_seam" if parallel_workers > 1 else "serial_dedupe"
+        }
         try:
-            probe = ffmpeg.probe(str(audio_path))
-            duration = float(probe['format']['duration'])
-            logging.info(f"Audio duration: {duration:.1f} seconds")
+            audio_hash = hash_audio(audio)
+            cache_key = cache.make_key(audio, "base", cache_params, audio_hash=audio_hash)
+            cached_words = cache.get(cache_key)
+            if cached_words is not None:
+                logging.info(f"⚡ Transcription cache hit: {len(cached_words)} words, skipping Whisper")
+                if progress_callback:
+                    progress_callback()
+                return cached_words
         except Exception as e:
-            logging.warning(f"Could not get audio duration: {e}")
-            duration = 300.0
+            logging.warning(f"Transcription cache unavailable: {e}")
+        
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        logging.info(f"Audio duration: {duration:.1f} seconds")
         
         if duration <= 0:
             logging.error("Invalid audio duration")
             return []
         
-        logging.info("Loading Whisper model...")
-        model = WhisperModel("base", device="cpu", compute_type="int8", num_workers=1)
-        
         if duration <= 600:
             logging.info("Processing audio in single pass (≤10 minutes)")
+            logging.info("Loading Whisper model...")
+            model = load_whisper_model("base", device="cpu", compute_type="int8", num_workers=1)
             
             try:
-                segments, info = model.transcribe(
-                    str(audio_path),
-                    beam_size=5,
-                    word_timestamps=True,
-                    language="en",
-                    condition_on_previous_text=False,
-                    temperature=0.0,
-                    compression_ratio_threshold=2.4,
-                    log_prob_threshold=-1.0,
-                    no_speech_threshold=0.6,
-                    initial_prompt="This is a tutorial video with clear speech."
-                )
+                segments, info = model.transcribe(audio, **WHISPER_DECODE_OPTIONS)
                 
                 word_count = 0
                 for segment in segments:
@@ -291,98 +422,76 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
             total_chunks = len(chunks)
             logging.info(f"Processing long audio in {total_chunks} overlapping chunks of {chunk_duration}s each")
             
-            for chunk_info in chunks:
-                start_time = chunk_info['start']
-                end_time = chunk_info['end']
-                processing_end = chunk_info['processing_end']
-                chunk_id = chunk_info['chunk_id']
-                
-                logging.info(f"Processing chunk {chunk_id + 1}/{total_chunks}: {start_time:.1f}s - {end_time:.1f}s (process until {processing_end:.1f}s)")
-                
-                chunk_path = None
+            parallel_words = None
+            if parallel_workers > 1 and total_chunks > 1:
                 try:
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        chunk_path = temp_file.name
-                    
-                    TEMP_FILES.append(chunk_path)
-                    
-                    chunk_timeout = min(300, int((end_time - start_time) * 2))
-                    
-                    run_subprocess_safe([
-                        "ffmpeg", "-y", "-i", str(audio_path),
-                        "-ss", str(start_time), 
-                        "-t", str(end_time - start_time),
-                        "-acodec", "pcm_s16le", 
-                        "-ar", "16000", 
-                        "-ac", "1",
-                        "-avoid_negative_ts", "make_zero",
-                        chunk_path
-                    ], timeout=chunk_timeout)
-                    
-                    if not os.path.exists(chunk_path) or os.path.getsize(chunk_path) < 1000:
-                        logging.warning(f"Chunk {chunk_id + 1} failed to create or too small, skipping")
-                        continue
+                    parallel_words = transcribe_chunks_parallel(audio, chunks, parallel_workers, progress_callback)
+                except Exception as e:
+                    logging.warning(f"Parallel chunk transcription failed ({e}), falling back to serial processing")
+            
+            if parallel_words is not None:
+                all_words = parallel_words
+            else:
+                if cache_key and cache_params["chunk_merge"] != "serial_dedupe":
+                    # Parallel decoding fell back: store under the serial key
+                    cache_key = cache.make_key(audio, "base", {**cache_params, "chunk_merge": "serial_dedupe"},
+                                               audio_hash=audio_hash)
+                logging.info("Loading Whisper model...")
+                model = load_whisper_model("base", device="cpu", compute_type="int8", num_workers=1)
+                for chunk_info in chunks:
+                    start_time = chunk_info['start']
+                    end_time = chunk_info['end']
+                    processing_end = chunk_info['processing_end']
+                    chunk_id = chunk_info['chunk_id']
                     
-                    segments, info = model.transcribe(
-                        chunk_path,
-                        beam_size=5,
-                        word_timestamps=True,
-                        language="en",
-                        condition_on_previous_text=False,
-                        temperature=0.0,
-                        compression_ratio_threshold=2.4,
-                        log_prob_threshold=-1.0,
-                        no_speech_threshold=0.6,
-                        initial_prompt="This is a tutorial video with clear speech."
-                    )
+                    logging.info(f"Processing chunk {chunk_id + 1}/{total_chunks}: {start_time:.1f}s - {end_time:.1f}s (process until {processing_end:.1f}s)")
                     
-                    chunk_words = 0
-                    for segment in segments:
-                        if hasattr(segment, 'words') and segment.words:
-                            for w in segment.words:
-                                if (w.word and w.word.strip() and 
-                                    hasattr(w, 'start') and hasattr(w, 'end') and
-                                    w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
-                                    
-                                    adjusted_start = float(w.start) + start_time
-                                    adjusted_end = float(w.end) + start_time
-                                    
-                                    if adjusted_start < processing_end:
-                                        is_duplicate = False
-                                        for existing_word in all_words[-10:]:
-                                            if (abs(existing_word["start"] - adjusted_start) < 0.1 and 
-                                                existing_word["word"].strip().lower() == w.word.strip().lower()):
-                                                is_duplicate = True
-                                                break
+                    try:
+                        chunk_audio = chunk_samples(audio, chunk_info)
+                        if len(chunk_audio) < WHISPER_SAMPLE_RATE // 10:
+                            logging.warning(f"Chunk {chunk_id + 1} too small, skipping")
+                            continue
+                        
+                        segments, info = model.transcribe(chunk_audio, **WHISPER_DECODE_OPTIONS)
+                        
+                        chunk_words = 0
+                        for segment in segments:
+                            if hasattr(segment, 'words') and segment.words:
+                                for w in segment.words:
+                                    if (w.word and w.word.strip() and 
+                                        hasattr(w, 'start') and hasattr(w, 'end') and
+                                        w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
+                                        
+                                        adjusted_start = float(w.start) + start_time
+                                        adjusted_end = float(w.end) + start_time
                                         
-                                        if not is_duplicate:
-                                            adjusted_word = {
-                                                "word": w.word.strip(),
-                                                "start": adjusted_start,
-                                                "end": adjusted_end
-                                            }
-                                            all_words.append(adjusted_word)
-                                            chunk_words += 1
+                                        if adjusted_start < processing_end:
+                                            is_duplicate = False
+                                            for existing_word in all_words[-10:]:
+                                                if (abs(existing_word["start"] - adjusted_start) < 0.1 and 
+                                                    existing_word["word"].strip().lower() == w.word.strip().lower()):
+                                                    is_duplicate = True
+                                                    break
+                                            
+                                            if not is_duplicate:
+                                                adjusted_word = {
+                                                    "word": w.word.strip(),
+                                                    "start": adjusted_start,
+                                                    "end": adjusted_end
+                                                }
+                                                all_words.append(adjusted_word)
+                                                chunk_words += 1
+                        
+                        logging.info(f"Chunk {chunk_id + 1} complete: {chunk_words} words extracted")
+                        
+                        if progress_callback:
+                            progress_callback()
                     
-                    logging.info(f"Chunk {chunk_id + 1} complete: {chunk_words} words extracted")
+                    except Exception as e:
+                        logging.warning(f"Failed to process chunk {chunk_id + 1}: {e}")
+                        continue
                     
-                    if progress_callback:
-                        progress_callback()
-                
-                except Exception as e:
-                    logging.warning(f"Failed to process chunk {chunk_id + 1}: {e}")
-                    continue
-                
-                finally:
-                    if chunk_path and os.path.exists(chunk_path):
-                        try:
-                            os.remove(chunk_path)
-                            if chunk_path in TEMP_FILES:
-                                TEMP_FILES.remove(chunk_path)
-                        except Exception as e:
-                            logging.warning(f"Could not remove chunk: {e}")
-                
-                time.sleep(0.1)
+                    time.sleep(0.1)
         
         if all_words:
             all_words = sorted(all_words, key=lambda x: x["start"])
@@ -418,6 +527,9 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
             
             logging.info(f"FIXED: Transcription complete with synchronized timestamps: {len(all_words)} valid words extracted")
         
+        if all_words and cache_key:
+            cache.put(cache_key, all_words)
+        
         return all_words
         
     except Exception as e:
@@ -670,7 +782,6 @@ def process_video_with_settings(input_video, output_video, background_music, sub
     
     temp_files = {
         'auto_edited': f"auto_{safe_base_name}_{timestamp}_{pid}.mp4",
-        'audio_path': f"temp_{safe_base_name}_{timestamp}_{pid}.wav", 
         'highlighted_ass': f"highlighted_{safe_base_name}_{timestamp}_{pid}.ass",
         'title_ass': f"title_{safe_base_name}_{timestamp}_{pid}.ass",
         'final_subs': f"final_subs_{safe_base_name}_{timestamp}_{pid}.mp4",
@@ -719,17 +830,14 @@ def process_video_with_settings(input_video, output_video, background_music, sub
         if use_transcription and (subtitle_individual or subtitle_highlighted or background_music):
             logging.info("ENHANCED: Starting synchronized transcription process...")
             
-            audio_timeout = max(300, int(video_duration))
-            run_subprocess_safe([
-                "ffmpeg", "-y", "-i", str(video_to_process),
-                "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", 
-                temp_files['audio_path']
-            ], timeout=audio_timeout)
+            # Decoded straight into memory, no temp WAV
+            audio = load_audio(video_to_process)
             
             if progress_callback:
                 progress_callback()
             
-            words = transcribe_audio_improved(temp_files['audio_path'], progress_callback)
+            words = transcribe_audio_improved(audio, progress_callback)
+            del audio
             
             if subtitle_highlighted and words:
                 subtitle_groups = group_words_into_subtitles_improved(
@@ -776,13 +884,29 @@ def process_video_with_settings(input_video, output_video, background_music, sub
             if filter_parts:
                 filter_complex = ",".join(filter_parts)
                 subtitle_timeout = max(1800, int(video_duration * 4))
+                codec_args = ["-c:v", "libx264", "-crf", "23", "-preset", "medium"]
                 
-                run_subprocess_safe([
-                    "ffmpeg", "-y", "-i", str(video_to_process),
-                    "-filter_complex", filter_complex,
-                    "-map", "0:a", "-c:v", "libx264", "-crf", "23", "-preset", "medium",
-                    "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", temp_files['final_subs']
-                ], timeout=subtitle_timeout)
+                # Long videos: encode keyframe-aligned segments in parallel and concat them
+                segmented = False
+                if ENCODE_WORKERS > 1:
+                    try:
+                        segments = plan_segments(video_to_process, ENCODE_WORKERS)
+                        if len(segments) > 1:
+                            segmented = encode_segmented(
+                                video_to_process, temp_files['final_subs'], codec_args, filter_complex,
+                                segments, ENCODE_WORKERS, audio_args=["-c:a", "aac", "-b:a", "128k"],
+                                runner=lambda cmd: run_subprocess_safe(cmd, timeout=subtitle_timeout)
+                            )
+                    except (SegmentEncodeError, subprocess.CalledProcessError) as e:
+                        logging.warning(f"Segment-parallel encode failed, encoding in one pass: {e}")
+                
+                if not segmented:
+                    run_subprocess_safe([
+                        "ffmpeg", "-y", "-i", str(video_to_process),
+                        "-filter_complex", filter_complex,
+                        "-map", "0:a", *codec_args,
+                        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", temp_files['final_subs']
+                    ], timeout=subtitle_timeout)
             else:
                 run_subprocess_safe([
                     "ffmpeg", "-y", "-i", str(video_to_process),
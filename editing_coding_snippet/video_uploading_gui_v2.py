@@ -1,16 +1,17 @@
 import os
 import json
-import time
 import threading
 from datetime import datetime
 import pytz
 from tkinter import *
 from tkinter import ttk, filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
+from youtube_client import YouTubeClient
+from youtube_store import build_youtube, YouTubeSync
+from resumable_upload import BatchUploader, UPLOAD_WORKERS, CHUNK_SIZE
 
 # Constants
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload", "https://www.googleapis.com/auth/youtube.force-ssl"]
@@ -30,6 +31,11 @@ class YouTubeUploaderGUI:
         
         # Variables
         self.youtube_service = None
+        self.client = None
+        self.sync = None
+        self.playlist_ids = None  # title -> id, loaded once per session
+        self.playlist_lock = threading.Lock()
+        self.batch_stop_event = threading.Event()
         self.client_secret_file = None
         self.video_file = None
         self.thumbnail_file = None
@@ -243,10 +249,30 @@ class YouTubeUploaderGUI:
         self.videos_listbox = Listbox(list_frame, height=15)
         self.videos_listbox.pack(fill=BOTH, expand=True, padx=5, pady=5)
         
-        # Batch upload button
-        Button(batch_frame, text="🚀 Upload All Videos", 
-               command=self.upload_batch_videos, bg='#0f9d58', fg='white',
-               font=('Arial', 14, 'bold'), height=2).pack(pady=10)
+        # Upload settings
+        settings_frame = Frame(batch_frame, bg='#f0f0f0')
+        settings_frame.pack(pady=5)
+        
+        Label(settings_frame, text="Parallel uploads:", bg='#f0f0f0').pack(side=LEFT)
+        self.upload_workers_var = IntVar(value=UPLOAD_WORKERS)
+        Spinbox(settings_frame, from_=1, to=8, textvariable=self.upload_workers_var, width=4).pack(side=LEFT, padx=(5, 15))
+        
+        Label(settings_frame, text="Chunk size (MB):", bg='#f0f0f0').pack(side=LEFT)
+        self.chunk_mb_var = IntVar(value=max(1, CHUNK_SIZE // (1024 * 1024)))
+        Spinbox(settings_frame, from_=1, to=256, textvariable=self.chunk_mb_var, width=5).pack(side=LEFT, padx=5)
+        
+        # Batch upload buttons
+        batch_buttons = Frame(batch_frame, bg='#f0f0f0')
+        batch_buttons.pack(pady=10)
+        
+        self.batch_upload_btn = Button(batch_buttons, text="🚀 Upload All Videos", 
+                                       command=self.upload_batch_videos, bg='#0f9d58', fg='white',
+                                       font=('Arial', 14, 'bold'), height=2)
+        self.batch_upload_btn.pack(side=LEFT, padx=5)
+        
+        Button(batch_buttons, text="⏹ Stop (resume later)", 
+               command=self.batch_stop_event.set, bg='#db4437', fg='white',
+               font=('Arial', 12, 'bold'), height=2).pack(side=LEFT, padx=5)
         
         # Batch progress
         self.batch_progress_var = StringVar(value="Ready for batch upload")
@@ -297,6 +323,9 @@ class YouTubeUploaderGUI:
         
         try:
             self.youtube_service = self.get_authenticated_service(self.client_secret_file)
+            self.client = YouTubeClient(self.youtube_service)
+            self.sync = YouTubeSync(self.youtube_service, client=self.client)
+            self.playlist_ids = None
             self.auth_status.config(text="✅ Authenticated", fg='green')
             messagebox.showinfo("Success", "Successfully authenticated with YouTube!")
         except Exception as e:
@@ -311,7 +340,7 @@ class YouTubeUploaderGUI:
             creds = flow.run_local_server(port=0)
             with open("token.json", "w") as token:
                 token.write(creds.to_json())
-        return build("youtube", "v3", credentials=creds)
+        return build_youtube(creds)
     
     def select_video_file(self):
         file_path = filedialog.askopenfilename(
@@ -402,33 +431,37 @@ class YouTubeUploaderGUI:
         finally:
             self.root.after(0, lambda: self.upload_btn.config(state='normal'))
     
+    def build_request_body(self, video_data):
+        category_id = CATEGORY_MAP.get(video_data["categoryName"], "22")
+        
+        request_body = {
+            "snippet": {
+                "title": video_data["title"],
+                "description": video_data["description"],
+                "tags": video_data.get("tags", []),
+                "categoryId": category_id,
+                "defaultLanguage": "en",
+                "defaultAudioLanguage": "en"
+            },
+            "status": {
+                "privacyStatus": video_data["privacyStatus"],
+                "selfDeclaredMadeForKids": video_data.get("madeForKids", False),
+                "embeddable": True,
+                "publicStatsViewable": True,
+            }
+        }
+        
+        if video_data.get("publishAt"):
+            utc_publish_time = self.convert_ist_to_utc(video_data["publishAt"])
+            request_body["status"]["publishAt"] = utc_publish_time
+            request_body["status"]["privacyStatus"] = "private"
+        return request_body
+    
     def upload_video_with_progress(self, video_data):
         try:
             self.root.after(0, lambda: self.progress_var.set(f"📤 Uploading: {video_data['title']}"))
             
-            category_id = CATEGORY_MAP.get(video_data["categoryName"], "22")
-            
-            request_body = {
-                "snippet": {
-                    "title": video_data["title"],
-                    "description": video_data["description"],
-                    "tags": video_data.get("tags", []),
-                    "categoryId": category_id,
-                    "defaultLanguage": "en",
-                    "defaultAudioLanguage": "en"
-                },
-                "status": {
-                    "privacyStatus": video_data["privacyStatus"],
-                    "selfDeclaredMadeForKids": video_data.get("madeForKids", False),
-                    "embeddable": True,
-                    "publicStatsViewable": True,
-                }
-            }
-            
-            if video_data.get("publishAt"):
-                utc_publish_time = self.convert_ist_to_utc(video_data["publishAt"])
-                request_body["status"]["publishAt"] = utc_publish_time
-                request_body["status"]["privacyStatus"] = "private"
+            request_body = self.build_request_body(video_data)
             
             media = MediaFileUpload(video_data["videoFile"], chunksize=-1, resumable=True)
             request = self.youtube_service.videos().insert(
@@ -446,6 +479,7 @@ class YouTubeUploaderGUI:
                     self.root.after(0, lambda p=progress: self.progress_var.set(f"🚀 Upload Progress: {p}%"))
             
             video_id = response["id"]
+            self.client.meter.record("videos.insert")
             
             # Upload thumbnail if provided
             if "thumbnail" in video_data and video_data["thumbnail"]:
@@ -473,35 +507,65 @@ class YouTubeUploaderGUI:
             return
         
         # Start batch upload in separate thread
-        threading.Thread(target=self.perform_batch_upload, daemon=True).start()
+        self.batch_stop_event.clear()
+        self.batch_upload_btn.config(state='disabled')
+        threading.Thread(target=self.perform_batch_upload,
+                         args=(self.upload_workers_var.get(), self.chunk_mb_var.get()), daemon=True).start()
     
-    def perform_batch_upload(self):
-        total_videos = len(self.videos_list)
-        
-        for i, video_data in enumerate(self.videos_list):
-            try:
-                self.root.after(0, lambda i=i, total=total_videos: 
-                               self.batch_progress_var.set(f"Uploading video {i+1} of {total}"))
-                
-                self.upload_video_with_batch_progress(video_data, i, total_videos)
-                
-                # Wait between uploads
-                time.sleep(10)
-                
-            except Exception as e:
-                self.root.after(0, lambda e=e, i=i: 
-                               messagebox.showerror("Error", f"Failed to upload video {i+1}: {str(e)}"))
-        
-        self.root.after(0, lambda: self.batch_progress_var.set("✅ Batch upload completed!"))
-        self.root.after(0, lambda: messagebox.showinfo("Success", "Batch upload completed!"))
+    def perform_batch_upload(self, workers=UPLOAD_WORKERS, chunk_mb=CHUNK_SIZE // (1024 * 1024)):
+        try:
+            total_videos = len(self.videos_list)
+            jobs = [{"file": video_data["videoFile"], "body": self.build_request_body(video_data), "data": video_data}
+                    for video_data in self.videos_list]
+            sizes = {job["file"]: os.path.getsize(job["file"]) if os.path.exists(job["file"]) else 0 for job in jobs}
+            sent = {}
+            finished = []
+            progress_lock = threading.Lock()
+            
+            def on_progress(job, done, total):
+                with progress_lock:
+                    sent[job["file"]] = done
+                    progress = sum(sent.values()) / max(1, sum(sizes.values())) * 100
+                    count = len(finished)
+                self.root.after(0, lambda: self.batch_progress_bar.config(value=progress))
+                self.root.after(0, lambda: self.batch_progress_var.set(
+                    f"📤 {progress:.0f}% uploaded, {count} of {total_videos} videos finished"))
+            
+            def on_result(job, result):
+                with progress_lock:
+                    finished.append(job)
+                    count = len(finished)
+                if result["error"]:
+                    self.root.after(0, lambda: messagebox.showerror(
+                        "Error", f"Failed to upload {job['data']['title']}: {result['error']}"))
+                self.root.after(0, lambda: self.batch_progress_var.set(f"✅ {count} of {total_videos} videos finished"))
+            
+            uploader = BatchUploader(self.youtube_service, client=self.client,
+                                     workers=workers, chunk_size=chunk_mb * 1024 * 1024,
+                                     after_insert=self.finish_batch_video,
+                                     on_progress=on_progress, on_result=on_result)
+            results = uploader.upload_all(jobs, self.batch_stop_event)
+            
+            failed = sum(1 for result in results if result["error"] and result["error"] != "stopped")
+            if self.batch_stop_event.is_set():
+                message = "Batch upload stopped. Unfinished videos resume from where they stopped on the next upload."
+            else:
+                message = f"Batch upload completed! {total_videos - failed} uploaded, {failed} failed."
+            self.root.after(0, lambda: self.batch_progress_var.set(f"{'⏹' if self.batch_stop_event.is_set() else '✅'} {message}"))
+            self.root.after(0, lambda: messagebox.showinfo("Batch Upload", message))
+        except Exception as e:
+            self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Batch upload failed: {str(e)}"))
+        finally:
+            self.root.after(0, lambda: self.batch_upload_btn.config(state='normal'))
     
-    def upload_video_with_batch_progress(self, video_data, current_index, total_videos):
-        # Similar to upload_video_with_progress but updates batch progress
-        progress = ((current_index + 1) / total_videos) * 100
-        self.root.after(0, lambda: self.batch_progress_bar.config(value=progress))
-        
-        # Use existing upload logic
-        self.upload_video_with_progress(video_data)
+    def finish_batch_video(self, video_id, job):
+        """Thumbnail and playlist of an inserted video (runs while the next uploads continue)"""
+        video_data = job["data"]
+        if video_data.get("thumbnail"):
+            self.upload_thumbnail(video_id, video_data["thumbnail"])
+        if video_data.get("playlistName"):
+            playlist_id = self.get_playlist_id(video_data["playlistName"])
+            self.add_video_to_playlist(video_id, playlist_id)
     
     def convert_ist_to_utc(self, ist_time_str):
         ist = pytz.timezone("Asia/Kolkata")
@@ -511,13 +575,17 @@ class YouTubeUploaderGUI:
         return utc_time.strftime("%Y-%m-%dT%H:%M:%SZ")
     
     def get_playlist_id(self, playlist_name):
-        request = self.youtube_service.playlists().list(part="snippet", mine=True, maxResults=50)
-        response = request.execute()
-        for playlist in response.get("items", []):
-            if playlist["snippet"]["title"] == playlist_name:
-                return playlist["id"]
-        
-        # Create new playlist
+        with self.playlist_lock:
+            if self.playlist_ids is None:
+                # One conditional sync of all playlists per session instead of a listing per upload
+                self.sync.sync_playlists()
+                self.playlist_ids = {row["title"]: row["playlist_id"]
+                                     for row in self.sync.store.playlists(self.sync.channel_id())}
+            if playlist_name not in self.playlist_ids:
+                self.playlist_ids[playlist_name] = self.create_playlist(playlist_name)
+            return self.playlist_ids[playlist_name]
+    
+    def create_playlist(self, playlist_name):
         create_request = self.youtube_service.playlists().insert(
             part="snippet,status",
             body={
@@ -529,10 +597,10 @@ class YouTubeUploaderGUI:
                 "status": {"privacyStatus": "public"}
             }
         )
-        return create_request.execute()["id"]
+        return self.client.execute(create_request)["id"]
     
     def add_video_to_playlist(self, video_id, playlist_id):
-        self.youtube_service.playlistItems().insert(
+        self.client.execute(self.youtube_service.playlistItems().insert(
             part="snippet",
             body={
                 "snippet": {
@@ -540,14 +608,14 @@ class YouTubeUploaderGUI:
                     "resourceId": {"kind": "youtube#video", "videoId": video_id}
                 }
             }
-        ).execute()
+        ))
     
     def upload_thumbnail(self, video_id, thumbnail_path):
         if os.path.exists(thumbnail_path):
-            self.youtube_service.thumbnails().set(
+            self.client.execute(self.youtube_service.thumbnails().set(
                 videoId=video_id,
                 media_body=MediaFileUpload(thumbnail_path)
-            ).execute()
+            ))
 
 if __name__ == "__main__":
     root = Tk()
@@ -0,0 +1,390 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from types import SimpleNamespace
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Long-lived local transcription daemon shared by all the GUIs and scripts.
+# Models stay loaded between requests, so per-video latency no longer pays
+# the model load and RAM does not grow with the number of open tools.
+#
+#   python whisper_server.py --port 8765 --workers 2
+#
+# Audio is sent either as a local file path (/transcribe) or as raw float32
+# 16 kHz mono samples (/transcribe_pcm) for callers that decode in memory.
+#
+# Clients call load_whisper_model(...) which returns a RemoteWhisperModel
+# when the server is reachable (starting it on demand) and a regular local
+# WhisperModel otherwise. Set WHISPER_SERVER=0 to always load locally.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("WHISPER_SERVER_PORT", "8765"))
+DEFAULT_WORKERS = int(os.environ.get("WHISPER_SERVER_WORKERS", "2"))
+SERVER_ENABLED = os.environ.get("WHISPER_SERVER", "1") != "0"
+AUTOSTART_IDLE_TIMEOUT = 1800
+REQUEST_TIMEOUT = 6 * 3600
+
+
+# --- Server side ---
+
+def serialize_transcription(segments, info):
+    """Turn faster-whisper segments/info into plain JSON-able dicts"""
+    result_segments = []
+    for seg in segments:
+        words = None
+        if getattr(seg, 'words', None):
+            words = [
+                {"word": w.word, "start": w.start, "end": w.end, "probability": getattr(w, 'probability', None)}
+                for w in seg.words
+            ]
+        result_segments.append({
+            "id": getattr(seg, 'id', len(result_segments)),
+            "start": seg.start,
+            "end": seg.end,
+            "text": seg.text,
+            "avg_logprob": getattr(seg, 'avg_logprob', None),
+            "no_speech_prob": getattr(seg, 'no_speech_prob', None),
+            "words": words
+        })
+    return {
+        "segments": result_segments,
+        "info": {
+            "language": getattr(info, 'language', None),
+            "language_probability": getattr(info, 'language_probability', None),
+            "duration": getattr(info, 'duration', None)
+        }
+    }
+
+
+class ModelSlot:
+    """One warm model plus a job queue drained by `workers` threads.
+
+    Concurrent requests for the same model are served in parallel from a
+    single copy of the weights (CTranslate2 num_workers) instead of every
+    tool loading its own.
+    """
+
+    def __init__(self, model_size, device, compute_type, workers):
+        from faster_whisper import WhisperModel
+        logging.info(f"🧠 Loading {model_size} ({device}, {compute_type}) with {workers} worker(s)...")
+        started = time.time()
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, num_workers=workers)
+        logging.info(f"✅ Loaded {model_size} in {time.time() - started:.1f}s")
+        self.jobs = queue.Queue()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"{model_size}-worker-{i}", daemon=True).start()
+
+    def submit(self, audio_path, options):
+        future = Future()
+        self.jobs.put((audio_path, options, future))
+        return future
+
+    def _worker(self):
+        while True:
+            audio_path, options, future = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                segments, info = self.model.transcribe(audio_path, **options)
+                future.set_result(serialize_transcription(segments, info))
+            except Exception as e:
+                future.set_exception(e)
+
+
+class ModelRegistry:
+    """ModelSlots by (model, device, compute_type), each loaded once.
+
+    slots holds a Future per key. The lock only guards looking up or
+    inserting that Future; the model is built outside it by the first
+    caller while later callers of the same key wait on the Future, so
+    /health and loads of other models never queue behind a load.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.slots = {}
+        self.lock = threading.Lock()
+
+    def get(self, model_size, device="auto", compute_type="default"):
+        key = (model_size, device, compute_type)
+        with self.lock:
+            future = self.slots.get(key)
+            owner = future is None
+            if owner:
+                future = self.slots[key] = Future()
+        if owner:
+            try:
+                future.set_result(ModelSlot(model_size, device, compute_type, self.workers))
+            except Exception as e:
+                # Forget the failed load so a later request can retry it
+                with self.lock:
+                    self.slots.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def loaded(self):
+        """Models loaded or loading; lock-free so it answers during a load"""
+        return [{"model": m, "device": d, "compute_type": c, "status": "loaded" if future.done() else "loading"}
+                for (m, d, c), future in list(self.slots.items())]
+
+
+class WhisperRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WhisperServer/1.0"
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+
+    def do_GET(self):
+        self.server.touch()
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "pid": os.getpid(), "models": self.server.registry.loaded()})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if not self.server.begin_request():
+            self._send_json(503, {"error": "Server is shutting down"})
+            return
+        try:
+            if self.path == "/transcribe_pcm":
+                self._transcribe_pcm()
+                return
+            payload = self._read_json()
+            slot = self.server.registry.get(
+                payload["model"], payload.get("device", "auto"), payload.get("compute_type", "default")
+            )
+            if self.path == "/load":
+                self._send_json(200, {"status": "loaded"})
+            elif self.path == "/transcribe":
+                audio_path = payload["audio_path"]
+                if not os.path.exists(audio_path):
+                    self._send_json(404, {"error": f"Audio file not found: {audio_path}"})
+                    return
+                started = time.time()
+                result = slot.submit(audio_path, payload.get("options", {})).result()
+                logging.info(f"✅ Transcribed {os.path.basename(audio_path)} with {payload['model']} in {time.time() - started:.1f}s")
+                self._send_json(200, result)
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+        except Exception as e:
+            logging.error(f"❌ Request {self.path} failed: {e}")
+            self._send_json(500, {"error": str(e)})
+        finally:
+            self.server.end_request()
+
+
+    def _transcribe_pcm(self):
+        # Raw float32 16 kHz mono samples in the body, request JSON in a header
+        import numpy as np
+        payload = json.loads(self.headers.get("X-Whisper-Request", "{}"))
+        length = int(self.headers.get("Content-Length", 0))
+        audio = np.frombuffer(self.rfile.read(length), dtype="<f4").astype(np.float32)
+        slot = self.server.registry.get(
+            payload["model"], payload.get("device", "auto"), payload.get("compute_type", "default")
+        )
+        started = time.time()
+        result = slot.submit(audio, payload.get("options", {})).result()
+        logging.info(f"✅ Transcribed {len(audio) / 16000:.0f}s of streamed audio with {payload['model']} in {time.time() - started:.1f}s")
+        self._send_json(200, result)
+
+
+class WhisperServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers, idle_timeout=None):
+        super().__init__(address, WhisperRequestHandler)
+        self.registry = ModelRegistry(workers)
+        self.idle_timeout = idle_timeout
+        self.last_activity = time.time()
+        # Requests in flight keep the server up however long they run
+        self.in_flight = 0
+        self.closing = False
+        self.activity_lock = threading.Lock()
+        if idle_timeout:
+            threading.Thread(target=self._idle_watchdog, daemon=True).start()
+
+    def touch(self):
+        with self.activity_lock:
+            self.last_activity = time.time()
+
+    def begin_request(self):
+        """Count a request in flight; False once the idle shutdown has begun"""
+        with self.activity_lock:
+            if self.closing:
+                return False
+            self.in_flight += 1
+            self.last_activity = time.time()
+            return True
+
+    def end_request(self):
+        with self.activity_lock:
+            self.in_flight -= 1
+            self.last_activity = time.time()
+
+    def _idle_watchdog(self):
+        while True:
+            time.sleep(min(60, self.idle_timeout))
+            with self.activity_lock:
+                idle = self.in_flight == 0 and time.time() - self.last_activity > self.idle_timeout
+                self.closing = idle
+            if idle:
+                logging.info(f"💤 Idle for {self.idle_timeout}s, shutting down")
+                self.shutdown()
+                return
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, preload=None, idle_timeout=None):
+    server = WhisperServer((host, port), workers, idle_timeout)
+    for model_size in preload or []:
+        server.registry.get(model_size, "auto", "int8")
+    logging.info(f"🚀 Whisper server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# --- Client side ---
+
+def _server_request(path, payload=None, timeout=REQUEST_TIMEOUT, host=DEFAULT_HOST, port=DEFAULT_PORT, body=None):
+    url = f"http://{host}:{port}{path}"
+    if body is not None:
+        # Binary body; the JSON payload travels in a header
+        request = urllib.request.Request(url, data=body, headers={
+            "Content-Type": "application/octet-stream",
+            "X-Whisper-Request": json.dumps(payload)
+        })
+    else:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+        except Exception:
+            message = str(e)
+        raise RuntimeError(f"Whisper server error: {message}") from None
+
+
+def is_server_running(timeout=0.5):
+    try:
+        return _server_request("/health", timeout=timeout).get("status") == "ok"
+    except Exception:
+        return False
+
+
+def start_server(wait=30):
+    """Spawn a detached server that exits on its own after being idle"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--port", str(DEFAULT_PORT),
+           "--idle-timeout", str(AUTOSTART_IDLE_TIMEOUT)]
+    popen_kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == 'nt':
+        popen_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs['start_new_session'] = True
+    logging.info("🚀 Starting shared Whisper server...")
+    subprocess.Popen(cmd, **popen_kwargs)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if is_server_running():
+            return True
+        time.sleep(0.5)
+    logging.warning("⚠️ Whisper server did not come up in time")
+    return False
+
+
+def ensure_server(autostart=True):
+    if not SERVER_ENABLED:
+        return False
+    if is_server_running():
+        return True
+    return autostart and start_server()
+
+
+def _to_namespace(segment):
+    words = None
+    if segment.get("words"):
+        words = [SimpleNamespace(**w) for w in segment["words"]]
+    return SimpleNamespace(**{**segment, "words": words})
+
+
+class RemoteWhisperModel:
+    """Drop-in stand-in for faster_whisper.WhisperModel backed by the server.
+
+    transcribe() returns (segments, info) with the same attribute names the
+    call sites already use (segment.text/start/end/words, word.word/probability).
+    """
+
+    def __init__(self, model_size, device="auto", compute_type="default"):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        # Load eagerly so callers with fallback chains see load errors here
+        _server_request("/load", self._model_payload())
+
+    def _model_payload(self):
+        return {"model": self.model_size, "device": self.device, "compute_type": self.compute_type}
+
+    def transcribe(self, audio, **options):
+        payload = self._model_payload()
+        payload["options"] = options
+        if isinstance(audio, (str, os.PathLike)):
+            payload["audio_path"] = os.path.abspath(str(audio))
+            result = _server_request("/transcribe", payload)
+        else:
+            # In-memory 16 kHz mono samples (see audio_source.load_audio)
+            import numpy as np
+            samples = np.ascontiguousarray(audio, dtype="<f4")
+            result = _server_request("/transcribe_pcm", payload, body=samples.tobytes())
+        segments = [_to_namespace(seg) for seg in result["segments"]]
+        return segments, SimpleNamespace(**result["info"])
+
+
+def load_whisper_model(model_size, device="auto", compute_type="default", autostart=True, **local_kwargs):
+    """RemoteWhisperModel when the shared server is available, else a local WhisperModel"""
+    if ensure_server(autostart):
+        try:
+            model = RemoteWhisperModel(model_size, device=device, compute_type=compute_type)
+            logging.info(f"🔌 Using shared Whisper server for {model_size}")
+            return model
+        except urllib.error.URLError as e:
+            logging.warning(f"⚠️ Whisper server unreachable ({e}), loading {model_size} locally")
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_size, device=device, compute_type=compute_type, **local_kwargs)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Shared local Whisper transcription server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent transcriptions per loaded model")
+    parser.add_argument("--preload", nargs="*", default=[], help="Models to load at startup, e.g. large-v3 base")
+    parser.add_argument("--idle-timeout", type=int, default=None,
+                        help="Exit after this many seconds without requests")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.preload, args.idle_timeout)
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+
+# Shared request layer for the YouTube Data API tools. Every call goes through
+# YouTubeClient, which
+#
+#   - spaces requests with a token bucket (YOUTUBE_REQUESTS_PER_SECOND, bursts
+#     of YOUTUBE_REQUEST_BURST) shared by all clients of the process,
+#   - retries 429, 5xx and rate-limit 403s with jittered exponential backoff
+#     (a 403 quotaExceeded is final: the daily quota is gone),
+#   - counts the quota units spent per endpoint (QUOTA_COSTS, per the API's
+#     cost table) against YOUTUBE_DAILY_QUOTA,
+#   - sends independent calls as one multipart BatchHttpRequest of up to
+#     BATCH_SIZE calls, one HTTP round trip instead of one per call.
+#
+# list_videos() coalesces video ids into videos().list calls of 50 ids each.
+# Batches go to YOUTUBE_API_ENDPOINT/batch when the endpoint is overridden
+# (see youtube_store.build_youtube).
+
+BATCH_SIZE = 50
+VIDEO_IDS_PER_CALL = 50
+REQUESTS_PER_SECOND = float(os.environ.get("YOUTUBE_REQUESTS_PER_SECOND", 10))
+REQUEST_BURST = int(os.environ.get("YOUTUBE_REQUEST_BURST", 50))
+DAILY_QUOTA = int(os.environ.get("YOUTUBE_DAILY_QUOTA", 10000))
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 64.0
+
+# Units per call; anything not listed costs 1 (list) or 50 (writes)
+QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.insert": 1600,
+    "captions.insert": 400,
+    "captions.update": 450,
+    "captions.download": 200,
+}
+WRITE_COST = 50
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+def endpoint_of(request):
+    """"videos.list" for a googleapiclient request of youtube.videos.list"""
+    method_id = getattr(request, "methodId", None) or ""
+    return method_id.split(".", 1)[1] if method_id.startswith("youtube.") else method_id or "unknown"
+
+
+def quota_cost(endpoint):
+    if endpoint in QUOTA_COSTS:
+        return QUOTA_COSTS[endpoint]
+    return 1 if endpoint.endswith(".list") else WRITE_COST
+
+
+def error_status(error):
+    return getattr(getattr(error, "resp", None), "status", None)
+
+
+def error_reason(error):
+    """The API's error reason (e.g. "quotaExceeded") of an HttpError, or None"""
+    try:
+        details = json.loads(error.content.decode("utf-8"))["error"]
+        errors = details.get("errors") or [{}]
+        return errors[0].get("reason") or details.get("status")
+    except Exception:
+        return None
+
+
+def is_retriable(error):
+    status = error_status(error)
+    if status in RETRY_STATUSES:
+        return True
+    return status == 403 and error_reason(error) in RATE_LIMIT_REASONS
+
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, at most `capacity` saved up"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=REQUEST_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take tokens, waiting as needed. A request for more than the capacity
+        waits for a full bucket and leaves it in debt."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                needed = min(tokens, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class QuotaMeter:
+    """Quota units spent per endpoint in this process"""
+
+    def __init__(self, daily_quota=DAILY_QUOTA):
+        self.daily_quota = daily_quota
+        self.units = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+        self._warned = False
+
+    def record(self, endpoint, calls=1):
+        cost = quota_cost(endpoint) * calls
+        with self.lock:
+            self.units[endpoint] = self.units.get(endpoint, 0) + cost
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + calls
+            used = sum(self.units.values())
+            warn = not self._warned and used >= self.daily_quota * 0.8
+            self._warned = self._warned or warn
+        if warn:
+            logging.warning(f"YouTube API quota: {used} of {self.daily_quota} daily units used by this session")
+
+    def used(self):
+        with self.lock:
+            return sum(self.units.values())
+
+    def remaining(self):
+        return max(0, self.daily_quota - self.used())
+
+    def summary(self):
+        with self.lock:
+            parts = [f"{endpoint} {self.calls[endpoint]}x = {units}"
+                     for endpoint, units in sorted(self.units.items(), key=lambda kv: -kv[1])]
+            return f"{sum(self.units.values())} units ({', '.join(parts) or 'no calls'})"
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_limits():
+    with _shared_lock:
+        if not _shared:
+            _shared["bucket"] = TokenBucket()
+            _shared["meter"] = QuotaMeter()
+        return _shared["bucket"], _shared["meter"]
+
+
+def get_quota_meter():
+    """The process-wide QuotaMeter used by clients without their own"""
+    return _shared_limits()[1]
+
+
+class YouTubeClient:
+    """Rate-limited, retrying, quota-counting executor for googleapiclient requests"""
+
+    def __init__(self, youtube, bucket=None, meter=None):
+        self.youtube = youtube
+        shared_bucket, shared_meter = _shared_limits()
+        self.bucket = bucket or shared_bucket
+        self.meter = meter or shared_meter
+
+    def _backoff(self, attempt, error):
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+        logging.warning(f"YouTube API {error_status(error)} {error_reason(error) or ''}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+    def _check_quota(self, error):
+        if error_status(error) == 403 and error_reason(error) in ("quotaExceeded", "dailyLimitExceeded"):
+            raise QuotaExceededError(f"YouTube API daily quota exhausted ({self.meter.summary()})") from error
+
+    def execute(self, request):
+        """request.execute() with rate limiting, quota accounting and retries"""
+        endpoint = endpoint_of(request)
+        for attempt in range(MAX_RETRIES + 1):
+            self.bucket.acquire()
+            self.meter.record(endpoint)
+            try:
+                return request.execute()
+            except Exception as e:
+                self._check_quota(e)
+                if attempt == MAX_RETRIES or not is_retriable(e):
+                    raise
+                self._backoff(attempt, e)
+
+    def _new_batch(self):
+        endpoint = os.environ.get("YOUTUBE_API_ENDPOINT")
+        if endpoint:
+            from googleapiclient.http import BatchHttpRequest
+            return BatchHttpRequest(batch_uri=endpoint.rstrip("/") + "/batch")
+        return self.youtube.new_batch_http_request()
+
+    def execute_batch(self, requests):
+        """Execute independent requests BATCH_SIZE per round trip.
+
+        Returns [(response, error)] in the order of requests; exactly one of
+        the pair is None. Retriable failures are resent (in a later batch)
+        with backoff. The server runs the calls of a batch in no particular
+        order, so requests must not depend on each other.
+        """
+        requests = list(requests)
+        results = [(None, None)] * len(requests)
+        pending = list(range(len(requests)))
+        for attempt in range(MAX_RETRIES + 1):
+            retry = []
+
+            def callback(request_id, response, exception):
+                index = int(request_id)
+                results[index] = (response, exception)
+                if exception is not None and is_retriable(exception):
+                    retry.append(index)
+
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                if len(chunk) == 1:
+                    # A batch of one is just a slower request
+                    index = chunk[0]
+                    self.bucket.acquire()
+                    self.meter.record(endpoint_of(requests[index]))
+                    try:
+                        callback(str(index), requests[index].execute(), None)
+                    except Exception as e:
+                        callback(str(index), None, e)
+                    continue
+                batch = self._new_batch()
+                for index in chunk:
+                    batch.add(requests[index], callback=callback, request_id=str(index))
+                self.bucket.acquire(len(chunk))
+                for index in chunk:
+                    self.meter.record(endpoint_of(requests[index]))
+                try:
+                    batch.execute()
+                except Exception as e:
+                    if not is_retriable(e):
+                        raise
+                    for index in chunk:
+                        results[index] = (None, e)
+                    retry.extend(chunk)
+            for response, error in results:
+                if error is not None:
+                    self._check_quota(error)
+            if not retry or attempt == MAX_RETRIES:
+                break
+            self._backoff(attempt, results[retry[0]][1])
+            pending = sorted(set(retry))
+        return results
+
+    def list_videos(self, video_ids, part="snippet,statistics,contentDetails,status"):
+        """{video_id: item} for video_ids, 50 ids per videos().list call and up
+        to BATCH_SIZE calls per round trip. Unknown or deleted ids are absent."""
+        video_ids = list(dict.fromkeys(video_ids))
+        requests = [
+            self.youtube.videos().list(part=part, id=",".join(video_ids[start:start + VIDEO_IDS_PER_CALL]),
+                                       maxResults=VIDEO_IDS_PER_CALL)
+            for start in range(0, len(video_ids), VIDEO_IDS_PER_CALL)
+        ]
+        videos = {}
+        for response, error in self.execute_batch(requests):
+            if error is not None:
+                raise error
+            videos.update((item["id"], item) for item in response.get("items", []))
+        return videos
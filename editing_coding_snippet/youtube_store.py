@@ -0,0 +1,670 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from youtube_client import YouTubeClient, error_status
+
+# Local SQLite mirror of the channel's videos, playlists, playlist items and
+# comment threads, shared by the YouTube tools (playlist_gui_v1.py,
+# playlist_organizer_v1.py, comment_v2.py, comments.py). Windows read from
+# the store and show it at once; YouTubeSync then brings it up to date with
+# as few API calls as possible:
+#
+#   uploads         newest first, paged only until the publishedAt watermark
+#                   (first page sent with If-None-Match: a 304 means nothing new)
+#   playlists       conditional list; re-paged only when its ETag changed
+#   playlist items  conditional per playlist, synced when a playlist is opened
+#   comments        per video, skipped while the video's commentCount is
+#                   unchanged and the last sync is younger than
+#                   COMMENTS_MAX_AGE, otherwise paged newest first until a
+#                   page reaches the watermark; every fetched thread is
+#                   upserted, so like and reply counts of the newest
+#                   threads are refreshed too
+#   video details   statistics/duration/status, refreshed when older than
+#                   DETAILS_MAX_AGE or missing
+#
+# The ETags and watermarks live in the sync_state table. All calls go through
+# a youtube_client.YouTubeClient (rate limit, retries, quota accounting,
+# batching). Set
+# YOUTUBE_API_ENDPOINT (e.g. http://127.0.0.1:8080/) to point build_youtube()
+# at a local fake of the Data API.
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "YOUTUBE_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "youtube", "store.sqlite3")
+)
+SCHEMA_VERSION = 1
+DETAILS_MAX_AGE = float(os.environ.get("YOUTUBE_DETAILS_MAX_AGE", 6 * 3600))
+COMMENTS_MAX_AGE = float(os.environ.get("YOUTUBE_COMMENTS_MAX_AGE", 6 * 3600))
+PAGE_SIZE = 50
+COMMENT_PAGE_SIZE = 100
+COMMENT_LIST_PARAMS = {"part": "snippet", "order": "time", "textFormat": "plainText", "maxResults": COMMENT_PAGE_SIZE}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    title TEXT,
+    description TEXT,
+    published_at TEXT,
+    duration TEXT,
+    view_count INTEGER,
+    like_count INTEGER,
+    comment_count INTEGER,
+    privacy_status TEXT,
+    etag TEXT,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(channel_id, published_at);
+CREATE TABLE IF NOT EXISTS playlists (
+    playlist_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    sort_index INTEGER,
+    title TEXT,
+    description TEXT,
+    published_at TEXT,
+    privacy_status TEXT,
+    item_count INTEGER,
+    etag TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_playlists_channel ON playlists(channel_id, sort_index);
+CREATE TABLE IF NOT EXISTS playlist_items (
+    item_id TEXT PRIMARY KEY,
+    playlist_id TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    position INTEGER,
+    title TEXT,
+    description TEXT,
+    channel_title TEXT,
+    published_at TEXT,
+    thumbnail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_playlist ON playlist_items(playlist_id, position);
+CREATE INDEX IF NOT EXISTS idx_items_video ON playlist_items(video_id);
+CREATE TABLE IF NOT EXISTS comment_threads (
+    thread_id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    author TEXT,
+    text TEXT,
+    like_count INTEGER,
+    reply_count INTEGER,
+    published_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_video ON comment_threads(video_id, published_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    watermark TEXT,
+    item_count INTEGER,
+    synced_at REAL
+);
+"""
+
+
+def build_youtube(credentials):
+    """googleapiclient YouTube service; honours YOUTUBE_API_ENDPOINT for a local fake API"""
+    from googleapiclient.discovery import build
+    endpoint = os.environ.get("YOUTUBE_API_ENDPOINT")
+    if endpoint:
+        return build("youtube", "v3", credentials=credentials, client_options={"api_endpoint": endpoint})
+    return build("youtube", "v3", credentials=credentials)
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def video_row(item):
+    snippet = item.get("snippet", {})
+    statistics = item.get("statistics", {})
+    return {
+        "video_id": item["id"],
+        "channel_id": snippet.get("channelId"),
+        "title": snippet.get("title"),
+        "description": snippet.get("description"),
+        "published_at": snippet.get("publishedAt"),
+        "duration": item.get("contentDetails", {}).get("duration"),
+        "view_count": _int(statistics.get("viewCount")),
+        "like_count": _int(statistics.get("likeCount")),
+        "comment_count": _int(statistics.get("commentCount")),
+        "privacy_status": item.get("status", {}).get("privacyStatus"),
+        "etag": item.get("etag"),
+        "synced_at": time.time(),
+    }
+
+
+def playlist_row(item, channel_id, sort_index):
+    snippet = item.get("snippet", {})
+    return {
+        "playlist_id": item["id"],
+        "channel_id": channel_id,
+        "sort_index": sort_index,
+        "title": snippet.get("title"),
+        "description": snippet.get("description", ""),
+        "published_at": snippet.get("publishedAt"),
+        "privacy_status": item.get("status", {}).get("privacyStatus"),
+        "item_count": _int(item.get("contentDetails", {}).get("itemCount")),
+        "etag": item.get("etag"),
+    }
+
+
+def playlist_item_row(item):
+    snippet = item.get("snippet", {})
+    video_id = item.get("contentDetails", {}).get("videoId") or snippet.get("resourceId", {}).get("videoId")
+    return {
+        "item_id": item["id"],
+        "playlist_id": snippet.get("playlistId"),
+        "video_id": video_id,
+        "position": _int(snippet.get("position")),
+        "title": snippet.get("title"),
+        "description": snippet.get("description", ""),
+        "channel_title": snippet.get("videoOwnerChannelTitle") or snippet.get("channelTitle"),
+        "published_at": snippet.get("publishedAt"),
+        "thumbnail": snippet.get("thumbnails", {}).get("default", {}).get("url"),
+    }
+
+
+def comment_thread_row(item):
+    snippet = item["snippet"]
+    top = snippet["topLevelComment"]["snippet"]
+    return {
+        "thread_id": item["id"],
+        "video_id": snippet.get("videoId") or top.get("videoId"),
+        "author": top.get("authorDisplayName"),
+        "text": top.get("textDisplay"),
+        "like_count": _int(top.get("likeCount")) or 0,
+        "reply_count": _int(snippet.get("totalReplyCount")) or 0,
+        "published_at": top.get("publishedAt"),
+        "updated_at": top.get("updatedAt"),
+    }
+
+
+class YouTubeStore:
+    """Thread-safe SQLite store; every method takes the lock, so GUI worker threads can share one"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_STORE_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # --- sync state ---
+    def get_state(self, key):
+        rows = self.query("SELECT etag, watermark, item_count, synced_at FROM sync_state WHERE key = ?", (key,))
+        return rows[0] if rows else {"etag": None, "watermark": None, "item_count": None, "synced_at": None}
+
+    def set_state(self, key, etag=None, watermark=None, item_count=None):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sync_state (key, etag, watermark, item_count, synced_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET etag = excluded.etag, watermark = excluded.watermark, "
+                "item_count = excluded.item_count, synced_at = excluded.synced_at",
+                (key, etag, watermark, item_count, time.time()))
+
+    def invalidate(self, key):
+        """Forget a key's ETag/watermark so the next sync re-pages it"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM sync_state WHERE key = ?", (key,))
+
+    # --- writes ---
+    def upsert_videos(self, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "video_id")
+        with self.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO videos ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(video_id) DO UPDATE SET {updates}",
+                [tuple(row[c] for c in columns) for row in rows])
+
+    def delete_videos(self, video_ids):
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM videos WHERE video_id = ?", [(v,) for v in video_ids])
+            conn.executemany("DELETE FROM comment_threads WHERE video_id = ?", [(v,) for v in video_ids])
+
+    def replace_playlists(self, channel_id, rows):
+        """Make the channel's playlists exactly rows (items of removed playlists go too)"""
+        with self.transaction() as conn:
+            keep = {row["playlist_id"] for row in rows}
+            gone = [r["playlist_id"] for r in conn.execute(
+                "SELECT playlist_id FROM playlists WHERE channel_id = ?", (channel_id,)) if r["playlist_id"] not in keep]
+            for playlist_id in gone:
+                conn.execute("DELETE FROM playlists WHERE playlist_id = ?", (playlist_id,))
+                conn.execute("DELETE FROM playlist_items WHERE playlist_id = ?", (playlist_id,))
+                conn.execute("DELETE FROM sync_state WHERE key = ?", (f"items:{playlist_id}",))
+            if rows:
+                columns = list(rows[0])
+                updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "playlist_id")
+                conn.executemany(
+                    f"INSERT INTO playlists ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                    f"ON CONFLICT(playlist_id) DO UPDATE SET {updates}",
+                    [tuple(row[c] for c in columns) for row in rows])
+
+    def replace_playlist_items(self, playlist_id, rows):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM playlist_items WHERE playlist_id = ?", (playlist_id,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO playlist_items (item_id, playlist_id, video_id, position, title, description, "
+                "channel_title, published_at, thumbnail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r["item_id"], playlist_id, r["video_id"], r["position"], r["title"], r["description"],
+                  r["channel_title"], r["published_at"], r["thumbnail"]) for r in rows])
+
+    def reorder_playlist_items(self, playlist_id, item_ids):
+        """Record a reorder made through the API (positions follow item_ids)"""
+        with self.transaction() as conn:
+            conn.executemany("UPDATE playlist_items SET position = ? WHERE item_id = ? AND playlist_id = ?",
+                             [(position, item_id, playlist_id) for position, item_id in enumerate(item_ids)])
+
+    def upsert_comment_threads(self, rows):
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO comment_threads (thread_id, video_id, author, text, like_count, reply_count, "
+                "published_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r["thread_id"], r["video_id"], r["author"], r["text"], r["like_count"], r["reply_count"],
+                  r["published_at"], r["updated_at"]) for r in rows])
+
+    def replace_comment_threads(self, video_id, rows):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM comment_threads WHERE video_id = ?", (video_id,))
+        self.upsert_comment_threads(rows)
+
+    def delete_comment_thread(self, thread_id):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM comment_threads WHERE thread_id = ?", (thread_id,))
+
+    # --- reads ---
+    def video_ids(self, channel_id):
+        return {r["video_id"] for r in self.query("SELECT video_id FROM videos WHERE channel_id = ?", (channel_id,))}
+
+    def video(self, video_id):
+        rows = self.query("SELECT * FROM videos WHERE video_id = ?", (video_id,))
+        return rows[0] if rows else None
+
+    def channel_videos(self, channel_id, limit=None):
+        """The channel's videos, newest first"""
+        sql = "SELECT * FROM videos WHERE channel_id = ? ORDER BY published_at DESC"
+        params = (channel_id,)
+        if limit:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        return self.query(sql, params)
+
+    def stale_video_ids(self, video_ids, max_age=DETAILS_MAX_AGE):
+        """Those of video_ids whose details are missing or older than max_age seconds"""
+        fresh = set()
+        cutoff = time.time() - max_age
+        video_ids = list(video_ids)
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            fresh.update(r["video_id"] for r in self.query(
+                f"SELECT video_id FROM videos WHERE synced_at >= ? AND video_id IN ({','.join('?' * len(chunk))})",
+                (cutoff, *chunk)))
+        return [v for v in video_ids if v not in fresh]
+
+    def playlists(self, channel_id):
+        return self.query("SELECT * FROM playlists WHERE channel_id = ? ORDER BY sort_index", (channel_id,))
+
+    def playlist(self, playlist_id):
+        rows = self.query("SELECT * FROM playlists WHERE playlist_id = ?", (playlist_id,))
+        return rows[0] if rows else None
+
+    def playlist_items(self, playlist_id):
+        """Items in playlist order, with the video's details where known (v_* columns)"""
+        return self.query(
+            "SELECT i.*, v.duration AS v_duration, v.view_count AS v_view_count, v.privacy_status AS v_privacy_status "
+            "FROM playlist_items i LEFT JOIN videos v ON v.video_id = i.video_id "
+            "WHERE i.playlist_id = ? ORDER BY i.position", (playlist_id,))
+
+    def membership(self, channel_id):
+        """PlaylistMembership of the channel's playlists as currently stored"""
+        index = {}
+        for r in self.query(
+                "SELECT i.video_id, i.playlist_id FROM playlist_items i JOIN playlists p ON p.playlist_id = i.playlist_id "
+                "WHERE p.channel_id = ?", (channel_id,)):
+            index.setdefault(r["video_id"], set()).add(r["playlist_id"])
+        return PlaylistMembership(index, self.video_ids(channel_id))
+
+    def comment_threads(self, video_ids=None):
+        """Top-level comments with their video's title, most liked first"""
+        sql = ("SELECT c.*, v.title AS video_title FROM comment_threads c "
+               "LEFT JOIN videos v ON v.video_id = c.video_id")
+        params = ()
+        if video_ids is not None:
+            video_ids = list(video_ids)
+            if not video_ids:
+                return []
+            sql += f" WHERE c.video_id IN ({','.join('?' * len(video_ids))})"
+            params = tuple(video_ids)
+        return self.query(sql + " ORDER BY c.like_count DESC, c.published_at DESC", params)
+
+
+class PlaylistMembership:
+    """video_id -> set of playlist_ids over a channel's playlists, queried as set operations"""
+
+    def __init__(self, index, channel_video_ids):
+        self.index = index
+        self.channel_video_ids = set(channel_video_ids)
+
+    def playlists_of(self, video_id):
+        return self.index.get(video_id, set())
+
+    def unassigned(self):
+        """Channel videos that are in no playlist"""
+        return self.channel_video_ids - self.index.keys()
+
+    def duplicated(self):
+        """{video_id: playlist_ids} of the videos that are in more than one playlist"""
+        return {video_id: playlists for video_id, playlists in self.index.items() if len(playlists) > 1}
+
+    def orphaned(self):
+        """Playlist entries whose video is not among the channel's uploads (deleted, private or foreign)"""
+        return self.index.keys() - self.channel_video_ids
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_youtube_store():
+    """Process-wide store at YOUTUBE_STORE_PATH"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = YouTubeStore()
+        return _default_store
+
+
+class YouTubeSync:
+    """Brings a YouTubeStore up to date from the Data API (see module notes)"""
+
+    def __init__(self, youtube, store=None, client=None):
+        self.youtube = youtube
+        self.store = store or get_youtube_store()
+        self.client = client or YouTubeClient(youtube)
+        self._channel = None
+
+    def _execute(self, request, etag=None):
+        """request.execute(), or None when etag still matches (HTTP 304)"""
+        if etag:
+            request.headers["If-None-Match"] = etag
+        try:
+            return self.client.execute(request)
+        except Exception as e:
+            if error_status(e) == 304:
+                return None
+            raise
+
+    def _pages(self, list_method, etag=None, page_token=None, **params):
+        """Yield response pages. Only the first is conditional: a single None means not modified."""
+        first = page_token is None
+        while True:
+            response = self._execute(list_method(pageToken=page_token, **params), etag if first else None)
+            yield response
+            if response is None:
+                return
+            first = False
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _continue(self, first_page, list_method, **params):
+        """An already fetched first page (None if not modified) and the pages after it"""
+        yield first_page
+        if first_page and first_page.get("nextPageToken"):
+            yield from self._pages(list_method, page_token=first_page["nextPageToken"], **params)
+
+    def channel(self):
+        """{"channel_id", "uploads"} of the authenticated channel (one call per session)"""
+        if self._channel is None:
+            response = self.client.execute(self.youtube.channels().list(part="contentDetails", mine=True))
+            if not response.get("items"):
+                raise Exception("No channel found for the authenticated user")
+            item = response["items"][0]
+            self._channel = {"channel_id": item["id"],
+                             "uploads": item["contentDetails"]["relatedPlaylists"]["uploads"]}
+        return self._channel
+
+    def channel_id(self):
+        return self.channel()["channel_id"]
+
+    def refresh_video_details(self, video_ids):
+        """Fetch snippet/statistics/contentDetails/status for video_ids (50 ids per call, calls batched)"""
+        video_ids = list(dict.fromkeys(video_ids))
+        if not video_ids:
+            return 0
+        items = self.client.list_videos(video_ids)
+        self.store.upsert_videos([video_row(item) for item in items.values()])
+        returned = set(items)
+        missing = [v for v in video_ids if v not in returned]
+        if missing:
+            self.store.delete_videos(missing)
+        return len(returned)
+
+    def ensure_video_details(self, video_ids, max_age=DETAILS_MAX_AGE):
+        """Refresh only the videos whose stored details are missing or stale"""
+        stale = self.store.stale_video_ids(video_ids, max_age)
+        return self.refresh_video_details(stale) if stale else 0
+
+    def sync_videos(self, full=False):
+        """New uploads since the watermark (all of them with full=True); returns how many were new"""
+        channel = self.channel()
+        key = f"uploads:{channel['channel_id']}"
+        state = self.store.get_state(key)
+        etag, watermark = (None, None) if full else (state["etag"], state["watermark"])
+        known = self.store.video_ids(channel["channel_id"])
+        seen, new_ids = [], []
+        first_etag = None
+        newest = watermark
+        reached_known = False
+        for page in self._pages(self.youtube.playlistItems().list, etag, part="snippet,contentDetails",
+                                playlistId=channel["uploads"], maxResults=PAGE_SIZE):
+            if page is None:
+                break
+            first_etag = first_etag or page.get("etag")
+            for item in page.get("items", []):
+                video_id = item["contentDetails"]["videoId"]
+                published = item["snippet"].get("publishedAt") or ""
+                seen.append(video_id)
+                newest = max(newest or published, published)
+                if video_id not in known:
+                    new_ids.append(video_id)
+                elif watermark and published <= watermark:
+                    reached_known = True
+            if reached_known:
+                break
+        if first_etag:
+            self.store.set_state(key, etag=first_etag, watermark=newest)
+        if full:
+            self.store.delete_videos(known - set(seen))
+        self.refresh_video_details(new_ids)
+        # Statistics (views, comment counts) of known videos go stale over time
+        self.ensure_video_details(known & set(self.store.video_ids(channel["channel_id"])))
+        if new_ids:
+            logging.info(f"Synced {len(new_ids)} new upload(s)")
+        return len(new_ids)
+
+    def sync_playlists(self, force=False):
+        """Re-page the channel's playlists if the list changed; True if it did"""
+        channel_id = self.channel_id()
+        key = f"playlists:{channel_id}"
+        etag = None if force else self.store.get_state(key)["etag"]
+        rows, first_etag = [], None
+        for page in self._pages(self.youtube.playlists().list, etag, part="snippet,status,contentDetails",
+                                mine=True, maxResults=PAGE_SIZE):
+            if page is None:
+                return False
+            first_etag = first_etag or page.get("etag")
+            rows.extend(playlist_row(item, channel_id, len(rows) + i) for i, item in enumerate(page.get("items", [])))
+        self.store.replace_playlists(channel_id, rows)
+        self.store.set_state(key, etag=first_etag)
+        return True
+
+    def _item_pages_request(self, playlist_id, page_token=None):
+        return self.youtube.playlistItems().list(part="snippet,contentDetails", playlistId=playlist_id,
+                                                 maxResults=PAGE_SIZE, pageToken=page_token)
+
+    def _store_playlist_items(self, playlist_id, rows, etag):
+        self.store.replace_playlist_items(playlist_id, rows)
+        self.store.set_state(f"items:{playlist_id}", etag=etag, item_count=len(rows))
+
+    def sync_playlist_items(self, playlist_id, force=False):
+        """Re-page one playlist's items if they changed; True if they did"""
+        etag = None if force else self.store.get_state(f"items:{playlist_id}")["etag"]
+        rows, first_etag = [], None
+        for page in self._pages(self.youtube.playlistItems().list, etag, part="snippet,contentDetails",
+                                playlistId=playlist_id, maxResults=PAGE_SIZE):
+            if page is None:
+                return False
+            first_etag = first_etag or page.get("etag")
+            rows.extend(playlist_item_row(item) for item in page.get("items", []))
+        self._store_playlist_items(playlist_id, rows, first_etag)
+        return True
+
+    def sync_playlist_items_many(self, playlist_ids, force=False):
+        """sync_playlist_items for many playlists, paged in lockstep: round n
+        fetches page n of every playlist still paging, as batched calls, so
+        the round trips follow the longest playlist, not the playlist count.
+        Returns {playlist_id: error} for the playlists that failed."""
+        jobs = {}
+        for playlist_id in dict.fromkeys(playlist_ids):
+            etag = None if force else self.store.get_state(f"items:{playlist_id}")["etag"]
+            jobs[playlist_id] = {"conditional": etag, "token": None, "rows": [], "etag": None}
+        errors = {}
+        while jobs:
+            playlist_ids = list(jobs)
+            requests = []
+            for playlist_id in playlist_ids:
+                job = jobs[playlist_id]
+                request = self._item_pages_request(playlist_id, job["token"])
+                if job["token"] is None and job["conditional"]:
+                    request.headers["If-None-Match"] = job["conditional"]
+                requests.append(request)
+            for playlist_id, (response, error) in zip(playlist_ids, self.client.execute_batch(requests)):
+                job = jobs[playlist_id]
+                if error is not None:
+                    del jobs[playlist_id]
+                    if error_status(error) != 304:
+                        errors[playlist_id] = error
+                    continue
+                job["etag"] = job["etag"] or response.get("etag")
+                job["rows"].extend(playlist_item_row(item) for item in response.get("items", []))
+                job["token"] = response.get("nextPageToken")
+                if not job["token"]:
+                    self._store_playlist_items(playlist_id, job["rows"], job["etag"])
+                    del jobs[playlist_id]
+        return errors
+
+    def sync_membership(self, force=False):
+        """Bring all playlists and their items up to date; PlaylistMembership of the channel"""
+        self.sync_playlists(force)
+        channel_id = self.channel_id()
+        errors = self.sync_playlist_items_many([p["playlist_id"] for p in self.store.playlists(channel_id)], force)
+        for playlist_id, error in errors.items():
+            logging.warning(f"Could not read playlist {playlist_id}: {error}")
+        return self.store.membership(channel_id)
+
+    def _comment_sync_state(self, video_id, force=False, max_age=COMMENTS_MAX_AGE):
+        """(etag, watermark, comment_count) to sync video_id's comments with, None while they are current"""
+        state = self.store.get_state(f"comments:{video_id}")
+        video = self.store.video(video_id)
+        comment_count = video["comment_count"] if video else None
+        if (not force and state["synced_at"] is not None and comment_count is not None
+                and state["item_count"] == comment_count and time.time() - state["synced_at"] < max_age):
+            return None
+        if force:
+            return None, None, comment_count
+        return state["etag"], state["watermark"], comment_count
+
+    def _store_comment_pages(self, video_id, pages, etag, watermark, comment_count, force=False):
+        key = f"comments:{video_id}"
+        rows, first_etag = [], None
+        newest = watermark
+        for page in pages:
+            if page is None:
+                self.store.set_state(key, etag=etag, watermark=watermark, item_count=comment_count)
+                return False
+            first_etag = first_etag or page.get("etag")
+            page_rows = [comment_thread_row(item) for item in page.get("items", [])]
+            # Keep the whole page: known threads on it get their current like/reply counts
+            rows.extend(page_rows)
+            if watermark and any((row["published_at"] or "") <= watermark for row in page_rows):
+                break
+        if rows:
+            newest = max(newest or "", max(row["published_at"] or "" for row in rows))
+        if force:
+            self.store.replace_comment_threads(video_id, rows)
+        else:
+            self.store.upsert_comment_threads(rows)
+        self.store.set_state(key, etag=first_etag, watermark=newest, item_count=comment_count)
+        return bool(rows)
+
+    def sync_comments(self, video_id, force=False):
+        """Fetch a video's new comment threads and refresh the newest ones; skipped
+        while its commentCount is unchanged and the last sync is recent"""
+        plan = self._comment_sync_state(video_id, force)
+        if plan is None:
+            return False
+        pages = self._pages(self.youtube.commentThreads().list, plan[0], videoId=video_id, **COMMENT_LIST_PARAMS)
+        return self._store_comment_pages(video_id, pages, *plan, force=force)
+
+    def sync_comments_many(self, video_ids, force=False):
+        """sync_comments for many videos, with the first pages of all of them sent
+        as batched calls. Returns {video_id: error} for the videos that failed
+        (e.g. comments disabled)."""
+        plans = {}
+        for video_id in dict.fromkeys(video_ids):
+            plan = self._comment_sync_state(video_id, force)
+            if plan is not None:
+                plans[video_id] = plan
+        requests = []
+        for video_id, (etag, _, _) in plans.items():
+            request = self.youtube.commentThreads().list(videoId=video_id, **COMMENT_LIST_PARAMS)
+            if etag:
+                request.headers["If-None-Match"] = etag
+            requests.append(request)
+        errors = {}
+        for (video_id, plan), (response, error) in zip(plans.items(), self.client.execute_batch(requests)):
+            if error is not None and error_status(error) != 304:
+                errors[video_id] = error
+                continue
+            try:
+                pages = self._continue(response, self.youtube.commentThreads().list, videoId=video_id,
+                                       **COMMENT_LIST_PARAMS)
+                self._store_comment_pages(video_id, pages, *plan, force=force)
+            except Exception as e:
+                errors[video_id] = e
+        return errors
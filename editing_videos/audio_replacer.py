@@ -1,9 +1,13 @@
 import os
+import sys
 import subprocess
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 import moviepy as mp
-import ffmpeg
+
+# Shared stream-compatibility probe lives with the other editing helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "editing_coding_snippet"))
+from stream_probe import concat_videos
 
 class VideoAudioTool:
     def __init__(self):
@@ -287,7 +291,7 @@ class VideoAudioTool:
             messagebox.showerror("Error", "Failed to merge videos. Check console for details.")
     
     def merge_videos(self, video_files, output_folder, output_filename):
-        """Merge multiple video files using ffmpeg-python"""
+        """Merge multiple video files, stream-copying every clip whose format matches"""
         if not video_files:
             print("No video files provided. Exiting...")
             return False
@@ -297,42 +301,24 @@ class VideoAudioTool:
             return False
 
         output_file = os.path.join(output_folder, f"{output_filename}.mp4")
-        list_file = os.path.join(output_folder, "input_videos.txt")
         
         try:
-            # Create input list file
-            with open(list_file, "w") as f:
-                for video in video_files:
-                    # Normalize path for cross-platform compatibility
-                    normalized_path = os.path.normpath(video).replace("\\", "/")
-                    f.write(f"file '{normalized_path}'\n")
-            
             print(f"Merging {len(video_files)} videos...")
             for i, video in enumerate(video_files, 1):
                 print(f"{i}. {os.path.basename(video)}")
             
-            # Use ffmpeg-python to merge videos
-            ffmpeg.input(list_file, format='concat', safe=0).output(
-                output_file, 
-                c='copy'
-            ).run(overwrite_output=True, quiet=True)
+            # Clips in the dominant format are stream-copied, only the odd ones out are re-encoded
+            reencoded = concat_videos([os.path.normpath(video) for video in video_files], output_file)
             
-            print(f"Videos merged successfully into {output_file}")
+            print(f"Videos merged successfully into {output_file} ({reencoded} of {len(video_files)} re-encoded)")
             return True
             
-        except ffmpeg.Error as e:
-            print("Error merging videos:", e)
+        except subprocess.CalledProcessError as e:
+            print("Error merging videos:", e.stderr)
             return False
         except Exception as e:
             print(f"Unexpected error: {e}")
             return False
-        finally:
-            # Clean up the temporary list file
-            if os.path.exists(list_file):
-                try:
-                    os.remove(list_file)
-                except:
-                    pass
     
     def run(self):
         """Start the application"""